@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Request errors shared by the Food Delivery System services
+Raise these from any module; the API turns them into a JSON error with the given status
+"""
+
+
+class ApiError(Exception):
+    """Request rejected; status is the HTTP code the API should answer with"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class ValidationError(ApiError):
+    """Malformed request parameters (always a 400)"""
+
+    def __init__(self, message):
+        super().__init__(message, 400)
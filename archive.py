@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Hot/cold order archival for the Food Delivery System
+Moves Delivered/Cancelled orders older than a cutoff out of orders/order_items
+into per-month history partitions (orders_history_YYYY_MM and a clustered
+order_items_history_YYYY_MM), in batches that each commit on their own so an
+interrupted run simply resumes. The order_archive manifest records each
+month's id and time range so reads only touch the partitions they need.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import report_aggregates
+import schema_cache
+from db_pool import DB_PATH, sqlite_connector
+from status_engine import FINAL_STATUSES
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+BATCH_SIZE = 2000
+MANIFEST = 'order_archive'
+
+MANIFEST_SCHEMA = f"""CREATE TABLE IF NOT EXISTS {MANIFEST} (
+    month TEXT PRIMARY KEY,
+    orders_table TEXT NOT NULL,
+    items_table TEXT NOT NULL,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    min_id INTEGER,
+    max_id INTEGER,
+    min_created TEXT,
+    max_created TEXT,
+    archived_at TEXT
+)"""
+
+
+def partition_names(month):
+    """'2026-01' -> ('orders_history_2026_01', 'order_items_history_2026_01')"""
+    suffix = month.replace('-', '_')
+    return f'orders_history_{suffix}', f'order_items_history_{suffix}'
+
+
+def _columns(cursor, table):
+    cursor.execute(f"SELECT name, type, pk FROM pragma_table_info('{table}')")
+    return cursor.fetchall()
+
+
+def _ensure_partition(cursor, month):
+    """Create (or widen) a month's history tables to match orders/order_items"""
+    orders_table, items_table = partition_names(month)
+    for source, target in (('orders', orders_table), ('order_items', items_table)):
+        columns = _columns(cursor, source)
+        existing = {name for name, _, _ in _columns(cursor, target)}
+        if not existing:
+            definitions = [f"{name} {col_type or ''}".strip() for name, col_type, _ in columns]
+            if source == 'orders':
+                definitions = [d + ' PRIMARY KEY' if d.split()[0] == 'id' else d for d in definitions]
+                cursor.execute(f"CREATE TABLE {target} ({', '.join(definitions)})")
+                cursor.execute(f"CREATE INDEX idx_{target}_created ON {target} (created_at, id)")
+            else:
+                # clustered by order so an archived order's lines sit together
+                cursor.execute(f"CREATE TABLE {target} ({', '.join(definitions)}, "
+                               f"PRIMARY KEY (order_id, id)) WITHOUT ROWID")
+        else:
+            for name, col_type, _ in columns:
+                if name not in existing:
+                    cursor.execute(f"ALTER TABLE {target} ADD COLUMN {name} {col_type or ''}")
+    return orders_table, items_table
+
+
+def months(cursor):
+    """Manifest rows newest month first; empty when nothing was ever archived"""
+    try:
+        cursor.execute(f"""
+            SELECT month, orders_table, items_table, order_count, min_id, max_id, min_created, max_created
+            FROM {MANIFEST} ORDER BY month DESC
+        """)
+    except sqlite3.OperationalError:
+        return []
+    keys = ('month', 'orders_table', 'items_table', 'order_count', 'min_id', 'max_id', 'min_created', 'max_created')
+    return [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+
+def partitions(cursor):
+    """(orders table, items table) for live orders followed by every archived month, newest first"""
+    return [('orders', 'order_items')] + [(m['orders_table'], m['items_table']) for m in months(cursor)]
+
+
+def months_between(cursor, created_from=None, created_to=None):
+    """Partitions whose orders can fall in [created_from, created_to), newest first"""
+    return [m for m in months(cursor)
+            if (not created_from or m['max_created'] >= created_from)
+            and (not created_to or m['min_created'] < created_to)]
+
+
+def locate(cursor, order_id):
+    """(orders table, items table) of the partition holding an archived order, or None"""
+    for month in months(cursor):
+        if month['min_id'] <= order_id <= month['max_id']:
+            cursor.execute(f"SELECT 1 FROM {month['orders_table']} WHERE id = ?", (order_id,))
+            if cursor.fetchone():
+                return month['orders_table'], month['items_table']
+    return None
+
+
+def cutoff_for(days, now=None):
+    return ((now or datetime.now()) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def eligible(cursor, cutoff):
+    """Number of orders an archive run with this cutoff would move"""
+    marks = ', '.join('?' * len(FINAL_STATUSES))
+    cursor.execute(f"SELECT COUNT(*) FROM orders WHERE status IN ({marks}) AND created_at < ?",
+                   (*FINAL_STATUSES, cutoff))
+    return cursor.fetchone()[0]
+
+
+def archive_batch(conn, cutoff, batch_size=BATCH_SIZE):
+    """
+    Move up to batch_size of the oldest eligible orders, all from one month,
+    in a single transaction. Returns (month, moved) or None when done.
+    """
+    cursor = conn.cursor()
+    marks = ', '.join('?' * len(FINAL_STATUSES))
+    # walk the created_at index oldest first; +status keeps the planner off the status index
+    cursor.execute(f"""
+        SELECT id, created_at FROM orders
+        WHERE created_at < ? AND +status IN ({marks})
+        ORDER BY created_at, id
+        LIMIT ?
+    """, (cutoff, *FINAL_STATUSES, batch_size))
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+    month = str(rows[0][1])[:7]
+    ids = [order_id for order_id, created_at in rows if str(created_at)[:7] == month]
+
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        orders_table, items_table = _ensure_partition(cursor, month)
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp.archive_ids")
+        cursor.executemany("INSERT INTO temp.archive_ids (id) VALUES (?)", [(order_id,) for order_id in ids])
+        # re-check under the write lock: an order may have changed since the scan
+        cursor.execute(f"""
+            DELETE FROM temp.archive_ids WHERE id NOT IN (
+                SELECT id FROM orders WHERE id IN (SELECT id FROM temp.archive_ids) AND status IN ({marks})
+            )
+        """, FINAL_STATUSES)
+
+        order_columns = ', '.join(name for name, _, _ in _columns(cursor, 'orders'))
+        item_columns = ', '.join(name for name, _, _ in _columns(cursor, 'order_items'))
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO {orders_table} ({order_columns})
+            SELECT {order_columns} FROM orders WHERE id IN (SELECT id FROM temp.archive_ids)
+        """)
+        moved = cursor.rowcount
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO {items_table} ({item_columns})
+            SELECT {item_columns} FROM order_items WHERE order_id IN (SELECT id FROM temp.archive_ids)
+        """)
+        cursor.execute("DELETE FROM order_items WHERE order_id IN (SELECT id FROM temp.archive_ids)")
+        cursor.execute("DELETE FROM orders WHERE id IN (SELECT id FROM temp.archive_ids)")
+        # the delete trigger took these orders out of the report counters; archived orders still count
+        report_aggregates.add_rows(cursor, orders_table, "o.id IN (SELECT id FROM temp.archive_ids)")
+
+        cursor.execute(f"""
+            SELECT COUNT(*), MIN(id), MAX(id), MIN(created_at), MAX(created_at) FROM {orders_table}
+        """)
+        count, min_id, max_id, min_created, max_created = cursor.fetchone()
+        cursor.execute(f"""
+            INSERT INTO {MANIFEST} (month, orders_table, items_table, order_count, min_id, max_id,
+                                    min_created, max_created, archived_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(month) DO UPDATE SET order_count = excluded.order_count, min_id = excluded.min_id,
+                max_id = excluded.max_id, min_created = excluded.min_created,
+                max_created = excluded.max_created, archived_at = excluded.archived_at
+        """, (month, orders_table, items_table, count, min_id, max_id, str(min_created), str(max_created),
+              datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    return month, moved
+
+
+def vacuum(conn):
+    """Rebuild the file so pages freed by archived orders are returned to the OS"""
+    started = time.perf_counter()
+    conn.execute("VACUUM")
+    return time.perf_counter() - started
+
+
+def run(db_path=DB_PATH, older_than_days=ARCHIVE_AFTER_DAYS, batch_size=BATCH_SIZE, max_batches=None,
+        time_limit=None, compact=False, progress=None):
+    """
+    Archive eligible orders batch by batch until none are left, max_batches
+    ran or time_limit seconds passed. Returns {month: orders moved}.
+    """
+    cutoff = cutoff_for(older_than_days)
+    conn = sqlite_connector(db_path)()
+    conn.isolation_level = None  # transactions are managed explicitly per batch
+    moved = {}
+    started = time.monotonic()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(MANIFEST_SCHEMA)
+        caps = schema_cache.introspect(conn)
+        if not caps.has_table('order_stats_status'):
+            # archived orders keep counting in reports only through the maintained aggregates
+            cursor.execute("BEGIN")
+            report_aggregates.install(conn)
+            cursor.execute("COMMIT")
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            if time_limit is not None and time.monotonic() - started >= time_limit:
+                break
+            result = archive_batch(conn, cutoff, batch_size)
+            if result is None:
+                break
+            month, count = result
+            moved[month] = moved.get(month, 0) + count
+            batches += 1
+            if progress:
+                progress(month, count, sum(moved.values()))
+        if compact:
+            elapsed = vacuum(conn)
+            if progress:
+                progress(None, 0, sum(moved.values()), elapsed)
+    finally:
+        conn.close()
+    schema_cache.refresh(db_path)
+    return moved
+
+
+def print_status(db_path, older_than_days):
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        rows = months(cursor)
+        cursor.execute("SELECT COUNT(*) FROM orders")
+        hot = cursor.fetchone()[0]
+        pending = eligible(cursor, cutoff_for(older_than_days))
+    finally:
+        conn.close()
+    print(f"📊 Hot orders: {hot} ({pending} older than {older_than_days} days and ready to archive)")
+    if not rows:
+        print("   No archived months")
+    for month in rows:
+        print(f"   {month['month']}: {month['order_count']} orders in {month['orders_table']} "
+              f"(ids {month['min_id']}-{month['max_id']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old completed orders into monthly history partitions")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database file")
+    parser.add_argument('--older-than', type=int, default=ARCHIVE_AFTER_DAYS, metavar='DAYS',
+                        help=f"archive Delivered/Cancelled orders older than this (default {ARCHIVE_AFTER_DAYS})")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="orders moved per transaction")
+    parser.add_argument('--max-batches', type=int, help="stop after this many batches (rerun to resume)")
+    parser.add_argument('--time-limit', type=float, metavar='SECONDS', help="stop starting batches after this long")
+    parser.add_argument('--vacuum', action='store_true', help="VACUUM the database afterwards")
+    parser.add_argument('--status', action='store_true', help="show archived months and pending orders only")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        print(f"❌ Database not found: {args.db}")
+        sys.exit(1)
+    if args.status:
+        print_status(args.db, args.older_than)
+        return
+
+    def progress(month, count, total, elapsed=None):
+        if month is None:
+            print(f"🧹 VACUUM finished in {elapsed:.1f}s")
+        else:
+            print(f"📦 {month}: moved {count} orders ({total} so far)")
+
+    moved = run(args.db, args.older_than, args.batch_size, args.max_batches, args.time_limit, args.vacuum, progress)
+    total = sum(moved.values())
+    print(f"✅ Archived {total} orders" + (f" across {len(moved)} months" if moved else ""))
+
+
+if __name__ == '__main__':
+    main()
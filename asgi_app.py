@@ -0,0 +1,759 @@
+#!/usr/bin/env python3
+"""
+Async (ASGI) serving mode for the Food Delivery System API
+Serves the same /api routes as backend/app.py from one event loop: reads go
+through an async connection pool, writes reuse the order service on worker
+threads, and the status engine runs as an asyncio task. Live order events
+are streamed over Server-Sent Events or WebSocket from the event hub.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from urllib.parse import parse_qs
+
+import archive
+import catalog_cache
+import catalog_search
+import event_hub
+import metrics
+import monitor_changes
+import order_queries
+import order_service
+import report_aggregates
+import schema_cache
+import status_engine
+import structured_log
+from api_errors import ApiError, ValidationError
+from async_db import AsyncPool
+from db_pool import DB_PATH, POOL_SIZE, get_pool
+from dispatcher import get_dispatcher
+
+ASYNC_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', str(max(POOL_SIZE, 8))))
+MAX_BODY = 1024 * 1024
+KEEPALIVE = 15  # seconds between SSE comment frames on an idle stream
+# response headers a cross-origin client (the React app on :3000) may read
+EXPOSE_HEADERS = 'X-Next-Cursor, ETag'
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+log = structured_log.get_logger('asgi_app')
+
+
+class Request:
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query = {k: v[-1] for k, v in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+        self.query_lists = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+        self.body = body
+
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            raise ValidationError('Invalid JSON body')
+        if not isinstance(data, (dict, list)):
+            raise ValidationError('Invalid JSON body')
+        return data
+
+    def json_object(self):
+        """The body for handlers that read named fields; lists and scalars are a 400"""
+        data = self.json()
+        if not isinstance(data, dict):
+            raise ValidationError('Expected a JSON object')
+        return data
+
+    def int_arg(self, name, default=None):
+        value = self.query.get(name)
+        if value in (None, ''):
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError(f"Invalid {name}")
+
+    def float_arg(self, name, default=None):
+        value = self.query.get(name)
+        if value in (None, ''):
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            raise ValidationError(f"Invalid {name}")
+
+
+class Response:
+    def __init__(self, body=b'', status=200, headers=None, content_type='application/json'):
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.status = status
+        self.headers = dict(headers or {})
+        self.headers.setdefault('Content-Type', content_type)
+
+
+def json_response(data, status=200, headers=None):
+    return Response(json.dumps(data, default=str), status, headers)
+
+
+def in_thread(fn, *args):
+    """asyncio.to_thread that keeps the work attributed to (and profiled with) the current request"""
+    return asyncio.to_thread(metrics.call, fn, *args)
+
+
+def route_label(pattern):
+    """'/api/orders/(?P<order_id>\\d+)' -> '/api/orders/{order_id}' for metric labels"""
+    return re.sub(r'\(\?P<(\w+)>[^)]*\)', r'{\1}', pattern)
+
+
+def error_response(message, status):
+    return json_response({'error': message}, status)
+
+
+class EventStream:
+    """Returned by a handler to stream a subscription instead of a single body"""
+
+    def __init__(self, subscription):
+        self.subscription = subscription
+
+
+class App:
+    """ASGI application; routes are (method, path regex, handler name)"""
+
+    ROUTES = [
+        ('GET', r'/api/health', 'health'),
+        ('GET', r'/metrics', 'get_metrics'),
+        ('GET', r'/debug/profile', 'get_profile'),
+        ('GET', r'/api/restaurants', 'get_restaurants'),
+        ('GET', r'/api/restaurants/(?P<restaurant_id>\d+)', 'get_restaurant'),
+        ('GET', r'/api/restaurants/(?P<restaurant_id>\d+)/menu', 'get_menu'),
+        ('GET', r'/api/menu/(?P<item_id>\d+)', 'get_menu_item'),
+        ('GET', r'/api/search', 'search'),
+        ('GET', r'/api/search/suggest', 'search_suggest'),
+        ('GET', r'/api/customers', 'get_customers'),
+        ('POST', r'/api/customers', 'create_customer'),
+        ('POST', r'/api/customers/find-or-create', 'find_or_create_customer'),
+        ('GET', r'/api/customers/(?P<customer_id>\d+)', 'get_customer'),
+        ('GET', r'/api/delivery-staff', 'get_delivery_staff'),
+        ('GET', r'/api/delivery-staff/available', 'get_available_delivery_staff'),
+        ('GET', r'/api/delivery-staff/(?P<staff_id>\d+)', 'get_delivery_staff_member'),
+        ('GET', r'/api/orders', 'get_orders'),
+        ('POST', r'/api/orders', 'create_order'),
+        ('POST', r'/api/orders/batch', 'create_orders'),
+        ('GET', r'/api/orders/changes', 'get_order_changes'),
+        ('GET', r'/api/orders/(?P<order_id>\d+)', 'get_order'),
+        ('PUT', r'/api/orders/(?P<order_id>\d+)', 'update_order'),
+        ('DELETE', r'/api/orders/(?P<order_id>\d+)', 'delete_order'),
+        ('POST', r'/api/orders/(?P<order_id>\d+)/items', 'add_order_item'),
+        ('PATCH', r'/api/orders/(?P<order_id>\d+)/items', 'edit_order_items'),
+        ('DELETE', r'/api/orders/(?P<order_id>\d+)/items/(?P<item_id>\d+)', 'remove_order_item'),
+        ('GET', r'/api/reports/summary', 'get_summary_report'),
+        ('GET', r'/api/reports/orders-by-status', 'get_orders_by_status'),
+        ('GET', r'/api/reports/restaurant-revenue', 'get_restaurant_revenue'),
+        ('GET', r'/api/reports/top-customers', 'get_top_customers'),
+        ('GET', r'/api/events', 'events'),
+        ('GET', r'/api/orders/(?P<order_id>\d+)/events', 'events'),
+        ('GET', r'/api/restaurants/(?P<restaurant_id>\d+)/events', 'events'),
+    ]
+
+    def __init__(self, db_path=DB_PATH, pool_size=ASYNC_POOL_SIZE, run_status_engine=True, watch_catalog=False):
+        self.db_path = db_path
+        self.db = AsyncPool(db_path, pool_size)
+        self.catalog = catalog_cache.get_catalog(db_path)
+        self.run_status_engine = run_status_engine
+        self.engine = None
+        self.watch_catalog = watch_catalog
+        self.watcher = None
+        self.hub = event_hub.get_hub(db_path)
+        self._streams = set()
+        self._routes = [(method, re.compile(pattern + '$'), getattr(self, name), route_label(pattern))
+                        for method, pattern, name in self.ROUTES]
+
+    @property
+    def caps(self):
+        return schema_cache.get_capabilities(self.db_path)
+
+    # ---- ASGI plumbing ----
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        elif scope['type'] == 'websocket':
+            await self._websocket(scope, receive, send)
+
+    async def startup(self):
+        await in_thread(schema_cache.get_capabilities, self.db_path)
+        await in_thread(get_dispatcher(self.db_path).load)
+        if self.run_status_engine:
+            self.engine = await status_engine.start_engine_async(self.db_path)
+        if self.watch_catalog:
+            # catalog writes from other processes (SQL scripts, the GUI) reach the cache through the file watcher
+            self.watcher = await in_thread(monitor_changes.Watcher, os.path.dirname(os.path.abspath(self.db_path)))
+            await in_thread(monitor_changes.watch_catalog, self.watcher, self.db_path)
+            self.watcher.start()
+        metrics.REGISTRY.add_collector(self._collect)
+
+    async def shutdown(self):
+        metrics.REGISTRY.remove_collector(self._collect)
+        for subscription in list(self._streams):
+            subscription.close()
+        if self.engine is not None:
+            await self.engine.stop_async()
+            self.engine = None
+        if self.watcher is not None:
+            await in_thread(self.watcher.close)
+            self.watcher = None
+        await self.db.close()
+        if metrics.PROFILE_SAMPLE_RATE > 0:
+            count = metrics.dump_profiles(PROFILE_DIR)
+            log.info("sampled profiles written", extra={'routes': count, 'directory': PROFILE_DIR})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY:
+                raise ApiError('Request body too large', 413)
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    def _match(self, method, path):
+        """(handler, path params, route label); handler is 404/405 and params None when nothing matches"""
+        allowed = False
+        for route_method, pattern, handler, label in self._routes:
+            match = pattern.match(path)
+            if match:
+                if route_method == method:
+                    return handler, {k: int(v) for k, v in match.groupdict().items()}, label
+                allowed = True
+        return (405 if allowed else 404), None, 'unmatched'
+
+    async def _http(self, scope, receive, send):
+        stats = token = None
+        try:
+            if scope['method'] == 'OPTIONS':
+                response = Response(b'', 204, {
+                    'Access-Control-Allow-Methods': 'GET, POST, PUT, PATCH, DELETE, OPTIONS',
+                    'Access-Control-Allow-Headers': 'Content-Type, If-None-Match, If-Match, Last-Event-ID',
+                })
+            else:
+                handler, params, label = self._match(scope['method'], scope['path'])
+                stats, token = metrics.begin_request(scope['method'], label)
+                if params is None:
+                    response = error_response('Not found' if handler == 404 else 'Method not allowed', handler)
+                else:
+                    body = await self._read_body(receive)
+                    if body is None:
+                        metrics.end_request(stats, token, 499)
+                        return
+                    response = await handler(Request(scope, body), **params)
+                    if isinstance(response, EventStream):
+                        metrics.end_request(stats, token, 200)  # time to subscribe, not the stream's lifetime
+                        await self._stream_sse(response.subscription, receive, send)
+                        return
+        except ApiError as e:
+            response = error_response(e.message, e.status)
+        except Exception as e:
+            log.exception("unhandled error", extra={'method': scope['method'], 'path': scope['path']})
+            response = error_response(str(e), 500)
+        if stats is not None:
+            metrics.end_request(stats, token, response.status)
+
+        headers = [(b'access-control-allow-origin', b'*'),
+                   (b'access-control-expose-headers', EXPOSE_HEADERS.encode('latin-1'))]
+        headers += [(k.lower().encode('latin-1'), str(v).encode('latin-1')) for k, v in response.headers.items()]
+        headers.append((b'content-length', str(len(response.body)).encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': response.status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': response.body})
+
+    # ---- live events ----
+
+    async def events(self, request, order_id=None, restaurant_id=None):
+        """
+        Server-Sent Events for one order, one restaurant or everything.
+        Reconnecting clients send Last-Event-ID (or ?last_event_id) to replay
+        what they missed from the hub's buffer.
+        """
+        return EventStream(self._subscribe(request, order_id, restaurant_id))
+
+    def _subscribe(self, request, order_id=None, restaurant_id=None):
+        if order_id is None:
+            order_id = request.int_arg('order_id')
+        if restaurant_id is None:
+            restaurant_id = request.int_arg('restaurant_id')
+        last_event_id = request.headers.get('last-event-id') or request.query.get('last_event_id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            raise ValidationError('Invalid last_event_id')
+        subscription = self.hub.subscribe(order_id, restaurant_id, last_event_id, asyncio.get_running_loop())
+        self._streams.add(subscription)
+        return subscription
+
+    async def _watch_disconnect(self, receive, subscription, message_type):
+        while True:
+            message = await receive()
+            if message['type'] == message_type:
+                subscription.close()
+                return
+
+    async def _stream_sse(self, subscription, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'access-control-allow-origin', b'*'),
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        watcher = asyncio.create_task(self._watch_disconnect(receive, subscription, 'http.disconnect'))
+        try:
+            await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.next(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+                    continue
+                if event is None:
+                    break
+                await send({'type': 'http.response.body', 'body': event.sse().encode('utf-8'), 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        except OSError:
+            pass  # client went away mid-write
+        finally:
+            watcher.cancel()
+            subscription.close()
+            self._streams.discard(subscription)
+
+    async def _websocket(self, scope, receive, send):
+        """Same event streams as SSE for clients that prefer a WebSocket"""
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+        handler, params, _ = self._match('GET', scope['path'])
+        if params is None or handler != self.events:
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        try:
+            subscription = self._subscribe(Request(dict(scope, method='GET'), b''), **params)
+        except ApiError as e:
+            await send({'type': 'websocket.close', 'code': 4400, 'reason': e.message})
+            return
+        await send({'type': 'websocket.accept'})
+        watcher = asyncio.create_task(self._watch_disconnect(receive, subscription, 'websocket.disconnect'))
+        try:
+            while True:
+                event = await subscription.next()
+                if event is None:
+                    break
+                await send({'type': 'websocket.send', 'text': json.dumps(event.as_dict(), default=str)})
+            if not watcher.done():
+                await send({'type': 'websocket.close', 'code': 1000})
+        except OSError:
+            pass
+        finally:
+            watcher.cancel()
+            subscription.close()
+            self._streams.discard(subscription)
+
+    # ---- instrumentation ----
+
+    async def get_metrics(self, request):
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4')
+
+    async def get_profile(self, request):
+        """Aggregated cProfile output of sampled requests (PROFILE_SAMPLE_RATE > 0)"""
+        report = metrics.profile_report(request.query.get('route'), request.int_arg('limit', 30),
+                                        request.query.get('sort', 'cumulative'))
+        return Response(report, content_type='text/plain')
+
+    def _collect(self):
+        """Gauges read at scrape time"""
+        samples = []
+        pools = [('async', self.db.stats()), ('sync', get_pool(self.db_path).stats())]
+        for kind, stats in pools:
+            for key in ('size', 'open', 'idle', 'waits', 'wait_time'):
+                samples.append((f'db_pool_{key}', f'Connection pool {key.replace("_", " ")}',
+                                {'pool': kind}, stats[key]))
+        for key, value in get_dispatcher(self.db_path).stats().items():
+            samples.append((f'dispatcher_{key}', f'Dispatcher {key.replace("_", " ")}', {}, value))
+        for key, value in self.hub.stats().items():
+            samples.append((f'event_hub_{key}', f'Event hub {key.replace("_", " ")}', {}, value))
+        for key, value in self.catalog.stats().items():
+            if isinstance(value, (int, float)):
+                samples.append((f'catalog_cache_{key}', f'Catalog cache {key.replace("_", " ")}', {}, value))
+        if self.engine is not None:
+            samples.append(('status_engine_pending_orders', 'Orders with a scheduled transition', {},
+                            self.engine.pending()))
+        return samples
+
+    # ---- catalog ----
+
+    async def _cached(self, request, load, *args):
+        entry = await in_thread(load, *args)
+        status, body, headers = catalog_cache.respond(entry, request.headers.get('if-none-match'))
+        return Response(body, status, headers)
+
+    async def health(self, request):
+        return json_response({'status': 'Backend is running'})
+
+    async def get_restaurants(self, request):
+        return await self._cached(request, self.catalog.restaurants)
+
+    async def get_restaurant(self, request, restaurant_id):
+        return await self._cached(request, self.catalog.restaurant, restaurant_id)
+
+    async def get_menu(self, request, restaurant_id):
+        return await self._cached(request, self.catalog.menu, restaurant_id)
+
+    async def get_menu_item(self, request, item_id):
+        return await self._cached(request, self.catalog.menu_item, item_id)
+
+    async def search(self, request):
+        filters = {
+            'cuisine': request.query.get('cuisine'),
+            'category': request.query.get('category'),
+            'restaurant_id': request.int_arg('restaurant_id'),
+            'min_rating': request.float_arg('min_rating'),
+            'min_price': request.float_arg('min_price'),
+            'max_price': request.float_arg('max_price'),
+        }
+        text = request.query.get('q', '')
+        kind = request.query.get('type', 'all')
+        limit = request.int_arg('limit', catalog_search.DEFAULT_LIMIT)
+        return json_response(await self.db.run(
+            lambda conn: catalog_search.search(conn, text, filters, kind, limit, db_path=self.db_path)))
+
+    async def search_suggest(self, request):
+        text = request.query.get('q', '')
+        limit = request.int_arg('limit', 8)
+        return json_response(await self.db.run(lambda conn: catalog_search.suggest(conn, text, limit, db_path=self.db_path)))
+
+    # ---- customers ----
+
+    def _require(self, table, what):
+        if not self.caps.has_table(table):
+            raise ApiError(f"{what} table does not exist. Please run the database migration.", 404)
+
+    async def get_customers(self, request):
+        self._require('customers', 'Customers')
+        return Response(await self.db.fetch_json("SELECT * FROM customers ORDER BY name ASC"))
+
+    async def get_customer(self, request, customer_id):
+        self._require('customers', 'Customers')
+        customer = await self.db.fetch_one("SELECT * FROM customers WHERE id = ?", (customer_id,))
+        if customer is None:
+            return error_response('Customer not found', 404)
+        return json_response(customer)
+
+    async def create_customer(self, request):
+        self._require('customers', 'Customers')
+        data = request.json_object()
+        if not data.get('name') or not data.get('email'):
+            return error_response('Name and email are required', 400)
+        async with self.db.connection() as conn:
+            customer_id, _ = await conn.execute("""
+                INSERT INTO customers (name, email, phone, address, city) VALUES (?, ?, ?, ?, ?)
+            """, (data['name'], data['email'], data.get('phone', ''), data.get('address', ''), data.get('city', '')))
+        return json_response({'id': customer_id, 'name': data['name'], 'email': data['email'],
+                              'message': 'Customer created successfully'}, 201)
+
+    async def find_or_create_customer(self, request):
+        self._require('customers', 'Customers')
+        data = request.json_object()
+        if not data.get('name'):
+            return error_response('Name is required', 400)
+        customer = await self.db.run(_find_or_create_customer, data)
+        return json_response({'id': customer['id'], 'customer': customer,
+                              'message': 'Customer found/created successfully'})
+
+    # ---- delivery staff ----
+
+    async def get_delivery_staff(self, request):
+        self._require('delivery_staff', 'Delivery staff')
+        status = request.query.get('status')
+        if status:
+            body = await self.db.fetch_json("SELECT * FROM delivery_staff WHERE status = ? ORDER BY name ASC", (status,))
+        else:
+            body = await self.db.fetch_json("SELECT * FROM delivery_staff ORDER BY name ASC")
+        return Response(body)
+
+    async def get_available_delivery_staff(self, request):
+        self._require('delivery_staff', 'Delivery staff')
+        return Response(await self.db.fetch_json("""
+            SELECT * FROM delivery_staff WHERE status = 'Available'
+            ORDER BY rating DESC, total_deliveries ASC
+        """))
+
+    async def get_delivery_staff_member(self, request, staff_id):
+        self._require('delivery_staff', 'Delivery staff')
+        staff = await self.db.fetch_one("SELECT * FROM delivery_staff WHERE id = ?", (staff_id,))
+        if staff is None:
+            return error_response('Delivery staff not found', 404)
+        return json_response(staff)
+
+    # ---- orders ----
+
+    def _order_filters(self, request):
+        filters = {}
+        statuses = request.query_lists.get('status')
+        if statuses:
+            filters['status'] = [s for value in statuses for s in value.split(',') if s]
+        for key in ('restaurant_id', 'customer_id', 'delivery_staff_id'):
+            filters[key] = request.int_arg(key)
+        filters['created_from'] = request.query.get('created_from')
+        filters['created_to'] = request.query.get('created_to')
+        return filters
+
+    async def get_orders(self, request):
+        """
+        One keyset page (DEFAULT_LIMIT orders unless ?limit= says otherwise);
+        the body stays a plain array and the next cursor travels in X-Next-Cursor
+        """
+        page = await in_thread(
+            order_queries.list_orders, self._order_filters(request), request.query.get('cursor'),
+            request.int_arg('limit', order_queries.DEFAULT_LIMIT), self.db_path)
+        headers = {'X-Next-Cursor': page['next_cursor']} if page['next_cursor'] else None
+        return json_response(page['orders'], headers=headers)
+
+    async def get_order_changes(self, request):
+        return json_response(await in_thread(
+            order_queries.changed_orders, request.query.get('since'), self._order_filters(request),
+            request.int_arg('limit', order_queries.DEFAULT_LIMIT), self.db_path))
+
+    async def get_order(self, request, order_id):
+        """Header and items are read concurrently on two pooled connections; archived orders are found too"""
+        order = await self._fetch_order(order_id)
+        if order is None:
+            location = await self.db.run(lambda conn: archive.locate(conn.cursor(), order_id))
+            if location:
+                order = await self._fetch_order(order_id, *location)
+        if order is None:
+            return error_response('Order not found', 404)
+        return json_response(order)
+
+    async def _fetch_order(self, order_id, orders_table='orders', items_table='order_items'):
+        caps = self.caps
+        columns = ['o.*', 'r.name as restaurant_name']
+        joins = ['LEFT JOIN restaurants r ON o.restaurant_id = r.id']
+        if caps.orders_has_customer_id and caps.has_customers:
+            columns += ['c.name as customer_name', 'c.email as customer_email', 'c.phone as customer_phone',
+                        'c.address as customer_address']
+            joins.append('LEFT JOIN customers c ON o.customer_id = c.id')
+        if caps.orders_has_customer_id and caps.has_delivery_staff:
+            columns += ['ds.name as delivery_staff_name', 'ds.phone as delivery_staff_phone', 'ds.vehicle_type']
+            joins.append('LEFT JOIN delivery_staff ds ON o.delivery_staff_id = ds.id')
+        order, items = await asyncio.gather(
+            self.db.fetch_one(f"SELECT {', '.join(columns)} FROM {orders_table} o {' '.join(joins)} WHERE o.id = ?",
+                              (order_id,)),
+            self.db.fetch_all(f"""
+                SELECT oi.*, mi.name, mi.price FROM {items_table} oi
+                LEFT JOIN menu_items mi ON oi.menu_item_id = mi.id
+                WHERE oi.order_id = ?
+            """, (order_id,)),
+        )
+        if order is not None:
+            order['items'] = items
+        return order
+
+    async def create_order(self, request):
+        order = await in_thread(order_service.create_order, request.json_object(), self.db_path)
+        return json_response(dict(order, message='Order created successfully'), 201)
+
+    async def create_orders(self, request):
+        data = request.json()
+        orders = data.get('orders') if isinstance(data, dict) else data
+        if not isinstance(orders, list) or not orders:
+            return error_response('Expected a non-empty list of orders', 400)
+        atomic = isinstance(data, dict) and bool(data.get('atomic'))
+        results = await in_thread(order_service.create_orders, orders, self.db_path, atomic)
+        failed = sum(1 for result in results if 'error' in result)
+        return json_response({'orders': results, 'created': len(results) - failed, 'failed': failed},
+                             207 if failed else 201)
+
+    async def update_order(self, request, order_id):
+        result = await in_thread(order_service.update_order, order_id, request.json_object().get('status'), self.db_path)
+        return json_response(dict(result, message='Order updated successfully'))
+
+    async def delete_order(self, request, order_id):
+        await in_thread(order_service.delete_order, order_id, self.db_path)
+        return json_response({'message': 'Order deleted successfully'})
+
+    def _expected_version(self, request, data=None):
+        """Order version the client last saw: body 'version', ?version= or an If-Match header"""
+        value = (data or {}).get('version')
+        if value is None:
+            value = request.query.get('version') or request.headers.get('if-match', '').strip('"') or None
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValidationError('Invalid version')
+
+    async def add_order_item(self, request, order_id):
+        data = request.json_object()
+        result = await in_thread(order_service.add_order_item, order_id, data.get('menu_item_id'),
+                                 data.get('quantity', 1), self._expected_version(request, data), self.db_path)
+        return json_response({'message': 'Item added successfully', 'new_total': result['new_total'],
+                              'version': result['version']}, 201)
+
+    async def remove_order_item(self, request, order_id, item_id):
+        result = await in_thread(order_service.remove_order_item, order_id, item_id,
+                                 self._expected_version(request), self.db_path)
+        return json_response({'message': 'Item removed successfully', 'new_total': result['new_total'],
+                              'version': result['version']})
+
+    async def edit_order_items(self, request, order_id):
+        """Many add/set/remove edits to one order's cart, applied in a single transaction"""
+        data = request.json()
+        edits = data.get('edits') if isinstance(data, dict) else data
+        version = self._expected_version(request, data if isinstance(data, dict) else None)
+        result = await in_thread(order_service.edit_order_items, order_id, edits, version, self.db_path)
+        return json_response(dict(result, message='Order items updated successfully'))
+
+    # ---- reports ----
+
+    async def get_summary_report(self, request):
+        caps = self.caps
+
+        async def count(table):
+            return await self.db.fetch_value(f"SELECT COUNT(*) FROM {table}") if caps.has_table(table) else 0
+
+        if caps.has_table('order_stats_status'):
+            orders = self.db.run(report_aggregates.summary)
+        else:
+            orders = self.db.run(lambda conn: dict(zip(
+                ('total_orders', 'total_revenue', 'avg_order_value'),
+                conn.execute("SELECT COUNT(*), COALESCE(SUM(total_price), 0), COALESCE(AVG(total_price), 0)"
+                             " FROM orders").fetchone())))
+        customers, restaurants, staff, orders = await asyncio.gather(
+            count('customers'), count('restaurants'), count('delivery_staff'), orders)
+        return json_response({
+            'total_customers': customers,
+            'total_restaurants': restaurants,
+            'total_delivery_staff': staff,
+            'total_orders': orders['total_orders'],
+            'total_revenue': float(orders['total_revenue']),
+            'avg_order_value': float(orders['avg_order_value']),
+        })
+
+    async def get_orders_by_status(self, request):
+        if self.caps.has_table('order_stats_status'):
+            return json_response(await self.db.run(report_aggregates.orders_by_status))
+        return Response(await self.db.fetch_json(
+            "SELECT status, COUNT(*) as count FROM orders GROUP BY status ORDER BY count DESC"))
+
+    async def get_restaurant_revenue(self, request):
+        if self.caps.has_table('order_stats_restaurant'):
+            return json_response(await self.db.run(report_aggregates.restaurant_revenue))
+        return Response(await self.db.fetch_json("""
+            SELECT r.id, r.name as restaurant_name, r.cuisine, COUNT(o.id) as order_count,
+                   SUM(o.total_price) as total_revenue, AVG(o.total_price) as avg_order_value
+            FROM restaurants r
+            LEFT JOIN orders o ON r.id = o.restaurant_id
+            GROUP BY r.id, r.name, r.cuisine
+            ORDER BY total_revenue DESC
+        """))
+
+    async def get_top_customers(self, request):
+        self._require('customers', 'Customers')
+        return Response(await self.db.fetch_json("""
+            SELECT c.id, c.name, c.email, COUNT(o.id) as order_count,
+                   SUM(o.total_price) as total_spent, AVG(o.total_price) as avg_order_value
+            FROM customers c
+            LEFT JOIN orders o ON c.id = o.customer_id
+            GROUP BY c.id, c.name, c.email
+            HAVING total_spent > 0
+            ORDER BY total_spent DESC
+            LIMIT ?
+        """, (request.int_arg('limit', 5),)))
+
+
+def _find_or_create_customer(conn, data):
+    """Runs as one transaction on an async pool connection's thread"""
+    name = data['name']
+    email = (data.get('email') or '').strip().lower()
+    details = (data.get('phone', ''), data.get('address', ''), data.get('city', ''))
+    try:
+        if email:
+            row = conn.execute("SELECT id FROM customers WHERE email = ?", (email,)).fetchone()
+            if row:
+                conn.execute("UPDATE customers SET name = ?, phone = ?, address = ?, city = ? WHERE id = ?",
+                             (name, *details, row[0]))
+        else:
+            row = conn.execute("SELECT id FROM customers WHERE name = ? LIMIT 1", (name,)).fetchone()
+            if row:
+                conn.execute("UPDATE customers SET phone = ?, address = ?, city = ? WHERE id = ?", (*details, row[0]))
+        if row:
+            customer_id = row[0]
+        else:
+            if not email:
+                base = name.lower().replace(' ', '.')
+                taken = {r[0] for r in conn.execute(
+                    "SELECT email FROM customers WHERE email LIKE ?", (base + '%@fooddelivery.com',))}
+                email = f"{base}@fooddelivery.com"
+                counter = 1
+                while email in taken:
+                    email = f"{base}{counter}@fooddelivery.com"
+                    counter += 1
+            customer_id = conn.execute(
+                "INSERT INTO customers (name, email, phone, address, city) VALUES (?, ?, ?, ?, ?)",
+                (name, email, *details)).lastrowid
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    cursor = conn.execute("SELECT * FROM customers WHERE id = ?", (customer_id,))
+    return dict(zip([d[0] for d in cursor.description], cursor.fetchone()))
+
+
+app = App()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the API with an ASGI server (uvicorn)")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database file")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--no-status-engine', action='store_true', help="do not advance order statuses")
+    parser.add_argument('--watch-catalog', action='store_true',
+                        help="watch the database file and refresh cached catalog rows changed by other processes")
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ uvicorn is not installed: pip install uvicorn (or run any ASGI server against asgi_app:app)")
+        sys.exit(1)
+    uvicorn.run(App(args.db, run_status_engine=not args.no_status_engine, watch_catalog=args.watch_catalog),
+                host=args.host, port=args.port, lifespan='on', log_level='info')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Asyncio access to the Food Delivery System database
+Each connection runs its calls on its own worker thread (as aiosqlite does),
+so coroutines await queries without blocking the event loop
+"""
+
+import asyncio
+import collections
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import metrics
+import row_converter
+from db_pool import DB_PATH, POOL_SIZE, sqlite_connector
+
+
+class AsyncConnection:
+    """One SQLite connection driven from a dedicated thread"""
+
+    def __init__(self, conn, executor):
+        self._conn = conn
+        self._executor = executor
+
+    @classmethod
+    async def connect(cls, db_path=DB_PATH):
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='async-db')
+        conn = await asyncio.get_running_loop().run_in_executor(executor, sqlite_connector(db_path))
+        return cls(conn, executor)
+
+    async def run(self, fn, *args):
+        """Call fn(connection, *args) on the connection's thread, e.g. a whole transaction"""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()  # keeps per-request metrics attributed to the caller
+        call = functools.partial(metrics.call, fn, self._conn, *args)
+        return await loop.run_in_executor(self._executor, context.run, call)
+
+    async def fetch_all(self, sql, params=()):
+        """Rows as dicts (numeric columns converted)"""
+        return await self.run(lambda conn: row_converter.fetch_dicts(conn.execute(sql, params)))
+
+    async def fetch_one(self, sql, params=()):
+        return await self.run(lambda conn: row_converter.fetch_dict(conn.execute(sql, params)))
+
+    async def fetch_json(self, sql, params=()):
+        """Result rows serialized as a JSON array string"""
+        return await self.run(lambda conn: row_converter.fetch_json_array(conn.execute(sql, params)))
+
+    async def fetch_value(self, sql, params=()):
+        row = await self.run(lambda conn: conn.execute(sql, params).fetchone())
+        return row[0] if row else None
+
+    async def execute(self, sql, params=()):
+        """Run one statement and commit; returns (lastrowid, rowcount)"""
+        def write(conn):
+            try:
+                cursor = conn.execute(sql, params)
+                conn.commit()
+                return cursor.lastrowid, cursor.rowcount
+            except Exception:
+                conn.rollback()
+                raise
+        return await self.run(write)
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    async def rollback(self):
+        await self.run(lambda conn: conn.rollback() if conn.in_transaction else None)
+
+    async def close(self):
+        await self.run(lambda conn: conn.close())
+        self._executor.shutdown(wait=False)
+
+
+class AsyncPool:
+    """Bounded pool of AsyncConnections; waiting for one suspends the coroutine, not a thread"""
+
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = []
+        self._created = 0
+        self._waiters = collections.deque()  # futures of coroutines waiting for a connection
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    async def acquire(self):
+        if self._closed:
+            raise RuntimeError("Pool is closed")
+        if self._idle:
+            self.hits += 1
+            return self._idle.pop()
+        if self._created < self.size:
+            self._created += 1
+            self.misses += 1
+            try:
+                return await AsyncConnection.connect(self.db_path)
+            except Exception:
+                self._created -= 1
+                raise
+        self.waits += 1
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            conn = await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._hand_off(waiter.result())  # cancelled just after being handed a connection
+            raise
+        self.wait_time += time.perf_counter() - started
+        return conn
+
+    def _hand_off(self, conn):
+        """Give a free connection to the longest waiter, or park it as idle"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(conn)
+                return
+        self._idle.append(conn)
+
+    async def release(self, conn):
+        if conn.in_transaction:
+            await conn.rollback()
+        if self._closed:
+            await conn.close()
+            self._created -= 1
+        else:
+            self._hand_off(conn)
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    # one-shot helpers that check a connection out for a single query
+
+    async def fetch_all(self, sql, params=()):
+        async with self.connection() as conn:
+            return await conn.fetch_all(sql, params)
+
+    async def fetch_one(self, sql, params=()):
+        async with self.connection() as conn:
+            return await conn.fetch_one(sql, params)
+
+    async def fetch_json(self, sql, params=()):
+        async with self.connection() as conn:
+            return await conn.fetch_json(sql, params)
+
+    async def fetch_value(self, sql, params=()):
+        async with self.connection() as conn:
+            return await conn.fetch_value(sql, params)
+
+    async def run(self, fn, *args):
+        async with self.connection() as conn:
+            return await conn.run(fn, *args)
+
+    def stats(self):
+        return {
+            'size': self.size,
+            'open': self._created,
+            'idle': len(self._idle),
+            'hits': self.hits,
+            'misses': self.misses,
+            'waits': self.waits,
+            'wait_time': round(self.wait_time, 6),
+        }
+
+    async def close(self):
+        self._closed = True
+        # nothing will be released to a closed pool's waiters, so fail them instead of leaving them hanging
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(RuntimeError("Pool is closed"))
+        while self._idle:
+            await self._idle.pop().close()
+            self._created -= 1
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Load-test benchmark for the Food Delivery System order API
+Drives the code behind each endpoint in-process from several threads with a
+read/write mix and reports p50/p95/p99 latency and throughput per endpoint
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import catalog_cache
+import db_pool
+import generate_data
+import order_queries
+import order_service
+import report_aggregates
+from dispatcher import get_dispatcher
+
+NEXT_STATUS = {
+    'Pending': 'Confirmed',
+    'Confirmed': 'Preparing',
+    'Preparing': 'Out for Delivery',
+    'Out for Delivery': 'Delivered',
+}
+
+
+class Workload:
+    """Request generators for one database; every call mirrors one API request"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.catalog = catalog_cache.get_catalog(db_path)
+        conn = db_pool.get_db(db_path)
+        try:
+            self.menus = {}
+            for item_id, restaurant_id in conn.execute("SELECT id, restaurant_id FROM menu_items").fetchall():
+                self.menus.setdefault(restaurant_id, []).append(item_id)
+            self.restaurant_ids = sorted(self.menus)
+            self.max_customer = conn.execute("SELECT MAX(id) FROM customers").fetchone()[0] or 1
+            latest = conn.execute("SELECT MAX(updated_at) FROM orders").fetchone()[0]
+            # (order id, status) of orders still in flight, advanced by PUT requests
+            self._open = [tuple(row) for row in conn.execute(
+                f"SELECT id, status FROM orders WHERE status IN ({', '.join('?' * len(NEXT_STATUS))})",
+                list(NEXT_STATUS)).fetchall()]
+        finally:
+            conn.close()
+        self.since = latest or '1970-01-01 00:00:00'
+        self._lock = threading.Lock()
+
+    # ---- reads ----
+
+    def restaurants(self, rng):
+        return self.catalog.restaurants()
+
+    def menu(self, rng):
+        return self.catalog.menu(rng.choice(self.restaurant_ids))
+
+    def list_orders(self, rng):
+        page = order_queries.list_orders(limit=50, db_path=self.db_path)
+        if page['next_cursor'] and rng.random() < 0.3:
+            page = order_queries.list_orders(cursor=page['next_cursor'], limit=50, db_path=self.db_path)
+        return page
+
+    def open_orders(self, rng):
+        return order_queries.list_orders({'status': list(NEXT_STATUS)}, limit=50, db_path=self.db_path)
+
+    def restaurant_orders(self, rng):
+        return order_queries.list_orders({'restaurant_id': rng.choice(self.restaurant_ids)}, limit=20,
+                                         db_path=self.db_path)
+
+    def order_changes(self, rng):
+        return order_queries.changed_orders(self.since, limit=100, db_path=self.db_path)
+
+    def _report(self, read):
+        conn = db_pool.get_db(self.db_path)
+        try:
+            return read(conn)
+        finally:
+            conn.close()
+
+    def report_summary(self, rng):
+        return self._report(report_aggregates.summary)
+
+    def report_by_status(self, rng):
+        return self._report(report_aggregates.orders_by_status)
+
+    def report_revenue(self, rng):
+        return self._report(report_aggregates.restaurant_revenue)
+
+    # ---- writes ----
+
+    def create_order(self, rng):
+        restaurant_id = rng.choice(self.restaurant_ids)
+        items = [{'menu_item_id': item_id, 'quantity': rng.randint(1, 3)}
+                 for item_id in rng.sample(self.menus[restaurant_id], min(3, rng.randint(1, 3)))]
+        order = order_service.create_order({
+            'customer_id': rng.randint(1, self.max_customer),
+            'restaurant_id': restaurant_id,
+            'items': items,
+            'delivery_address': f"{rng.randint(1, 999)} Market Street",
+            'payment_method': rng.choice(generate_data.PAYMENT_METHODS),
+        }, db_path=self.db_path)
+        with self._lock:
+            self._open.append((order['id'], order['status']))
+        return order
+
+    def update_order(self, rng):
+        with self._lock:
+            if not self._open:
+                target = None
+            else:
+                index = rng.randrange(len(self._open))
+                target = self._open[index]
+                # swap-remove so the pool of open orders stays O(1) to update
+                self._open[index] = self._open[-1]
+                self._open.pop()
+        if target is None:
+            return self.create_order(rng)  # nothing left to advance
+        order_id, status = target
+        status = NEXT_STATUS[status]
+        result = order_service.update_order(order_id, status, db_path=self.db_path)
+        if status in NEXT_STATUS:
+            with self._lock:
+                self._open.append((order_id, status))
+        return result
+
+
+# (endpoint, kind, relative weight within its kind, Workload method)
+ENDPOINTS = [
+    ('GET /api/restaurants', 'read', 10, 'restaurants'),
+    ('GET /api/restaurants/<id>/menu', 'read', 25, 'menu'),
+    ('GET /api/orders', 'read', 20, 'list_orders'),
+    ('GET /api/orders?status=open', 'read', 10, 'open_orders'),
+    ('GET /api/orders?restaurant_id=<id>', 'read', 10, 'restaurant_orders'),
+    ('GET /api/orders/changes', 'read', 10, 'order_changes'),
+    ('GET /api/reports/summary', 'read', 5, 'report_summary'),
+    ('GET /api/reports/orders-by-status', 'read', 5, 'report_by_status'),
+    ('GET /api/reports/restaurant-revenue', 'read', 5, 'report_revenue'),
+    ('POST /api/orders', 'write', 60, 'create_order'),
+    ('PUT /api/orders/<id>', 'write', 40, 'update_order'),
+]
+
+
+def build_mix(write_ratio, only=None):
+    """(endpoint names, weights) with writes making up write_ratio of requests"""
+    endpoints = [e for e in ENDPOINTS if not only or e[0] in only]
+    totals = {'read': 0, 'write': 0}
+    for _, kind, weight, _ in endpoints:
+        totals[kind] += weight
+    shares = {'read': 1 - write_ratio, 'write': write_ratio}
+    names = []
+    weights = []
+    for name, kind, weight, _ in endpoints:
+        if totals[kind] and shares[kind] > 0:
+            names.append(name)
+            weights.append(shares[kind] * weight / totals[kind])
+    if not names:
+        raise ValueError("The selected mix has no endpoints")
+    return names, weights
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run(workload, names, weights, threads=8, duration=10.0, requests=None, warmup=1.0, seed=42):
+    """Run the mix; returns {endpoint: [latency seconds]}, {endpoint: errors} and measured seconds"""
+    methods = {name: getattr(workload, method) for name, _, _, method in ENDPOINTS}
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    remaining = [requests]
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration if requests is None else None
+
+    def take():
+        if remaining[0] is None:
+            return True
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(n):
+        rng = random.Random(seed * 1000 + n)
+        local = {name: [] for name in names}
+        local_errors = {name: 0 for name in names}
+        while True:
+            now = time.perf_counter()
+            if stop_at is not None and now >= stop_at:
+                break
+            measured = now >= measure_from
+            if measured and not take():
+                break
+            name = rng.choices(names, weights)[0]
+            began = time.perf_counter()
+            try:
+                methods[name](rng)
+                failed = False
+            except Exception:
+                failed = True
+            elapsed = time.perf_counter() - began
+            if measured:
+                local[name].append(elapsed)
+                local_errors[name] += failed
+        with lock:
+            for name in names:
+                latencies[name] += local[name]
+                errors[name] += local_errors[name]
+
+    workers = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - measure_from
+    return latencies, errors, elapsed
+
+
+def summarize(latencies, errors, elapsed):
+    endpoints = {}
+    everything = []
+    for name, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        everything += values
+        endpoints[name] = {
+            'requests': len(values),
+            'errors': errors[name],
+            'throughput_rps': round(len(values) / elapsed, 2),
+            'mean_ms': round(sum(values) * 1000 / len(values), 3),
+            'p50_ms': round(percentile(values, 50) * 1000, 3),
+            'p95_ms': round(percentile(values, 95) * 1000, 3),
+            'p99_ms': round(percentile(values, 99) * 1000, 3),
+            'max_ms': round(values[-1] * 1000, 3),
+        }
+    everything.sort()
+    total = {
+        'requests': len(everything),
+        'errors': sum(errors.values()),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(everything) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(everything, 50) * 1000, 3) if everything else None,
+        'p95_ms': round(percentile(everything, 95) * 1000, 3) if everything else None,
+        'p99_ms': round(percentile(everything, 99) * 1000, 3) if everything else None,
+    }
+    return endpoints, total
+
+
+def print_report(endpoints, total, baseline=None):
+    print("=" * 100)
+    print(f"{'ENDPOINT':40} {'REQS':>7} {'ERR':>5} {'RPS':>9} {'P50 ms':>9} {'P95 ms':>9} {'P99 ms':>9}  VS BASELINE")
+    print("=" * 100)
+    previous = (baseline or {}).get('endpoints', {})
+    for name, stats in endpoints.items():
+        delta = ''
+        if name in previous and previous[name]['p95_ms']:
+            change = (stats['p95_ms'] - previous[name]['p95_ms']) * 100 / previous[name]['p95_ms']
+            delta = f"p95 {change:+.1f}%"
+        print(f"{name[:40]:40} {stats['requests']:7} {stats['errors']:5} {stats['throughput_rps']:9.1f} "
+              f"{stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f}  {delta}")
+    print("-" * 100)
+    print(f"{'TOTAL':40} {total['requests']:7} {total['errors']:5} {total['throughput_rps']:9.1f} "
+          f"{total['p50_ms'] or 0:9.2f} {total['p95_ms'] or 0:9.2f} {total['p99_ms'] or 0:9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the order API with a read/write mix")
+    parser.add_argument('--db', default='benchmark.db', help="database to run against (generated if missing)")
+    parser.add_argument('--generate', action='store_true', help="regenerate the database before running")
+    parser.add_argument('--orders', type=int, default=100000, help="orders to generate")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help="measured seconds")
+    parser.add_argument('--requests', type=int, help="stop after this many measured requests instead")
+    parser.add_argument('--warmup', type=float, default=1.0, help="seconds run before measuring")
+    parser.add_argument('--write-ratio', type=float, default=0.2, help="share of requests that write")
+    parser.add_argument('--endpoint', action='append', help="only run this endpoint (repeatable)")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON results file")
+    parser.add_argument('--compare', metavar='FILE', help="earlier results file to compare p95 against")
+    args = parser.parse_args(argv)
+
+    if not 0 <= args.write_ratio <= 1:
+        parser.error("--write-ratio must be between 0 and 1")
+    unknown = set(args.endpoint or []) - {name for name, _, _, _ in ENDPOINTS}
+    if unknown:
+        parser.error(f"Unknown endpoint(s): {', '.join(sorted(unknown))}")
+
+    if args.generate or not os.path.exists(args.db):
+        print(f"📊 Generating {args.orders} orders in {args.db}...")
+        generate_data.generate(args.db, generate_data.Scale(args.orders), args.seed)
+
+    names, weights = build_mix(args.write_ratio, args.endpoint)
+    pool = db_pool.get_pool(args.db, max(args.threads, db_pool.POOL_SIZE))
+    workload = Workload(args.db)
+    get_dispatcher(args.db).load()
+
+    print(f"🚀 {args.threads} threads, {args.write_ratio:.0%} writes, "
+          f"{f'{args.requests} requests' if args.requests else f'{args.duration:g}s'} against {args.db}")
+    latencies, errors, elapsed = run(workload, names, weights, args.threads, args.duration,
+                                     args.requests, args.warmup, args.seed)
+    endpoints, total = summarize(latencies, errors, elapsed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(endpoints, total, baseline)
+
+    results = {
+        'run': {
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'db': args.db,
+            'threads': args.threads,
+            'write_ratio': args.write_ratio,
+            'duration_s': args.duration if args.requests is None else None,
+            'requests': args.requests,
+            'warmup_s': args.warmup,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+        },
+        'total': total,
+        'endpoints': endpoints,
+        'pool': pool.stats(),
+        'dispatcher': get_dispatcher(args.db).stats(),
+        'catalog_cache': workload.catalog.stats(),
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+    sys.exit(1 if total['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
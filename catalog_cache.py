@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Read-through cache for the restaurant catalog of the Food Delivery System
+Stores restaurants and menus as pre-serialized JSON bodies with ETags,
+with TTL expiry, LRU eviction and explicit invalidation on catalog writes
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import sqlite3
+
+import row_converter
+from db_pool import DB_PATH, get_db
+
+CACHE_TTL = float(os.getenv('CATALOG_CACHE_TTL', '300'))
+CACHE_SIZE = int(os.getenv('CATALOG_CACHE_SIZE', '1024'))
+
+
+class CachedBody:
+    """A serialized JSON response body and its ETag"""
+
+    __slots__ = ('body', 'etag', 'status')
+
+    def __init__(self, body, status=200):
+        self.body = body.encode('utf-8')
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self.status = status
+
+    def matches(self, if_none_match):
+        """True if an If-None-Match header value already names this body"""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or self.etag in tags or 'W/' + self.etag in tags
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl seconds"""
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, predicate):
+        """Drop every key for which predicate(key) is true"""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            size, hits, misses = len(self._data), self.hits, self.misses
+            evictions, expirations = self.evictions, self.expirations
+        lookups = hits + misses
+        return {
+            'size': size,
+            'maxsize': self.maxsize,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'evictions': evictions,
+            'expirations': expirations,
+        }
+
+
+class CatalogCache:
+    """Cached catalog reads; each method returns a CachedBody (status 404 when missing)"""
+
+    def __init__(self, db_path=DB_PATH, ttl=CACHE_TTL, maxsize=CACHE_SIZE):
+        self.db_path = db_path
+        self.cache = TTLCache(maxsize, ttl)
+        self._lock = threading.Lock()
+        self._version = 0  # bumped by every invalidation so in-flight loads are not stored
+        self._rows = None  # (restaurant id -> row, menu item id -> row) as of the last sync()
+
+    def _query_json(self, sql, params=(), one=False):
+        """Serialize query results straight from cursor rows; None if one=True finds nothing"""
+        conn = get_db(self.db_path)
+        try:
+            cursor = conn.execute(sql, params)
+            if not one:
+                return row_converter.fetch_json_array(cursor)
+            row = cursor.fetchone()
+            return row_converter.converter_for(cursor).to_json(row) if row is not None else None
+        finally:
+            conn.close()
+
+    def _one(self, sql, params, missing):
+        body = self._query_json(sql, params, one=True)
+        return CachedBody(body) if body is not None else CachedBody(json.dumps({'error': missing}), 404)
+
+    def _read_through(self, key, load):
+        entry = self.cache.get(key)
+        if entry is None:
+            with self._lock:
+                version = self._version
+            entry = load()
+            with self._lock:
+                if version == self._version:
+                    self.cache.put(key, entry)
+        return entry
+
+    def restaurants(self):
+        return self._read_through(('restaurants',), lambda: CachedBody(
+            self._query_json("SELECT * FROM restaurants")))
+
+    def restaurant(self, restaurant_id):
+        return self._read_through(('restaurant', restaurant_id), lambda: self._one(
+            "SELECT * FROM restaurants WHERE id = ?", (restaurant_id,), 'Restaurant not found'))
+
+    def menu(self, restaurant_id):
+        return self._read_through(('menu', restaurant_id), lambda: CachedBody(
+            self._query_json("SELECT * FROM menu_items WHERE restaurant_id = ?", (restaurant_id,))))
+
+    def menu_item(self, item_id):
+        return self._read_through(('menu_item', item_id), lambda: self._one(
+            "SELECT * FROM menu_items WHERE id = ?", (item_id,), 'Menu item not found'))
+
+    # ---- invalidation hooks ----
+
+    def invalidate_restaurant(self, restaurant_id):
+        """Call after a restaurant row is inserted, updated or deleted"""
+        stale = {('restaurants',), ('restaurant', restaurant_id), ('menu', restaurant_id)}
+        with self._lock:
+            self._version += 1
+            self.cache.discard(lambda key: key in stale)
+
+    def invalidate_menu_item(self, item_id, restaurant_id=None):
+        """Call after a menu item changes; without restaurant_id every menu is dropped"""
+        with self._lock:
+            self._version += 1
+            self.cache.discard(lambda key: key == ('menu_item', item_id) or (
+                key[0] == 'menu' and (restaurant_id is None or key[1] == restaurant_id)))
+
+    def invalidate_all(self):
+        """Call after bulk catalog changes such as running update_images.sql"""
+        with self._lock:
+            self._version += 1
+            self.cache.clear()
+
+    def _catalog_rows(self):
+        conn = get_db(self.db_path)
+        try:
+            restaurants = {row[0]: tuple(row) for row in conn.execute("SELECT id, * FROM restaurants")}
+            items = {row[0]: tuple(row) for row in conn.execute("SELECT id, restaurant_id, * FROM menu_items")}
+        finally:
+            conn.close()
+        return restaurants, items
+
+    def sync(self):
+        """
+        Invalidate the restaurants and menu items whose rows changed since the
+        last sync, for writers that do not call the hooks themselves (another
+        process, a SQL script). The first sync has nothing to compare with and
+        drops everything. Returns (restaurants, menu items) invalidated.
+        """
+        try:
+            rows = self._catalog_rows()
+        except sqlite3.Error:
+            rows = None  # catalog tables missing or mid-migration
+        with self._lock:
+            previous, self._rows = self._rows, rows
+        if previous is None or rows is None:
+            self.invalidate_all()
+            return None, None
+        restaurants = {restaurant_id for restaurant_id in previous[0].keys() | rows[0].keys()
+                       if previous[0].get(restaurant_id) != rows[0].get(restaurant_id)}
+        items = {item_id: {row[1] for row in (previous[1].get(item_id), rows[1].get(item_id)) if row}
+                 for item_id in previous[1].keys() | rows[1].keys()
+                 if previous[1].get(item_id) != rows[1].get(item_id)}
+        for restaurant_id in restaurants:
+            self.invalidate_restaurant(restaurant_id)
+        for item_id, restaurant_ids in items.items():
+            for restaurant_id in restaurant_ids:  # a moved item leaves one menu and joins another
+                self.invalidate_menu_item(item_id, restaurant_id)
+        return len(restaurants), len(items)
+
+    def stats(self):
+        return self.cache.stats()
+
+
+def respond(entry, if_none_match=None):
+    """(status, body, headers) for a cached body, answering 304 when the ETag matches"""
+    headers = {'ETag': entry.etag, 'Content-Type': 'application/json'}
+    if entry.status == 200 and entry.matches(if_none_match):
+        return 304, b'', headers
+    return entry.status, entry.body, headers
+
+
+_caches = {}
+
+
+def get_catalog(db_path=DB_PATH):
+    """Shared catalog cache for a database"""
+    cache = _caches.get(db_path)
+    if cache is None:
+        cache = _caches.setdefault(db_path, CatalogCache(db_path))
+    return cache
+
+
+def sync_catalog(db_path=DB_PATH):
+    """Invalidate just the cached catalog rows that changed, if a cache exists"""
+    cache = _caches.get(db_path)
+    if cache is not None:
+        cache.sync()
+
+
+def invalidate_catalog(db_path=DB_PATH):
+    """Drop all cached catalog data for a database, if a cache exists"""
+    cache = _caches.get(db_path)
+    if cache is not None:
+        cache.invalidate_all()
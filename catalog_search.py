@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Full-text catalog search for the Food Delivery System
+FTS5 indexes over menu_items (name, description, category) and restaurants
+(name, cuisine), kept current by triggers, with ranked prefix lookups and
+cuisine/price/rating filters. Falls back to LIKE scans when the index has
+not been installed (or SQLite lacks FTS5).
+"""
+
+import argparse
+import re
+import sys
+
+import row_converter
+import schema_cache
+from api_errors import ValidationError
+from db_pool import DB_PATH, get_db
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+# index -> (content table, indexed columns, bm25 column weights)
+INDEXES = {
+    'menu_search': ('menu_items', ('name', 'description', 'category'), (10.0, 1.0, 4.0)),
+    'restaurant_search': ('restaurants', ('name', 'cuisine'), (10.0, 6.0)),
+}
+
+
+def schema_statements():
+    """External-content FTS5 tables plus the triggers that keep them in step with the catalog"""
+    statements = []
+    for index, (table, columns, _) in INDEXES.items():
+        names = ', '.join(columns)
+        new = ', '.join(f'NEW.{column}' for column in columns)
+        old = ', '.join(f'OLD.{column}' for column in columns)
+        statements += [
+            f"""CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+                {names}, content='{table}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )""",
+            f"""CREATE TRIGGER IF NOT EXISTS trg_{index}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {index} (rowid, {names}) VALUES (NEW.id, {new});
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS trg_{index}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {index} ({index}, rowid, {names}) VALUES ('delete', OLD.id, {old});
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS trg_{index}_update AFTER UPDATE OF {names} ON {table}
+            BEGIN
+                INSERT INTO {index} ({index}, rowid, {names}) VALUES ('delete', OLD.id, {old});
+                INSERT INTO {index} (rowid, {names}) VALUES (NEW.id, {new});
+            END""",
+        ]
+    return statements
+
+
+def rebuild(conn):
+    """Re-read the whole catalog into the indexes"""
+    for index in INDEXES:
+        conn.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
+
+
+def install(conn):
+    """Create the indexes and triggers, then fill them from the current catalog"""
+    cursor = conn.cursor()
+    for statement in schema_statements():
+        cursor.execute(statement)
+    rebuild(conn)
+
+
+def check(conn):
+    """Indexes whose contents disagree with their tables ('integrity-check' raises on corruption)"""
+    problems = []
+    for index in INDEXES:
+        try:
+            conn.execute(f"INSERT INTO {index} ({index}, rank) VALUES ('integrity-check', 1)")
+        except Exception as e:
+            problems.append((index, str(e)))
+    return problems
+
+
+def match_expression(text, prefix=True):
+    """User text -> FTS5 query: every word must match, the last one as a prefix for autocomplete"""
+    tokens = TOKEN.findall(text.lower())
+    if not tokens:
+        raise ValidationError('Search query is required')
+    terms = [f'"{token}"' for token in tokens]
+    if prefix:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _clamp(limit):
+    try:
+        limit = int(limit or DEFAULT_LIMIT)
+    except (TypeError, ValueError):
+        raise ValidationError('Invalid limit')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _filters(filters, menu):
+    where = []
+    params = []
+    if filters.get('cuisine'):
+        where.append("r.cuisine = ? COLLATE NOCASE")
+        params.append(filters['cuisine'])
+    if filters.get('min_rating') is not None:
+        where.append("r.rating >= ?")
+        params.append(filters['min_rating'])
+    if menu:
+        if filters.get('restaurant_id') is not None:
+            where.append("mi.restaurant_id = ?")
+            params.append(filters['restaurant_id'])
+        if filters.get('category'):
+            where.append("mi.category = ? COLLATE NOCASE")
+            params.append(filters['category'])
+        if filters.get('min_price') is not None:
+            where.append("mi.price >= ?")
+            params.append(filters['min_price'])
+        if filters.get('max_price') is not None:
+            where.append("mi.price <= ?")
+            params.append(filters['max_price'])
+    return where, params
+
+
+def _like_terms(text, columns):
+    """Fallback matching: every word must appear in one of the columns"""
+    where = []
+    params = []
+    for token in TOKEN.findall(text.lower()):
+        where.append('(' + ' OR '.join(f"{column} LIKE ?" for column in columns) + ')')
+        params += [f'%{token}%'] * len(columns)
+    return where, params
+
+
+def _menu_items(cursor, text, filters, limit, fts, prefix):
+    columns = """mi.id, mi.restaurant_id, mi.name, mi.description, mi.category, mi.price, mi.image_url,
+                 r.name as restaurant_name, r.cuisine, r.rating"""
+    where, params = _filters(filters, menu=True)
+    if fts:
+        weights = ', '.join(str(w) for w in INDEXES['menu_search'][2])
+        sql = f"""
+            SELECT {columns}, -bm25(menu_search, {weights}) as score
+            FROM menu_search
+            JOIN menu_items mi ON mi.id = menu_search.rowid
+            JOIN restaurants r ON r.id = mi.restaurant_id
+            WHERE menu_search MATCH ?"""
+        params = [match_expression(text, prefix)] + params
+        tail = []
+        order = "score DESC, r.rating DESC"
+    else:
+        terms, term_params = _like_terms(text, ('mi.name', 'mi.description', 'mi.category'))
+        sql = f"""
+            SELECT {columns}, NULL as score
+            FROM menu_items mi
+            JOIN restaurants r ON r.id = mi.restaurant_id
+            WHERE {' AND '.join(terms) or '1'}"""
+        params = term_params + params
+        tail = [text.strip() + '%']
+        order = "mi.name LIKE ? DESC, r.rating DESC, mi.name"
+    for clause in where:
+        sql += f" AND {clause}"
+    sql += f" ORDER BY {order} LIMIT ?"
+    cursor.execute(sql, params + tail + [limit])
+    return row_converter.fetch_dicts(cursor)
+
+
+def _restaurants(cursor, text, filters, limit, fts, prefix):
+    where, params = _filters(filters, menu=False)
+    if fts:
+        weights = ', '.join(str(w) for w in INDEXES['restaurant_search'][2])
+        sql = f"""
+            SELECT r.*, -bm25(restaurant_search, {weights}) as score
+            FROM restaurant_search
+            JOIN restaurants r ON r.id = restaurant_search.rowid
+            WHERE restaurant_search MATCH ?"""
+        params = [match_expression(text, prefix)] + params
+        tail = []
+        order = "score DESC, r.rating DESC"
+    else:
+        terms, term_params = _like_terms(text, ('r.name', 'r.cuisine'))
+        sql = f"SELECT r.*, NULL as score FROM restaurants r WHERE {' AND '.join(terms) or '1'}"
+        params = term_params + params
+        tail = [text.strip() + '%']
+        order = "r.name LIKE ? DESC, r.rating DESC, r.name"
+    for clause in where:
+        sql += f" AND {clause}"
+    sql += f" ORDER BY {order} LIMIT ?"
+    cursor.execute(sql, params + tail + [limit])
+    return row_converter.fetch_dicts(cursor)
+
+
+def search(conn, text, filters=None, kind='all', limit=DEFAULT_LIMIT, prefix=True, db_path=DB_PATH):
+    """
+    Ranked restaurants and menu items matching `text`.
+    kind: 'all', 'restaurants' or 'menu'. filters: cuisine, min_rating,
+    and for menu items also restaurant_id, category, min_price, max_price.
+    Scores are bm25 relevance (higher is better), or None on the LIKE fallback.
+    Whether the indexes exist comes from the schema cache for db_path.
+    """
+    if kind not in ('all', 'restaurants', 'menu'):
+        raise ValidationError("type must be one of all, restaurants, menu")
+    match_expression(text)  # validates the query
+    filters = filters or {}
+    limit = _clamp(limit)
+    fts = schema_cache.get_capabilities(db_path).has_search
+    cursor = conn.cursor()
+    price_filter = filters.get('min_price') is not None or filters.get('max_price') is not None
+    result = {'query': text, 'restaurants': [], 'menu_items': []}
+    if kind in ('all', 'restaurants') and not price_filter and not filters.get('category'):
+        result['restaurants'] = _restaurants(cursor, text, filters, limit, fts, prefix)
+    if kind in ('all', 'menu'):
+        result['menu_items'] = _menu_items(cursor, text, filters, limit, fts, prefix)
+    for rows in (result['restaurants'], result['menu_items']):
+        for row in rows:
+            if row['score'] is not None:
+                row['score'] = round(row['score'], 4)
+    return result
+
+
+def suggest(conn, text, limit=8, db_path=DB_PATH):
+    """Autocomplete: a short ranked list of restaurant and dish names for a partial query"""
+    found = search(conn, text, limit=limit, db_path=db_path)
+    suggestions = [{'type': 'restaurant', 'id': r['id'], 'name': r['name'], 'score': r['score']}
+                   for r in found['restaurants']]
+    suggestions += [{'type': 'menu_item', 'id': m['id'], 'name': m['name'], 'restaurant_id': m['restaurant_id'],
+                     'score': m['score']} for m in found['menu_items']]
+    if all(s['score'] is not None for s in suggestions):
+        suggestions.sort(key=lambda s: s['score'], reverse=True)
+    return suggestions[:_clamp(limit)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage and query the catalog search index")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database file")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--install', action='store_true', help="create the FTS5 indexes and triggers and fill them")
+    group.add_argument('--rebuild', action='store_true', help="re-read the whole catalog into the indexes")
+    group.add_argument('--check', action='store_true', help="verify the indexes match the catalog")
+    group.add_argument('--query', metavar='TEXT', help="run a search and print the ranked results")
+    args = parser.parse_args(argv)
+
+    conn = get_db(args.db)
+    try:
+        if args.query:
+            result = search(conn, args.query, db_path=args.db)
+            for kind in ('restaurants', 'menu_items'):
+                print(f"🔎 {kind}: {len(result[kind])}")
+                for row in result[kind]:
+                    print(f"   {row['score']!s:>8}  {row['name']}" + (f"  ({row['restaurant_name']}, ${row['price']:.2f})"
+                                                                    if kind == 'menu_items' else f"  ({row['cuisine']})"))
+            return
+        if args.check:
+            problems = check(conn)
+            for index, error in problems:
+                print(f"❌ {index}: {error}")
+            print("✅ Search indexes match the catalog" if not problems else "   Run --rebuild to repair")
+            sys.exit(1 if problems else 0)
+        if args.install:
+            install(conn)
+        else:
+            rebuild(conn)
+        conn.commit()
+        schema_cache.refresh(args.db, conn)
+        print("✅ Catalog search index up to date")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
-from datetime import datetime
+import queue
+import threading
+
+from db_pool import DB_PATH
+from export_orders import default_filename, export_orders
+from viewer_queries import PAGE_SIZE, VIEWS, fetch_page
+
 
 class DatabaseViewer:
     def __init__(self, root):
@@ -27,185 +32,136 @@ class DatabaseViewer:
         self.tree = ttk.Treeview(self.main_frame)
         self.tree.grid(row=2, column=0, columnspan=4, sticky=(tk.W, tk.E, tk.N, tk.S), pady=10)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        scrollbar.grid(row=2, column=4, sticky=(tk.N, tk.S))
-        self.tree.configure(yscroll=scrollbar.set)
+        # Scrollbar (scrolling near the bottom loads the next page)
+        self.scrollbar = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.scrollbar.grid(row=2, column=4, sticky=(tk.N, tk.S))
+        self.tree.configure(yscroll=self.on_tree_scroll)
         
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
         status = ttk.Label(self.main_frame, textvariable=self.status_var, relief=tk.SUNKEN)
-        status.grid(row=3, column=0, columnspan=5, sticky=(tk.W, tk.E), pady=5)
+        status.grid(row=3, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=5)
+        ttk.Button(self.main_frame, text="Load More", command=self.load_more).grid(row=3, column=4, padx=5, pady=5)
         
         # Configure grid weights
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
         self.main_frame.columnconfigure(0, weight=1)
         self.main_frame.rowconfigure(2, weight=1)
+        
+        # Paging state; generation drops results from views the user already left
+        self.view = None
+        self.generation = 0
+        self.loading = False
+        self.exhausted = False
+        self.last_key = None
+        self.total = None
+        self.results = queue.Queue()
+        self.ui_calls = queue.Queue()  # callables queued by worker threads
+        self.root.after(50, self.poll_results)
     
     def clear_tree(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tree.delete(*self.tree.get_children())
     
-    def view_orders(self):
-        self.clear_tree()
-        self.tree['columns'] = ('ID', 'Restaurant', 'Total', 'Status', 'Created')
+    def setup_columns(self, columns):
+        self.tree['columns'] = [name for name, _, _ in columns]
         self.tree.column('#0', width=0, stretch=tk.NO)
-        self.tree.column('ID', anchor=tk.W, width=40)
-        self.tree.column('Restaurant', anchor=tk.W, width=200)
-        self.tree.column('Total', anchor=tk.W, width=100)
-        self.tree.column('Status', anchor=tk.W, width=120)
-        self.tree.column('Created', anchor=tk.W, width=200)
-        
         self.tree.heading('#0', text='', anchor=tk.W)
-        self.tree.heading('ID', text='ID', anchor=tk.W)
-        self.tree.heading('Restaurant', text='Restaurant', anchor=tk.W)
-        self.tree.heading('Total', text='Total Price', anchor=tk.W)
-        self.tree.heading('Status', text='Status', anchor=tk.W)
-        self.tree.heading('Created', text='Created', anchor=tk.W)
-        
-        try:
-            conn = sqlite3.connect('backend/food_delivery.db')
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT o.id, r.name as restaurant, o.total_price, o.status, o.created_at
-                FROM orders o
-                LEFT JOIN restaurants r ON o.restaurant_id = r.id
-                ORDER BY o.id DESC
-            """)
-            
-            for row in cursor.fetchall():
-                r = dict(row)
-                self.tree.insert('', 'end', values=(
-                    r['id'],
-                    r['restaurant'],
-                    f"Rs {r['total_price']}",
-                    r['status'],
-                    r['created_at']
-                ))
-            
-            conn.close()
-            self.status_var.set(f"Loaded {len(self.tree.get_children())} orders")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
-            self.status_var.set(f"Error: {str(e)}")
+        for name, heading, width in columns:
+            self.tree.column(name, anchor=tk.W, width=width)
+            self.tree.heading(name, text=heading, anchor=tk.W)
     
-    def view_menu(self):
+    def open_view(self, name):
+        self.generation += 1
+        self.view = VIEWS[name]
+        self.loading = False
+        self.exhausted = False
+        self.last_key = None
+        self.total = None
         self.clear_tree()
-        self.tree['columns'] = ('ID', 'Item', 'Restaurant', 'Category', 'Price')
-        self.tree.column('#0', width=0, stretch=tk.NO)
-        self.tree.column('ID', anchor=tk.W, width=40)
-        self.tree.column('Item', anchor=tk.W, width=250)
-        self.tree.column('Restaurant', anchor=tk.W, width=150)
-        self.tree.column('Category', anchor=tk.W, width=120)
-        self.tree.column('Price', anchor=tk.W, width=100)
-        
-        self.tree.heading('#0', text='', anchor=tk.W)
-        self.tree.heading('ID', text='ID', anchor=tk.W)
-        self.tree.heading('Item', text='Item Name', anchor=tk.W)
-        self.tree.heading('Restaurant', text='Restaurant', anchor=tk.W)
-        self.tree.heading('Category', text='Category', anchor=tk.W)
-        self.tree.heading('Price', text='Price', anchor=tk.W)
-        
-        try:
-            conn = sqlite3.connect('backend/food_delivery.db')
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT m.id, m.name, r.name as restaurant, m.category, m.price
-                FROM menu_items m
-                LEFT JOIN restaurants r ON m.restaurant_id = r.id
-                ORDER BY r.name, m.name
-            """)
-            
-            for row in cursor.fetchall():
-                m = dict(row)
-                self.tree.insert('', 'end', values=(
-                    m['id'],
-                    m['name'],
-                    m['restaurant'],
-                    m['category'],
-                    f"Rs {m['price']}"
-                ))
-            
-            conn.close()
-            self.status_var.set(f"Loaded {len(self.tree.get_children())} menu items")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
-            self.status_var.set(f"Error: {str(e)}")
+        self.setup_columns(self.view['columns'])
+        self.load_more()
+    
+    def view_orders(self):
+        self.open_view('orders')
+    
+    def view_menu(self):
+        self.open_view('menu')
     
     def view_restaurants(self):
-        self.clear_tree()
-        self.tree['columns'] = ('ID', 'Name', 'Cuisine', 'Rating', 'Delivery')
-        self.tree.column('#0', width=0, stretch=tk.NO)
-        self.tree.column('ID', anchor=tk.W, width=40)
-        self.tree.column('Name', anchor=tk.W, width=200)
-        self.tree.column('Cuisine', anchor=tk.W, width=150)
-        self.tree.column('Rating', anchor=tk.W, width=100)
-        self.tree.column('Delivery', anchor=tk.W, width=100)
-        
-        self.tree.heading('#0', text='', anchor=tk.W)
-        self.tree.heading('ID', text='ID', anchor=tk.W)
-        self.tree.heading('Name', text='Name', anchor=tk.W)
-        self.tree.heading('Cuisine', text='Cuisine', anchor=tk.W)
-        self.tree.heading('Rating', text='Rating', anchor=tk.W)
-        self.tree.heading('Delivery', text='Delivery (min)', anchor=tk.W)
-        
+        self.open_view('restaurants')
+    
+    def load_more(self):
+        if self.view is None or self.loading or self.exhausted:
+            return
+        self.loading = True
+        self.status_var.set(f"Loading {self.view['label']}...")
+        args = (self.generation, self.view, self.last_key, self.total is None)
+        threading.Thread(target=self.load_worker, args=args, daemon=True).start()
+    
+    def load_worker(self, generation, view, last_key, with_count):
         try:
-            conn = sqlite3.connect('backend/food_delivery.db')
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT id, name, cuisine, rating, delivery_time FROM restaurants ORDER BY id")
-            
-            for row in cursor.fetchall():
-                r = dict(row)
-                self.tree.insert('', 'end', values=(
-                    r['id'],
-                    r['name'],
-                    r['cuisine'],
-                    r['rating'],
-                    r['delivery_time']
-                ))
-            
-            conn.close()
-            self.status_var.set(f"Loaded {len(self.tree.get_children())} restaurants")
+            self.results.put((generation, fetch_page(view, last_key, with_count), None))
         except Exception as e:
-            messagebox.showerror("Error", str(e))
-            self.status_var.set(f"Error: {str(e)}")
+            self.results.put((generation, None, e))
+    
+    def poll_results(self):
+        try:
+            while True:
+                self.ui_calls.get_nowait()()
+        except queue.Empty:
+            pass
+        try:
+            while True:
+                generation, page, error = self.results.get_nowait()
+                if generation != self.generation:
+                    continue
+                self.loading = False
+                if error is not None:
+                    messagebox.showerror("Error", str(error))
+                    self.status_var.set(f"Error: {str(error)}")
+                    continue
+                rows, self.last_key, total = page
+                if total is not None:
+                    self.total = total
+                for values in rows:
+                    self.tree.insert('', 'end', values=values)
+                if len(rows) < PAGE_SIZE:
+                    self.exhausted = True
+                loaded = len(self.tree.get_children())
+                self.status_var.set(f"Loaded {loaded} of {self.total} {self.view['label']}")
+        except queue.Empty:
+            pass
+        self.root.after(50, self.poll_results)
+    
+    def on_tree_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) >= 0.95:
+            self.load_more()
     
     def export_csv(self):
+        filename = default_filename('csv')
+        self.status_var.set(f"Exporting to {filename}...")
+        threading.Thread(target=self.export_worker, args=(filename,), daemon=True).start()
+    
+    def export_worker(self, filename):
+        def progress(done, total):
+            self.ui_calls.put(lambda: self.status_var.set(f"Exporting to {filename}: {done}/{total} orders"))
+        
         try:
-            conn = sqlite3.connect('backend/food_delivery.db')
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            filename = f"orders_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            cursor.execute("""
-                SELECT o.id, r.name as restaurant, o.total_price, o.status, o.created_at
-                FROM orders o
-                LEFT JOIN restaurants r ON o.restaurant_id = r.id
-                ORDER BY o.id
-            """)
-            
-            import csv
-            with open(filename, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Order ID', 'Restaurant', 'Total Price', 'Status', 'Created'])
-                for row in cursor.fetchall():
-                    r = dict(row)
-                    writer.writerow([r['id'], r['restaurant'], r['total_price'], r['status'], r['created_at']])
-            
-            conn.close()
-            messagebox.showinfo("Success", f"Orders exported to {filename}")
-            self.status_var.set(f"Exported to {filename}")
+            count, _ = export_orders(filename, 'csv', progress=progress, db_path=DB_PATH)
         except Exception as e:
-            messagebox.showerror("Error", str(e))
-            self.status_var.set(f"Error: {str(e)}")
+            self.ui_calls.put(lambda error=e: self.export_failed(error))
+            return
+        self.ui_calls.put(lambda: self.export_finished(filename, count))
+    
+    def export_finished(self, filename, count):
+        messagebox.showinfo("Success", f"{count} orders exported to {filename}")
+        self.status_var.set(f"Exported to {filename}")
+    
+    def export_failed(self, error):
+        messagebox.showerror("Error", str(error))
+        self.status_var.set(f"Error: {str(error)}")
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Connection pool for the Food Delivery System database
+Keeps connections open and hands them out per request instead of reconnecting
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import metrics
+
+DB_PATH = os.getenv('DB_PATH', 'backend/food_delivery.db')
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+HEALTH_CHECK_INTERVAL = float(os.getenv('DB_POOL_HEALTH_CHECK', '30'))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within the pool timeout"""
+
+
+def sqlite_connector(db_path=DB_PATH):
+    """Return a factory that opens SQLite connections usable from any thread"""
+    def connect():
+        conn = sqlite3.connect(db_path, check_same_thread=False, factory=metrics.connection_factory())
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+    return connect
+
+
+class PooledConnection:
+    """Wraps a pooled connection so close() returns it to the pool"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Connection already returned to pool")
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._conn is not None:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """Fixed-size pool of reusable database connections"""
+
+    def __init__(self, connect, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 health_check_interval=HEALTH_CHECK_INTERVAL):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.LifoQueue()
+        self._last_used = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.health_check_failures = 0
+
+    def _is_healthy(self, conn):
+        """Ping connections that sat idle longer than the health check interval"""
+        idle_for = time.monotonic() - self._last_used.get(id(conn), 0)
+        if idle_for < self.health_check_interval:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            self._count('health_check_failures')
+            return False
+
+    def _count(self, counter, amount=1):
+        """Bump a usage counter; checkouts happen on many threads at once"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def _take_idle(self, block, timeout=None):
+        """Pop an idle connection, dropping any that fail the health check"""
+        while True:
+            conn = self._idle.get(block=block, timeout=timeout)
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+            block = False
+
+    def acquire(self):
+        """Check out a raw connection, waiting if the pool is exhausted"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        try:
+            conn = self._take_idle(block=False)
+            self._count('hits')
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+            self._count('misses')
+            return conn
+
+        started = time.monotonic()
+        try:
+            conn = self._take_idle(block=True, timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+        finally:
+            with self._lock:
+                self.waits += 1
+                self.wait_time += time.monotonic() - started
+        self._count('hits')
+        return conn
+
+    def release(self, conn):
+        """Return a connection, rolling back anything left uncommitted"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        if self._closed:
+            self._discard(conn)
+            return
+        self._last_used[id(conn)] = time.monotonic()
+        self._idle.put(conn)
+
+    def connection(self):
+        """Check out a connection whose close() hands it back to the pool"""
+        return PooledConnection(self, self.acquire())
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._created,
+                'idle': self._idle.qsize(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'wait_time': round(self.wait_time, 6),
+                'health_check_failures': self.health_check_failures,
+            }
+
+    def close_all(self):
+        """Close every idle connection and refuse new checkouts"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DB_PATH, size=POOL_SIZE):
+    """Return the shared pool for a database file, creating it on first use"""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(sqlite_connector(db_path), size=size)
+            _pools[db_path] = pool
+        return pool
+
+
+def get_db(db_path=DB_PATH):
+    """Drop-in replacement for a fresh connect(): close() returns it to the pool"""
+    return get_pool(db_path).connection()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Delivery staff dispatcher for the Food Delivery System
+Keeps available riders in a priority queue (best rating, fewest deliveries first)
+and claims them with a conditional UPDATE so two orders never get the same rider
+"""
+
+import heapq
+import threading
+import time
+
+from db_pool import DB_PATH, get_db
+
+REFRESH_INTERVAL = 1.0  # seconds between reloads when the queue runs dry
+
+
+class Dispatcher:
+    """In-memory availability index backed by atomic claims in the database"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self._heap = []
+        self._info = {}  # staff id -> (rating, total_deliveries) while queued
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_refresh = 0.0
+        self.claims = 0
+        self.assignments = 0
+        self.conflicts = 0
+        self.empty_claims = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    # ---- availability index ----
+
+    def _push_locked(self, staff_id, rating, deliveries):
+        self._info[staff_id] = (rating or 0, deliveries or 0)
+        heapq.heappush(self._heap, (-(rating or 0), deliveries or 0, staff_id))
+
+    def load(self, cursor=None):
+        """(Re)build the queue from every Available rider"""
+        conn = None
+        if cursor is None:
+            conn = get_db(self.db_path)
+            cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT id, rating, total_deliveries FROM delivery_staff WHERE status = 'Available'")
+            rows = cursor.fetchall()
+        finally:
+            if conn is not None:
+                conn.close()
+        with self._lock:
+            self._heap = []
+            self._info = {}
+            for staff_id, rating, deliveries in rows:
+                self._push_locked(staff_id, rating, deliveries)
+            self._loaded = True
+            self._last_refresh = time.monotonic()
+
+    def _pop_candidates(self, count):
+        """Take up to count best-ranked riders off the queue"""
+        candidates = []
+        with self._lock:
+            while self._heap and len(candidates) < count:
+                _, deliveries, staff_id = heapq.heappop(self._heap)
+                info = self._info.get(staff_id)
+                if info is None or info[1] != deliveries:
+                    continue  # stale entry, a newer one is queued or the rider was taken
+                del self._info[staff_id]
+                candidates.append((staff_id, info))
+        return candidates
+
+    def _maybe_refresh(self, cursor):
+        if time.monotonic() - self._last_refresh < REFRESH_INTERVAL:
+            return False
+        self.load(cursor)
+        return bool(self._heap)
+
+    def depth(self):
+        """Riders currently queued as available"""
+        with self._lock:
+            return len(self._info)
+
+    # ---- claiming ----
+
+    def claim_many(self, cursor, count):
+        """
+        Claim up to count riders inside the caller's transaction.
+        Riders another process already took are skipped, not double-booked.
+        """
+        if count <= 0:
+            return []
+        started = time.perf_counter()
+        if not self._loaded:
+            self.load(cursor)
+        claimed = []
+        conflicts = 0
+        refreshed = False
+        while len(claimed) < count:
+            candidates = self._pop_candidates(count - len(claimed))
+            if not candidates:
+                if refreshed or not self._maybe_refresh(cursor):
+                    break
+                refreshed = True
+                continue
+            ids = [staff_id for staff_id, _ in candidates]
+            cursor.execute(f"""
+                UPDATE delivery_staff
+                SET status = 'Busy', total_deliveries = total_deliveries + 1
+                WHERE id IN ({', '.join('?' * len(ids))}) AND status = 'Available'
+                RETURNING id
+            """, ids)
+            won = {row[0] for row in cursor.fetchall()}
+            conflicts += len(ids) - len(won)
+            # keep the queue's ranking order rather than RETURNING order
+            claimed += [staff_id for staff_id in ids if staff_id in won]
+
+        elapsed = time.perf_counter() - started
+        with self._lock:  # request threads and the status engine tick claim at the same time
+            self.claims += 1
+            self.assignments += len(claimed)
+            self.conflicts += conflicts
+            self.empty_claims += count - len(claimed)
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+        return claimed
+
+    def claim(self, cursor):
+        """Claim the best available rider, or None"""
+        claimed = self.claim_many(cursor, 1)
+        return claimed[0] if claimed else None
+
+    def unclaim(self, staff_ids):
+        """Requeue riders whose claiming transaction was rolled back"""
+        if staff_ids:
+            self.load()
+
+    def release(self, cursor, staff_ids):
+        """Mark riders Available again and queue them for the next order"""
+        staff_ids = [staff_id for staff_id in set(staff_ids) if staff_id]
+        if not staff_ids:
+            return []
+        cursor.execute(f"""
+            UPDATE delivery_staff SET status = 'Available'
+            WHERE id IN ({', '.join('?' * len(staff_ids))}) AND status != 'Available'
+            RETURNING id, rating, total_deliveries
+        """, staff_ids)
+        rows = cursor.fetchall()
+        with self._lock:
+            for staff_id, rating, deliveries in rows:
+                self._push_locked(staff_id, rating, deliveries)
+        return [row[0] for row in rows]
+
+    def assign_pending(self, limit=100):
+        """
+        Give riders to orders that went out for delivery while nobody was free,
+        oldest order first, best-ranked rider first, with one claim for the batch.
+        Returns [(order_id, restaurant_id, staff_id)] for the assignments made.
+        """
+        riders = []
+        assigned = []
+        conn = get_db(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, restaurant_id FROM orders
+                WHERE status = 'Out for Delivery' AND delivery_staff_id IS NULL
+                ORDER BY created_at, id
+                LIMIT ?
+            """, (limit,))
+            orders = cursor.fetchall()
+            if not orders:
+                return []
+            riders = self.claim_many(cursor, len(orders))
+            unused = []
+            for (order_id, restaurant_id), staff_id in zip(orders, riders):
+                cursor.execute("UPDATE orders SET delivery_staff_id = ? WHERE id = ? AND delivery_staff_id IS NULL",
+                               (staff_id, order_id))
+                if cursor.rowcount:
+                    assigned.append((order_id, restaurant_id, staff_id))
+                else:
+                    unused.append(staff_id)  # another writer assigned this order meanwhile
+            self.release(cursor, unused)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            self.unclaim(riders)
+            raise
+        finally:
+            conn.close()
+        return assigned
+
+    def stats(self):
+        with self._lock:
+            queue_depth = len(self._info)
+            claims, assignments, conflicts = self.claims, self.assignments, self.conflicts
+            empty_claims, latency_total, latency_max = self.empty_claims, self.latency_total, self.latency_max
+        return {
+            'queue_depth': queue_depth,
+            'claims': claims,
+            'assignments': assignments,
+            'conflicts': conflicts,
+            'empty_claims': empty_claims,
+            'avg_claim_ms': round(latency_total * 1000 / max(claims, 1), 3),
+            'max_claim_ms': round(latency_max * 1000, 3),
+        }
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_dispatcher(db_path=DB_PATH):
+    """Shared dispatcher for a database"""
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(db_path)
+        if dispatcher is None:
+            dispatcher = _dispatchers[db_path] = Dispatcher(db_path)
+        return dispatcher
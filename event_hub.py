@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+In-process order event hub for the Food Delivery System
+Order writes and the status engine publish events here; dashboards subscribe
+per order, per restaurant or globally instead of re-fetching the order list
+"""
+
+import asyncio
+import collections
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+
+from db_pool import DB_PATH
+
+REPLAY_SIZE = int(os.getenv('EVENT_REPLAY_SIZE', '1000'))
+QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', '500'))
+
+ORDER_CREATED = 'order.created'
+STATUS_CHANGED = 'order.status_changed'
+STAFF_ASSIGNED = 'order.staff_assigned'
+ORDER_DELETED = 'order.deleted'
+RESET = 'reset'  # replay impossible; the client should re-fetch its orders
+
+
+class Event:
+    __slots__ = ('id', 'type', 'order_id', 'restaurant_id', 'data', 'time')
+
+    def __init__(self, event_id, event_type, order_id, restaurant_id, data):
+        self.id = event_id
+        self.type = event_type
+        self.order_id = order_id
+        self.restaurant_id = restaurant_id
+        self.data = data
+        self.time = time.time()
+
+    def as_dict(self):
+        return {'id': self.id, 'type': self.type, 'order_id': self.order_id,
+                'restaurant_id': self.restaurant_id, 'data': self.data, 'time': round(self.time, 3)}
+
+    def sse(self):
+        """The event as a Server-Sent Events frame"""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.as_dict(), default=str)}\n\n"
+
+
+class Subscription:
+    """
+    Bounded queue of matching events. With a loop it feeds an asyncio.Queue
+    (read with `await next()`), otherwise a queue.Queue (read with get()).
+    A subscriber that falls QUEUE_SIZE events behind is closed rather than
+    buffering forever; it resumes from its last event id on reconnect.
+    """
+
+    def __init__(self, hub, order_id=None, restaurant_id=None, loop=None, maxsize=QUEUE_SIZE):
+        self.hub = hub
+        self.order_id = order_id
+        self.restaurant_id = restaurant_id
+        self.loop = loop
+        self.maxsize = maxsize
+        self._queue = asyncio.Queue() if loop is not None else queue.Queue()
+        self._size = 0  # events handed over but not yet consumed
+        self._size_lock = threading.Lock()  # push runs on publisher threads, _taken on the reader's
+        self.closed = False
+        self.overflowed = False
+
+    def matches(self, event):
+        if event.type == RESET:
+            return True
+        if self.order_id is not None and event.order_id != self.order_id:
+            return False
+        if self.restaurant_id is not None and event.restaurant_id != self.restaurant_id:
+            return False
+        return True
+
+    def _deliver(self, item):
+        if self.loop is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._queue.put_nowait, item)
+            except RuntimeError:
+                self.closed = True  # event loop already closed
+        else:
+            self._queue.put_nowait(item)
+
+    def push(self, event):
+        """Called by the hub with its lock held; False once the subscriber has overflowed"""
+        if self.closed:
+            return False
+        with self._size_lock:
+            full = self._size >= self.maxsize
+            if not full:
+                self._size += 1
+        if full:
+            self.overflowed = self.closed = True
+            self._deliver(None)
+            return False
+        self._deliver(event)
+        return True
+
+    def _taken(self, item):
+        if item is None:
+            return None
+        with self._size_lock:
+            self._size -= 1
+        return item
+
+    async def next(self):
+        """Next event, or None once the subscription is closed"""
+        return self._taken(await self._queue.get())
+
+    def get(self, timeout=None):
+        """Blocking read for thread subscribers; None when closed or timed out"""
+        try:
+            return self._taken(self._queue.get(timeout=timeout))
+        except queue.Empty:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.hub.unsubscribe(self)
+            self._deliver(None)
+
+
+class EventHub:
+    """Fan-out of order events with a bounded replay buffer for reconnects"""
+
+    def __init__(self, replay_size=REPLAY_SIZE):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._buffer = collections.deque(maxlen=replay_size)
+        self._subscribers = set()
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, event_type, order_id, restaurant_id=None, **data):
+        with self._lock:
+            event = Event(next(self._ids), event_type, order_id, restaurant_id, data)
+            self._last_id = event.id
+            self._buffer.append(event)
+            self.published += 1
+            for subscription in list(self._subscribers):
+                if subscription.matches(event) and not subscription.push(event):
+                    self._subscribers.discard(subscription)
+                    self.dropped += 1
+        return event
+
+    def subscribe(self, order_id=None, restaurant_id=None, last_event_id=None, loop=None):
+        """
+        Subscribe to future events, first replaying buffered events newer than
+        last_event_id. If the client missed more than the buffer holds (or the
+        id is from before a restart) it receives a RESET event instead.
+        """
+        subscription = Subscription(self, order_id, restaurant_id, loop)
+        with self._lock:
+            if last_event_id is not None:
+                oldest = self._buffer[0].id if self._buffer else self._last_id + 1
+                if last_event_id > self._last_id or last_event_id < oldest - 1:
+                    subscription.push(Event(self._last_id, RESET, None, None, {'last_event_id': self._last_id}))
+                else:
+                    missed = [event for event in self._buffer
+                              if event.id > last_event_id and subscription.matches(event)]
+                    subscription.maxsize += len(missed)  # the backlog does not count against the limit
+                    for event in missed:
+                        subscription.push(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def last_event_id(self):
+        return self._last_id
+
+    def stats(self):
+        with self._lock:
+            return {
+                'last_event_id': self._last_id,
+                'buffered': len(self._buffer),
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'dropped_subscribers': self.dropped,
+            }
+
+
+_hubs = {}
+_hubs_lock = threading.Lock()
+
+
+def get_hub(db_path=DB_PATH):
+    """Shared event hub for a database"""
+    with _hubs_lock:
+        hub = _hubs.get(db_path)
+        if hub is None:
+            hub = _hubs[db_path] = EventHub()
+        return hub
+
+
+def order_created(order, db_path=DB_PATH):
+    """Publish the events for a freshly inserted order (created, plus its rider)"""
+    hub = get_hub(db_path)
+    data = {key: value for key, value in order.items() if key not in ('id', 'restaurant_id')}
+    hub.publish(ORDER_CREATED, order['id'], order['restaurant_id'], **data)
+    if order.get('delivery_staff_id'):
+        hub.publish(STAFF_ASSIGNED, order['id'], order['restaurant_id'],
+                    delivery_staff_id=order['delivery_staff_id'], status=order['status'])
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Streaming order export for the Food Delivery System
+Writes orders in fetchmany batches to CSV, JSON lines or Parquet, optionally gzipped;
+archived months are merged in by id so exports still cover every order
+"""
+
+import argparse
+import csv
+import gzip
+import heapq
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import archive
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+DB_PATH = 'backend/food_delivery.db'
+BATCH_SIZE = 5000
+
+COLUMNS = ['id', 'restaurant', 'total_price', 'status', 'created_at']
+CSV_HEADER = ['Order ID', 'Restaurant', 'Total Price', 'Status', 'Created']
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+EXPORT_QUERY = """
+    SELECT o.id, r.name as restaurant, o.total_price, o.status, o.created_at
+    FROM {orders_table} o
+    LEFT JOIN restaurants r ON o.restaurant_id = r.id
+    WHERE o.id > ?
+    ORDER BY o.id
+"""
+
+
+def default_filename(fmt='csv', compress=False):
+    name = f"orders_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    return name + '.gz' if compress and fmt != 'parquet' else name
+
+
+class CsvSink:
+    def __init__(self, f):
+        self.writer = csv.writer(f)
+        self.writer.writerow(CSV_HEADER)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        pass
+
+
+class JsonLinesSink:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, rows):
+        self.f.write(''.join(json.dumps(dict(zip(COLUMNS, row))) + '\n' for row in rows))
+
+    def close(self):
+        pass
+
+
+class ParquetSink:
+    """Writes each batch as one Parquet row group"""
+
+    def __init__(self, path, compress):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.schema = pyarrow.schema([
+            ('id', pyarrow.int64()),
+            ('restaurant', pyarrow.string()),
+            ('total_price', pyarrow.float64()),
+            ('status', pyarrow.string()),
+            ('created_at', pyarrow.string()),
+        ])
+        compression = 'gzip' if compress else 'snappy'
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression=compression)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        columns[2] = [float(v) if v is not None else None for v in columns[2]]
+        columns[4] = [str(v) if v is not None else None for v in columns[4]]
+        self.writer.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(col, type=field.type) for col, field in zip(columns, self.schema)],
+            schema=self.schema
+        ))
+
+    def close(self):
+        self.writer.close()
+
+
+def _open_text(path, compress):
+    if compress:
+        return gzip.open(path, 'wt', newline='', encoding='utf-8')
+    return open(path, 'w', newline='', encoding='utf-8')
+
+
+def _rows(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_orders(path, fmt='csv', after_id=0, compress=False, batch_size=BATCH_SIZE,
+                  progress=None, db_path=DB_PATH):
+    """
+    Stream orders with id > after_id into path.
+    progress(done, total) is called after every batch.
+    Returns (rows written, last exported order id).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    conn = sqlite3.connect(db_path)
+    try:
+        total = 0
+        streams = []
+        for orders_table, _ in archive.partitions(conn.cursor()):
+            cursor = conn.cursor()
+            total += cursor.execute(f"SELECT COUNT(*) FROM {orders_table} WHERE id > ?", (after_id,)).fetchone()[0]
+            cursor.execute(EXPORT_QUERY.format(orders_table=orders_table), (after_id,))
+            streams.append(_rows(cursor, batch_size))
+        # each partition is already in id order; ids never repeat across partitions
+        rows = streams[0] if len(streams) == 1 else heapq.merge(*streams, key=lambda row: row[0])
+
+        f = None
+        if fmt == 'parquet':
+            sink = ParquetSink(path, compress)
+        else:
+            f = _open_text(path, compress)
+            sink = CsvSink(f) if fmt == 'csv' else JsonLinesSink(f)
+
+        done = 0
+        last_id = after_id
+        try:
+            if progress:
+                progress(0, total)
+            for batch in _batches(rows, batch_size):
+                sink.write(batch)
+                done += len(batch)
+                last_id = batch[-1][0]
+                if progress:
+                    progress(done, total)
+        finally:
+            sink.close()
+            if f is not None:
+                f.close()
+        return done, last_id
+    finally:
+        conn.close()
+
+
+def read_state(state_file):
+    """Last exported order id recorded in an incremental-export state file"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f).get('last_id', 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_state(state_file, last_id):
+    tmp = state_file + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'last_id': last_id, 'exported_at': datetime.now().isoformat(timespec='seconds')}, f)
+    os.replace(tmp, state_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export orders without loading them all into memory")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database file")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--output', help="output file (default: orders_export_<timestamp>.<format>)")
+    parser.add_argument('--gzip', action='store_true', help="gzip CSV/JSON output, or gzip-compress Parquet pages")
+    parser.add_argument('--after-id', type=int, default=0, help="only export orders with a higher id")
+    parser.add_argument('--incremental', metavar='STATE_FILE',
+                        help="resume after the last id recorded in STATE_FILE and update it afterwards")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    after_id = args.after_id
+    if args.incremental:
+        after_id = max(after_id, read_state(args.incremental))
+    output = args.output or default_filename(args.format, args.gzip)
+
+    def report(done, total):
+        print(f"\rExported {done}/{total} orders", end='', file=sys.stderr, flush=True)
+
+    try:
+        count, last_id = export_orders(output, args.format, after_id, args.gzip, args.batch_size,
+                                       report, args.db)
+    except (RuntimeError, sqlite3.Error) as e:
+        print(f"\n❌ Export failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(file=sys.stderr)
+    if args.incremental:
+        write_state(args.incremental, last_id)
+    print(f"✅ {count} orders exported to {output} (last id {last_id})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for the Food Delivery System
+Fills a SQLite database with restaurants, menus, customers, delivery staff,
+orders and order items at any scale, deterministically from a seed
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import catalog_search
+import order_queries
+import report_aggregates
+import schema_cache
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS restaurants (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        cuisine TEXT,
+        rating REAL DEFAULT 4.0,
+        delivery_time INTEGER,
+        image_url TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS menu_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        restaurant_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        description TEXT,
+        price DECIMAL(10, 2) NOT NULL,
+        image_url TEXT,
+        category TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (restaurant_id) REFERENCES restaurants(id) ON DELETE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS customers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        phone TEXT,
+        address TEXT,
+        city TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS delivery_staff (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        vehicle_type TEXT,
+        status TEXT DEFAULT 'Available',
+        rating REAL DEFAULT 5.0,
+        total_deliveries INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER NOT NULL,
+        restaurant_id INTEGER NOT NULL,
+        delivery_staff_id INTEGER,
+        total_price DECIMAL(10, 2) NOT NULL,
+        status TEXT DEFAULT 'Pending',
+        delivery_address TEXT,
+        payment_method TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        version INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (customer_id) REFERENCES customers(id) ON DELETE CASCADE,
+        FOREIGN KEY (restaurant_id) REFERENCES restaurants(id) ON DELETE CASCADE,
+        FOREIGN KEY (delivery_staff_id) REFERENCES delivery_staff(id) ON DELETE SET NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS order_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER NOT NULL,
+        menu_item_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL DEFAULT 1,
+        price DECIMAL(10, 2),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE,
+        FOREIGN KEY (menu_item_id) REFERENCES menu_items(id) ON DELETE CASCADE
+    )""",
+]
+
+CUISINES = {
+    'Italian': ['Pizza', 'Pasta', 'Salad', 'Dessert'],
+    'American': ['Burger', 'Sides', 'Beverage', 'Dessert'],
+    'Japanese': ['Sushi', 'Sashimi', 'Soup', 'Ramen'],
+    'Mexican': ['Tacos', 'Entree', 'Appetizer', 'Dessert'],
+    'Indian': ['Curry', 'Grill', 'Bread', 'Beverage'],
+    'Thai': ['Curry', 'Noodles', 'Soup', 'Salad'],
+    'Chinese': ['Noodles', 'Rice', 'Dim Sum', 'Soup'],
+}
+CITIES = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Seattle', 'Boston']
+VEHICLES = ['Motorcycle', 'Bicycle', 'Car']
+PAYMENT_METHODS = ['Cash', 'Card', 'UPI', 'Wallet']
+OPEN_STATUSES = ['Pending', 'Confirmed', 'Preparing', 'Out for Delivery']
+
+
+class Scale:
+    """Row counts for one generated dataset, derived from the order count by default"""
+
+    def __init__(self, orders, restaurants=None, items_per_restaurant=20, customers=None, staff=None,
+                 open_orders=None, days=90):
+        self.orders = orders
+        self.restaurants = restaurants or max(5, orders // 500)
+        self.items_per_restaurant = items_per_restaurant
+        self.customers = customers or max(10, orders // 20)
+        self.staff = staff or max(6, orders // 1000)
+        self.open_orders = min(orders, open_orders if open_orders is not None else max(1, orders // 200))
+        self.days = days
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate(db_path, scale, seed=42, end=None, batch_size=10000, indexes=True, progress=None):
+    """
+    Create and fill a fresh database. Everything except the timestamps' anchor (`end`,
+    default now) is a pure function of the seed and scale.
+    Returns per-table row counts.
+    """
+    rng = random.Random(seed)
+    end_ts = (end or datetime.now()).timestamp()
+    start_ts = end_ts - scale.days * 86400
+    origin = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_ts))
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -65536")
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+    cuisines = list(CUISINES)
+    restaurants = []
+    for i in range(1, scale.restaurants + 1):
+        cuisine = rng.choice(cuisines)
+        restaurants.append((i, f"{cuisine} Kitchen #{i}", cuisine, round(rng.uniform(3.0, 5.0), 1),
+                            rng.randint(15, 60), f"https://via.placeholder.com/200?text=Restaurant+{i}", origin))
+    conn.executemany(
+        "INSERT INTO restaurants (id, name, cuisine, rating, delivery_time, image_url, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        restaurants
+    )
+
+    menus = {}  # restaurant id -> [(menu item id, price)]
+    menu_rows = []
+    item_id = 0
+    for restaurant_id, _, cuisine, _, _, _, _ in restaurants:
+        categories = CUISINES[cuisine]
+        for n in range(scale.items_per_restaurant):
+            item_id += 1
+            category = categories[n % len(categories)]
+            price = round(rng.uniform(2.0, 25.0), 2)
+            menus.setdefault(restaurant_id, []).append((item_id, price))
+            menu_rows.append((item_id, restaurant_id, f"{category} Special {n + 1}",
+                              f"House {category.lower()} from restaurant {restaurant_id}", price, category, origin))
+    conn.executemany(
+        "INSERT INTO menu_items (id, restaurant_id, name, description, price, category, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        menu_rows
+    )
+
+    for chunk in _chunks(((i, f"Customer {i}", f"customer{i}@example.com", f"+1-555-{i % 10000:04}",
+                           f"{rng.randint(1, 999)} Main Street", rng.choice(CITIES), origin)
+                          for i in range(1, scale.customers + 1)), batch_size):
+        conn.executemany(
+            "INSERT INTO customers (id, name, email, phone, address, city, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)", chunk
+        )
+
+    busy = set()
+    staff_rows = []
+    for i in range(1, scale.staff + 1):
+        staff_rows.append([i, f"Rider {i}", f"+1-555-{i % 10000:04}", rng.choice(VEHICLES), 'Available',
+                           round(rng.uniform(4.0, 5.0), 1), 0, origin])
+
+    def orders_and_items():
+        item_pk = 0
+        span = end_ts - start_ts
+        first_open = scale.orders - scale.open_orders
+        for order_id in range(1, scale.orders + 1):
+            restaurant_id = rng.randint(1, scale.restaurants)
+            menu = menus[restaurant_id]
+            lines = []
+            total = 0.0
+            for menu_item_id, price in rng.sample(menu, min(len(menu), rng.randint(1, 4))):
+                quantity = rng.randint(1, 3)
+                total += price * quantity
+                lines.append((menu_item_id, quantity, price))
+            if order_id > first_open:
+                # the newest orders are still in flight, created in the last 40 seconds
+                created = end_ts - rng.uniform(0, 40)
+                status = rng.choice(OPEN_STATUSES)
+            else:
+                created = start_ts + span * (order_id / max(first_open, 1)) - rng.uniform(0, 60)
+                status = 'Cancelled' if rng.random() < 0.03 else 'Delivered'
+            staff_id = None
+            if status in ('Delivered', 'Out for Delivery'):
+                staff_id = rng.randint(1, scale.staff)
+                staff_rows[staff_id - 1][6] += 1
+                if status == 'Out for Delivery':
+                    busy.add(staff_id)
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))
+            order = (order_id, rng.randint(1, scale.customers), restaurant_id, staff_id, round(total, 2), status,
+                     f"{rng.randint(1, 999)} Market Street", rng.choice(PAYMENT_METHODS), stamp, stamp)
+            items = []
+            for menu_item_id, quantity, price in lines:
+                item_pk += 1
+                items.append((item_pk, order_id, menu_item_id, quantity, price, stamp))
+            yield order, items
+
+    done = 0
+    for chunk in _chunks(orders_and_items(), batch_size):
+        conn.executemany("""
+            INSERT INTO orders (id, customer_id, restaurant_id, delivery_staff_id, total_price, status,
+                                delivery_address, payment_method, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [order for order, _ in chunk])
+        conn.executemany(
+            "INSERT INTO order_items (id, order_id, menu_item_id, quantity, price, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [item for _, items in chunk for item in items]
+        )
+        done += len(chunk)
+        if progress:
+            progress(done, scale.orders)
+
+    for row in staff_rows:
+        if row[0] in busy:
+            row[4] = 'Busy'
+    conn.executemany(
+        "INSERT INTO delivery_staff (id, name, phone, vehicle_type, status, rating, total_deliveries, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        staff_rows
+    )
+
+    if indexes:
+        order_queries.ensure_indexes(conn)
+        report_aggregates.install(conn)
+        catalog_search.install(conn)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA journal_mode = DELETE")
+    schema_cache.invalidate(db_path)
+
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ('restaurants', 'menu_items', 'customers', 'delivery_staff', 'orders', 'order_items')}
+    conn.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Food Delivery System database")
+    parser.add_argument('--db', default='benchmark.db', help="database file to (re)create")
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--restaurants', type=int, help="default: orders / 500")
+    parser.add_argument('--items-per-restaurant', type=int, default=20)
+    parser.add_argument('--customers', type=int, help="default: orders / 20")
+    parser.add_argument('--staff', type=int, help="default: orders / 1000")
+    parser.add_argument('--open-orders', type=int, help="orders still in flight (default: orders / 200)")
+    parser.add_argument('--days', type=int, default=90, help="history length the orders span")
+    parser.add_argument('--end', help="timestamp of the newest order, YYYY-MM-DD HH:MM:SS (default: now)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--no-indexes', action='store_true', help="skip secondary indexes and report aggregates")
+    args = parser.parse_args(argv)
+
+    scale = Scale(args.orders, args.restaurants, args.items_per_restaurant, args.customers, args.staff,
+                  args.open_orders, args.days)
+    end = datetime.strptime(args.end, '%Y-%m-%d %H:%M:%S') if args.end else None
+
+    def report(done, total):
+        print(f"\r   {done}/{total} orders", end='', flush=True)
+
+    print(f"🚀 Generating {args.db} (seed {args.seed})...")
+    started = time.perf_counter()
+    counts = generate(args.db, scale, args.seed, end, args.batch_size, not args.no_indexes, report)
+    print()
+    for table, count in counts.items():
+        print(f"   ✓ {table}: {count} records")
+    print(f"✅ Done in {time.perf_counter() - started:.1f}s")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Index and query-plan advisor for the Food Delivery System
+Runs the application's queries through EXPLAIN QUERY PLAN against a generated
+dataset, flags full scans and temp B-trees, and produces an index migration
+with before/after timings
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from argparse import Namespace
+
+import generate_data
+import order_queries
+import view_orders
+from viewer_queries import VIEWS as GUI_VIEWS, PAGE_SIZE as GUI_PAGE_SIZE
+
+# Indexes the advisor proposes: those behind paginated order lists plus the
+# status loop, staff assignment, find-or-create and per-order lookups
+RECOMMENDED_INDEXES = [(name, table, columns) for name, table, columns, _ in order_queries.INDEXES] + [
+    ('idx_delivery_staff_available', 'delivery_staff', 'status, rating DESC, total_deliveries'),
+    ('idx_customers_email', 'customers', 'email'),
+    ('idx_menu_items_restaurant', 'menu_items', 'restaurant_id'),
+    ('idx_order_items_menu_item', 'order_items', 'menu_item_id'),
+]
+
+
+def query_catalog():
+    """(name, source, sql, params) for the queries the applications issue"""
+    report_sql, report_params = view_orders.build_query(Namespace(
+        since=None, until=None, status=['Pending'], restaurant=7, before_id=None, limit=100))
+    catalog = [
+        ('status loop: open orders', 'backend/app.py', """
+            SELECT id, status, created_at, updated_at, delivery_staff_id FROM orders
+            WHERE status NOT IN ('Delivered', 'Cancelled') ORDER BY created_at ASC""", ()),
+        ('status engine: load open orders', 'status_engine.py', """
+            SELECT id, status, created_at FROM orders
+            WHERE status IN (?, ?, ?, ?)""", ('Pending', 'Confirmed', 'Preparing', 'Out for Delivery')),
+        ('staff assignment', 'backend/app.py', """
+            SELECT id FROM delivery_staff WHERE status = 'Available'
+            ORDER BY rating DESC, total_deliveries ASC LIMIT 1""", ()),
+        ('find-or-create customer', 'backend/app.py',
+            "SELECT * FROM customers WHERE email = ?", ('customer42@example.com',)),
+        ('order detail items', 'backend/app.py', """
+            SELECT oi.*, mi.name, mi.price FROM order_items oi
+            LEFT JOIN menu_items mi ON oi.menu_item_id = mi.id WHERE oi.order_id = ?""", (1234,)),
+        ('add item: existing line', 'backend/app.py',
+            "SELECT id, quantity FROM order_items WHERE order_id = ? AND menu_item_id = ?", (1234, 5)),
+        ('order total recompute', 'backend/app.py',
+            "SELECT SUM(quantity * price) FROM order_items WHERE order_id = ?", (1234,)),
+        ('restaurant menu', 'backend/app.py',
+            "SELECT * FROM menu_items WHERE restaurant_id = ?", (7,)),
+        ('all orders (GROUP_CONCAT)', 'backend/app.py', """
+            SELECT o.id, o.status, o.created_at, GROUP_CONCAT(mi.name || ' x' || oi.quantity, ', ') as items,
+                   r.name as restaurant_name
+            FROM orders o
+            LEFT JOIN order_items oi ON o.id = oi.order_id
+            LEFT JOIN menu_items mi ON oi.menu_item_id = mi.id
+            LEFT JOIN restaurants r ON o.restaurant_id = r.id
+            GROUP BY o.id ORDER BY o.created_at DESC""", ()),
+        ('orders by status report', 'backend/app.py',
+            "SELECT status, COUNT(*) as count FROM orders GROUP BY status ORDER BY count DESC", ()),
+        ('paged order list by status', 'order_queries.py', """
+            SELECT o.id FROM orders o WHERE o.status IN ('Pending') AND (o.created_at, o.id) < (?, ?)
+            ORDER BY o.created_at DESC, o.id DESC LIMIT 51""", ('2030-01-01', 0)),
+        ('order changes feed', 'order_queries.py', """
+            SELECT o.id FROM orders o WHERE o.updated_at >= ? ORDER BY o.updated_at, o.id LIMIT 51""",
+            ('2024-01-01 00:00:00',)),
+        ('report: filtered orders', 'view_orders.py', report_sql, tuple(report_params)),
+    ]
+    for name, view in GUI_VIEWS.items():
+        catalog.append((f"viewer page: {name}", 'database_viewer_gui.py',
+                        view['query'].format(where='', table='orders'), (GUI_PAGE_SIZE,)))
+    return catalog
+
+
+def explain(conn, sql, params):
+    """Plan detail lines plus the problems they reveal"""
+    details = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()]
+    sorts = any('USE TEMP B-TREE' in detail for detail in details)
+    # A scan that already follows the ORDER BY and stops at LIMIT reads only one page
+    bounded = 'LIMIT' in sql.upper() and not sorts
+    problems = []
+    for detail in details:
+        if detail.startswith('SCAN ') and 'USING' not in detail and not bounded:
+            problems.append(f"full scan: {detail}")
+        elif 'USE TEMP B-TREE' in detail:
+            problems.append(f"temp b-tree: {detail}")
+    return details, problems
+
+
+def time_query(conn, sql, params, repeat=3):
+    """Best-of-N wall time in milliseconds, reading every row"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def analyze(conn, catalog, repeat=3):
+    results = []
+    for name, source, sql, params in catalog:
+        details, problems = explain(conn, sql, params)
+        results.append({'name': name, 'source': source, 'plan': details, 'problems': problems,
+                        'ms': time_query(conn, sql, params, repeat)})
+    return results
+
+
+def migration_sql():
+    lines = ["-- Index migration generated by index_advisor.py"]
+    lines += [f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns});" for name, table, columns in RECOMMENDED_INDEXES]
+    return "\n".join(lines) + "\n"
+
+
+def apply_indexes(conn):
+    """Create recommended indexes whose columns exist in this database"""
+    existing = {}
+    for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+        existing[table] = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    created = []
+    for name, table, columns in RECOMMENDED_INDEXES:
+        needed = {column.split()[0] for column in columns.split(', ')}
+        if needed <= existing.get(table, set()):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+            created.append(name)
+    conn.execute("ANALYZE")
+    conn.commit()
+    return created
+
+
+def print_report(before, after):
+    print("=" * 80)
+    print(f"{'QUERY':42} {'BEFORE ms':>10} {'AFTER ms':>10}  PROBLEMS (before -> after)")
+    print("=" * 80)
+    for b, a in zip(before, after):
+        print(f"{b['name'][:42]:42} {b['ms']:10.2f} {a['ms']:10.2f}  {len(b['problems'])} -> {len(a['problems'])}")
+        for problem in a['problems']:
+            print(f"    ⚠️  {problem}")
+    remaining = sum(1 for a in after if a['problems'])
+    print("-" * 80)
+    print(f"{remaining} of {len(after)} queries still scan or sort (aggregate reports are expected to)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Explain application queries and recommend indexes")
+    parser.add_argument('--orders', type=int, default=100000, help="orders in the generated dataset")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help="timing repetitions per query")
+    parser.add_argument('--write-migration', metavar='FILE', help="write the index migration SQL to FILE")
+    parser.add_argument('--apply', metavar='DB', help="apply the recommended indexes to this SQLite database")
+    args = parser.parse_args(argv)
+
+    if args.write_migration:
+        with open(args.write_migration, 'w', encoding='utf-8') as f:
+            f.write(migration_sql())
+        print(f"✅ Migration written to {args.write_migration}")
+
+    workdir = tempfile.mkdtemp(prefix='index_advisor_')
+    sample_path = os.path.join(workdir, 'sample.db')
+    print(f"📊 Generating {args.orders} orders in {sample_path}...")
+    generate_data.generate(sample_path, generate_data.Scale(args.orders), args.seed, indexes=False)
+    conn = sqlite3.connect(sample_path)
+    try:
+        catalog = query_catalog()
+        before = analyze(conn, catalog, args.repeat)
+        apply_indexes(conn)
+        after = analyze(conn, catalog, args.repeat)
+        print_report(before, after)
+    finally:
+        conn.close()
+        os.remove(sample_path)
+        os.rmdir(workdir)
+
+    if args.apply:
+        target = sqlite3.connect(args.apply)
+        try:
+            created = apply_indexes(target)
+        finally:
+            target.close()
+        print(f"✅ Applied {len(created)} indexes to {args.apply}")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
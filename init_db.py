@@ -2,6 +2,11 @@
 import sqlite3
 import os
 
+import catalog_search
+import order_queries
+import report_aggregates
+import schema_cache
+
 DB_PATH = 'backend/food_delivery.db'
 
 # SQL statements for creating tables
@@ -100,6 +105,15 @@ try:
     for statement in sql_statements:
         cursor.execute(statement)
     
+    # Composite indexes for paginated order lists
+    order_queries.ensure_indexes(conn)
+    
+    # Report aggregate tables and the triggers that keep them current
+    report_aggregates.install(conn)
+    
+    # Full-text search over the catalog, kept current by triggers
+    catalog_search.install(conn)
+    
     # Insert restaurants
     cursor.executemany(
         "INSERT INTO restaurants (name, cuisine, rating, delivery_time, image_url) VALUES (?, ?, ?, ?, ?)",
@@ -113,6 +127,7 @@ try:
     )
     
     conn.commit()
+    schema_cache.refresh(DB_PATH, conn)
     conn.close()
     
     print("[SUCCESS] Database initialized successfully!")
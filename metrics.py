@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Request, database and background-loop instrumentation for the Food Delivery System
+Records per-route latency histograms, DB query counts and time per request,
+status engine tick durations and (opt-in) sampled cProfile data, and renders
+everything in the Prometheus text format for a /metrics endpoint
+"""
+
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import random
+import sqlite3
+import threading
+import time
+
+import structured_log
+
+ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))  # fraction of requests profiled
+QUERY_WARN_THRESHOLD = int(os.getenv('QUERY_WARN_THRESHOLD', '50'))  # queries per request worth a warning
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+log = structured_log.get_logger('metrics')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.label_names, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{_labels(self.label_names, labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{self.name}_sum{_labels(self.label_names, labels)} {round(series[-1], 6)}')
+                lines.append(f'{self.name}_count{_labels(self.label_names, labels)} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Metrics plus collectors called at scrape time for gauges (pool sizes etc.)"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """collect() returns [(name, help, {labels}, value)]; each becomes a gauge sample"""
+        self._collectors.append(collect)
+
+    def remove_collector(self, collect):
+        if collect in self._collectors:
+            self._collectors.remove(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        gauges = {}
+        for collect in self._collectors:
+            try:
+                samples = collect()
+            except Exception:
+                log.exception("metrics collector failed")
+                continue
+            for name, help, labels, value in samples:
+                gauges.setdefault(name, (help, []))[1].append((labels, value))
+        for name, (help, samples) in gauges.items():
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+            for labels, value in samples:
+                lines.append(f'{name}{_labels(labels.keys(), labels.values())} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Time to produce a response', ('method', 'route')))
+REQUESTS = REGISTRY.register(Counter(
+    'http_requests_total', 'Responses by route and status code', ('method', 'route', 'status')))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    'http_request_db_queries', 'Database statements executed per request', ('route',), QUERY_COUNT_BUCKETS))
+REQUEST_DB_TIME = REGISTRY.register(Histogram(
+    'http_request_db_seconds', 'Database time spent per request', ('route',)))
+DB_QUERIES = REGISTRY.register(Counter('db_queries_total', 'Database statements executed'))
+DB_TIME = REGISTRY.register(Histogram('db_query_duration_seconds', 'Time per database statement'))
+STATUS_TICK = REGISTRY.register(Histogram(
+    'status_engine_tick_seconds', 'Time to apply one batch of due status transitions'))
+STATUS_TRANSITIONS = REGISTRY.register(Counter(
+    'status_engine_transitions_total', 'Order status transitions applied', ('status',)))
+
+
+# ---- per-request accounting ----
+
+class RequestStats:
+    __slots__ = ('method', 'route', 'queries', 'db_time', 'started', 'profile')
+
+    def __init__(self, method, route):
+        self.method = method
+        self.route = route
+        self.queries = 0
+        self.db_time = 0.0
+        self.started = time.perf_counter()
+        self.profile = PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+def begin_request(method, route):
+    """Start accounting for a request; work in this context (and threads it hands off to) is attributed to it"""
+    stats = RequestStats(method, route)
+    return stats, _current.set(stats)
+
+
+def end_request(stats, token, status):
+    _current.reset(token)
+    REQUEST_LATENCY.observe(time.perf_counter() - stats.started, stats.method, stats.route)
+    REQUESTS.inc(stats.method, stats.route, status)
+    REQUEST_QUERIES.observe(stats.queries, stats.route)
+    REQUEST_DB_TIME.observe(stats.db_time, stats.route)
+    if stats.queries > QUERY_WARN_THRESHOLD:
+        log.warning("request ran many queries", extra={
+            'route': stats.route, 'method': stats.method, 'queries': stats.queries,
+            'db_ms': round(stats.db_time * 1000, 3)})
+
+
+def record_query(elapsed, count=True):
+    if count:
+        DB_QUERIES.inc()
+        DB_TIME.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        if count:
+            stats.queries += 1
+        stats.db_time += elapsed
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports every statement (and fetch time) to the metrics"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_query(time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_query(time.perf_counter() - started)
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            record_query(time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            record_query(time.perf_counter() - started, count=False)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            record_query(time.perf_counter() - started, count=False)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            record_query(time.perf_counter() - started, count=False)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3.connect(factory=...) target whose cursors are instrumented"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def connection_factory():
+    return InstrumentedConnection if ENABLED else sqlite3.Connection
+
+
+# ---- background loops ----
+
+def observe_tick(elapsed, due):
+    STATUS_TICK.observe(elapsed)
+    for status, order_ids in due.items():
+        STATUS_TRANSITIONS.inc(status, amount=len(order_ids))
+
+
+# ---- sampled profiling ----
+
+_profiles = {}  # route -> pstats.Stats
+_profiles_lock = threading.Lock()
+
+
+def call(fn, *args):
+    """
+    Run fn(*args), under cProfile when the current request was sampled.
+    Used for the work a request hands to worker threads, where its time goes.
+    """
+    stats = _current.get()
+    if stats is None or not stats.profile:
+        return fn(*args)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args)
+    finally:
+        with _profiles_lock:
+            existing = _profiles.get(stats.route)
+            if existing is None:
+                _profiles[stats.route] = pstats.Stats(profiler)
+            else:
+                existing.add(profiler)
+
+
+def profile_report(route=None, limit=30, sort='cumulative'):
+    """Text summary of the sampled profiles (one route, or all)"""
+    out = io.StringIO()
+    with _profiles_lock:
+        routes = [route] if route else sorted(_profiles)
+        for name in routes:
+            stats = _profiles.get(name)
+            if stats is None:
+                continue
+            out.write(f"==== {name} ====\n")
+            stats.stream = out
+            stats.sort_stats(sort).print_stats(limit)
+    return out.getvalue() or "No profiles sampled (set PROFILE_SAMPLE_RATE)\n"
+
+
+def dump_profiles(directory):
+    """Write one .prof file per route (readable with pstats or snakeviz)"""
+    os.makedirs(directory, exist_ok=True)
+    with _profiles_lock:
+        for route, stats in _profiles.items():
+            name = route.strip('/').replace('/', '_').replace('{', '').replace('}', '') or 'root'
+            stats.dump_stats(os.path.join(directory, f'{name}.prof'))
+        return len(_profiles)
+
+
+def render():
+    return REGISTRY.render()
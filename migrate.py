@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+Migration runner for the Food Delivery System
+Tokenizes SQL files (quotes, comments, DELIMITER blocks, trigger bodies),
+translates MySQL dialect to SQLite and applies each versioned migration in
+one transaction, recording it in schema_migrations
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import catalog_cache
+import schema_cache
+from db_pool import DB_PATH
+
+MIGRATIONS_DIR = 'migrations'
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+_TOKEN_PATTERNS = r"""
+     (?P<ws>\s+)
+    |(?P<comment>--[^\n]*|/\*.*?\*/{hash})
+    |(?P<string>{string})
+    |(?P<quoted>"(?:[^"]|"")*"|`(?:[^`]|``)*`)
+    |(?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)
+    |(?P<word>[A-Za-z_@][\w@]*)
+    |(?P<punct>.)
+"""
+TOKENIZERS = {
+    'sqlite': re.compile(_TOKEN_PATTERNS.format(hash='', string=r"'(?:[^']|'')*'"), re.S | re.X),
+    # MySQL also has '#' comments and backslash escapes inside strings
+    'mysql': re.compile(_TOKEN_PATTERNS.format(hash=r'|\#[^\n]*', string=r"'(?:[^'\\]|\\.|'')*'"), re.S | re.X),
+}
+DELIMITER_DIRECTIVE = re.compile(r'DELIMITER[ \t]+(\S+)[^\n]*', re.I)
+MYSQL_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+
+# Statements with no SQLite equivalent; they are reported and skipped
+UNSUPPORTED = [
+    (('CREATE', 'DATABASE'), "database selection"),
+    (('USE',), "database selection"),
+    (('SET',), "session variables"),
+    (('PREPARE',), "prepared statements"),
+    (('EXECUTE',), "prepared statements"),
+    (('DEALLOCATE',), "prepared statements"),
+    (('CREATE', 'PROCEDURE'), "stored procedures"),
+    (('CREATE', 'FUNCTION'), "stored functions"),
+    (('DROP', 'PROCEDURE'), "stored procedures"),
+    (('DROP', 'FUNCTION'), "stored functions"),
+    (('CALL',), "stored procedures"),
+    (('SELECT',), "informational query"),
+]
+PROCEDURAL = {'IF', 'DECLARE', 'SET', 'WHILE', 'LOOP', 'REPEAT', 'LEAVE', 'SIGNAL'}
+DATA_STATEMENTS = {'INSERT', 'UPDATE', 'DELETE', 'REPLACE'}
+INTEGER_TYPES = {'INT', 'INTEGER', 'TINYINT', 'SMALLINT', 'MEDIUMINT', 'BIGINT'}
+
+
+class MigrationError(Exception):
+    """A migration could not be parsed or applied; nothing from it was committed"""
+
+
+# ---- tokenizing ----
+
+def _meaningful(tokens):
+    return [t for t in tokens if t[0] not in ('ws', 'comment')]
+
+
+def _peek_word(sql, pos, tokenizer):
+    """Next word after pos, skipping whitespace and comments (None if something else comes first)"""
+    while pos < len(sql):
+        match = tokenizer.match(sql, pos)
+        if match.lastgroup in ('ws', 'comment'):
+            pos = match.end()
+            continue
+        return match.group().upper() if match.lastgroup == 'word' else None
+    return None
+
+
+def split_statements(sql, dialect='sqlite'):
+    """
+    Split a script into statements, each a list of (kind, text) tokens.
+    Honours DELIMITER directives and does not split inside BEGIN ... END
+    bodies, string literals, quoted identifiers or comments.
+    """
+    tokenizer = TOKENIZERS[dialect]
+    statements = []
+    current = []
+    delimiter = ';'
+    depth = 0
+    pos = 0
+    while pos < len(sql):
+        if not _meaningful(current):
+            directive = DELIMITER_DIRECTIVE.match(sql, pos)
+            if directive:
+                delimiter = directive.group(1)
+                current = []
+                pos = directive.end()
+                continue
+        if depth <= 0 and sql.startswith(delimiter, pos):
+            if _meaningful(current):
+                statements.append(current)
+            current = []
+            depth = 0
+            pos += len(delimiter)
+            continue
+        match = tokenizer.match(sql, pos)
+        kind, text = match.lastgroup, match.group()
+        pos = match.end()
+        if kind == 'word':
+            upper = text.upper()
+            words = _meaningful(current)
+            previous = words[-1][1].upper() if words else None
+            if upper == 'BEGIN' and words:  # a leading BEGIN starts a transaction, not a block
+                depth += 1
+            elif upper == 'CASE' and previous != 'END':
+                depth += 1
+            elif upper == 'END' and _peek_word(sql, pos, tokenizer) not in ('IF', 'LOOP', 'WHILE', 'REPEAT'):
+                depth -= 1
+        current.append((kind, text))
+    if _meaningful(current):
+        statements.append(current)
+    return statements
+
+
+def render(tokens):
+    return ''.join(text for _, text in tokens).strip()
+
+
+# ---- MySQL to SQLite ----
+
+def _unescape_mysql(literal):
+    body = literal[1:-1]
+    out = []
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char == '\\' and i + 1 < len(body):
+            nxt = body[i + 1]
+            out.append(MYSQL_ESCAPES.get(nxt, nxt))
+            i += 2
+        elif char == "'" and body[i + 1:i + 2] == "'":
+            out.append("'")
+            i += 2
+        else:
+            out.append(char)
+            i += 1
+    return ''.join(out)
+
+
+def _quote(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _column_start(tokens, index):
+    """Index just after the ',' or '(' that opens the column definition containing index"""
+    depth = 0
+    for i in range(index - 1, -1, -1):
+        text = tokens[i][1]
+        if text == ')':
+            depth += 1
+        elif text == '(' and depth:
+            depth -= 1
+        elif depth == 0 and text in (',', '('):
+            return i + 1
+    return 0
+
+
+def _translate_auto_increment(tokens, index):
+    """`id INT PRIMARY KEY AUTO_INCREMENT` -> `id INTEGER PRIMARY KEY AUTOINCREMENT`"""
+    start = _column_start(tokens, index)
+    words = [i for i in range(start, index) if tokens[i][0] in ('word', 'quoted')]
+    if len(words) >= 2 and tokens[words[1]][1].upper() in INTEGER_TYPES:
+        tokens[words[1]] = ('word', 'INTEGER')
+    segment_words = [tokens[i][1].upper() for i in words]
+    if 'PRIMARY' in segment_words:
+        return [('word', 'AUTOINCREMENT')]
+    return []
+
+
+def _body_heads(tokens):
+    """First word of every statement inside a BEGIN ... END body"""
+    heads = set()
+    expect = False
+    for kind, text in _meaningful(tokens):
+        if expect and kind == 'word':
+            heads.add(text.upper())
+        expect = text == ';' or text.upper() in ('BEGIN', 'THEN', 'ELSE')
+    return heads
+
+
+def translate(tokens, dialect='sqlite'):
+    """
+    SQLite tokens for one statement, or (None, reason) when SQLite cannot run it.
+    Returns (tokens, None) otherwise.
+    """
+    words = [text.upper() for kind, text in tokens if kind == 'word']
+    for prefix, reason in UNSUPPORTED:
+        if tuple(words[:len(prefix)]) == prefix:
+            return None, reason
+    if words[:2] == ['CREATE', 'TRIGGER'] and PROCEDURAL & _body_heads(tokens):
+        return None, "procedural trigger body"
+    if dialect != 'mysql':
+        return tokens, None
+
+    out = []
+    i = 0
+    while i < len(tokens):
+        kind, text = tokens[i]
+        upper = text.upper() if kind == 'word' else None
+        if kind == 'string':
+            out.append(('string', _quote(_unescape_mysql(text))))
+        elif kind == 'quoted' and text.startswith('`'):
+            out.append(('quoted', '"' + text[1:-1].replace('``', '`').replace('"', '""') + '"'))
+        elif upper == 'AUTO_INCREMENT':
+            replacement = _translate_auto_increment(out, len(out))
+            if replacement:
+                out += replacement
+            elif out and out[-1][0] == 'ws':
+                out.pop()
+        elif upper in ('ENGINE', 'CHARSET', 'COLLATE') or (upper == 'DEFAULT' and _next_word(tokens, i) == 'CHARSET') \
+                or (upper == 'CHARACTER' and _next_word(tokens, i) == 'SET'):
+            i = _skip_option(tokens, i)
+            continue
+        elif upper == 'ON' and _next_word(tokens, i) == 'UPDATE' and _next_word(tokens, i, 2) == 'CURRENT_TIMESTAMP':
+            i = _skip_words(tokens, i, 3)
+            continue
+        elif upper == 'UNSIGNED':
+            pass
+        elif upper == 'IGNORE' and out and _last_word(out) == 'INSERT':
+            out += [('word', 'OR'), ('ws', ' '), ('word', 'IGNORE')]
+        else:
+            out.append((kind, text))
+        i += 1
+    return out, None
+
+
+def _next_word(tokens, i, n=1):
+    for kind, text in tokens[i + 1:]:
+        if kind in ('ws', 'comment'):
+            continue
+        n -= 1
+        if n == 0:
+            return text.upper() if kind == 'word' else text
+    return None
+
+
+def _last_word(tokens):
+    for kind, text in reversed(tokens):
+        if kind not in ('ws', 'comment'):
+            return text.upper()
+    return None
+
+
+def _skip_words(tokens, i, count):
+    while i < len(tokens) and count:
+        if tokens[i][0] not in ('ws', 'comment'):
+            count -= 1
+        i += 1
+    return i
+
+
+def _skip_option(tokens, i):
+    """Skip `ENGINE=InnoDB`, `DEFAULT CHARSET=utf8mb4`, `COLLATE x`, `CHARACTER SET x`"""
+    j = i + 1
+    upper = tokens[i][1].upper()
+    if upper in ('DEFAULT', 'CHARACTER'):
+        j = _skip_words(tokens, i, 2)
+    while j < len(tokens) and tokens[j][0] in ('ws', 'comment'):
+        j += 1
+    if j < len(tokens) and tokens[j][1] == '=':
+        j += 1
+    return _skip_words(tokens, j, 1)
+
+
+# ---- planning ----
+
+def parameterize(tokens):
+    """(template, params) with the literals of a data statement replaced by placeholders"""
+    template = []
+    params = []
+    for kind, text in tokens:
+        if kind == 'string':
+            template.append('?')
+            params.append(text[1:-1].replace("''", "'"))
+        elif kind == 'number':
+            template.append('?')
+            params.append(float(text) if any(c in text for c in '.eE') else int(text))
+        elif kind in ('ws', 'comment'):
+            if template and template[-1] != ' ':
+                template.append(' ')
+        else:
+            template.append(text)
+    return ''.join(template).strip(), params
+
+
+def plan(sql, dialect='sqlite'):
+    """
+    Steps for a script: ('script', [sql, ...]) for schema statements and
+    ('many', template, [params, ...]) for runs of data statements that share
+    one shape. Also returns [(statement, reason)] for skipped statements.
+    """
+    steps = []
+    skipped = []
+    for tokens in split_statements(sql, dialect):
+        translated, reason = translate(tokens, dialect)
+        if translated is None:
+            skipped.append((render(tokens[tokens.index(_meaningful(tokens)[0]):]).splitlines()[0][:80], reason))
+            continue
+        words = [text.upper() for kind, text in translated if kind == 'word']
+        if words and words[0] in DATA_STATEMENTS:
+            template, params = parameterize(translated)
+            if steps and steps[-1][0] == 'many' and steps[-1][1] == template:
+                steps[-1][2].append(params)
+            else:
+                steps.append(('many', template, [params]))
+        else:
+            if not (steps and steps[-1][0] == 'script'):
+                steps.append(('script', []))
+            steps[-1][1].append(render(translated))
+    return steps, skipped
+
+
+class Migration:
+    """One versioned SQL script"""
+
+    def __init__(self, version, name, sql, dialect='sqlite', path=None):
+        self.version = str(version)
+        self.name = name
+        self.sql = sql
+        self.dialect = dialect
+        self.path = path
+        self.checksum = hashlib.sha1(sql.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def from_file(cls, path, version=None, name=None, dialect=None):
+        with open(path, 'r', encoding='utf-8') as f:
+            sql = f.read()
+        match = MIGRATION_FILE.match(os.path.basename(path))
+        if version is None:
+            if not match:
+                raise MigrationError(f"Cannot tell the version of {path}; name it NNNN_description.sql")
+            version = match.group(1)
+        if name is None:
+            name = match.group(2) if match else os.path.splitext(os.path.basename(path))[0]
+        if dialect is None:
+            dialect = 'mysql' if re.search(r'AUTO_INCREMENT|ENGINE\s*=|^\s*DELIMITER\s', sql, re.I | re.M) else 'sqlite'
+        return cls(version, name, sql, dialect, path)
+
+    def __repr__(self):
+        return f"<Migration {self.version} {self.name}>"
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Migrations named NNNN_description.sql in a directory, in version order"""
+    if not os.path.isdir(directory):
+        return []
+    migrations = [Migration.from_file(os.path.join(directory, name))
+                  for name in os.listdir(directory) if MIGRATION_FILE.match(name)]
+    return sorted(migrations, key=lambda m: int(m.version))
+
+
+# ---- applying ----
+
+def ensure_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            statements INTEGER,
+            duration_ms REAL
+        )
+    """)
+
+
+def applied(conn, create=True):
+    """{version: checksum} of migrations already recorded; with create=False a missing table means none"""
+    if create:
+        ensure_table(conn)
+    elif not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'").fetchone():
+        return {}
+    return dict(conn.execute("SELECT version, checksum FROM schema_migrations").fetchall())
+
+
+class BulkLoad:
+    """Context manager that relaxes durability while a migration batch loads"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.saved = {
+            'synchronous': self.conn.execute("PRAGMA synchronous").fetchone()[0],
+            'cache_size': self.conn.execute("PRAGMA cache_size").fetchone()[0],
+            'temp_store': self.conn.execute("PRAGMA temp_store").fetchone()[0],
+        }
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute("PRAGMA cache_size = -65536")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        return self
+
+    def __exit__(self, *exc):
+        for pragma, value in self.saved.items():
+            self.conn.execute(f"PRAGMA {pragma} = {value}")
+        return False
+
+
+def apply(conn, migration):
+    """Apply one migration in a single transaction; returns (statements run, skipped)"""
+    steps, skipped = plan(migration.sql, migration.dialect)
+    started = time.perf_counter()
+    count = 0
+    conn.execute("BEGIN")
+    try:
+        for step in steps:
+            if step[0] == 'script':
+                # executescript() commits any open transaction first, so run these one by one
+                for statement in step[1]:
+                    conn.execute(statement)
+                    count += 1
+            else:
+                conn.executemany(step[1], step[2])
+                count += len(step[2])
+        conn.execute(
+            "INSERT INTO schema_migrations (version, name, checksum, statements, duration_ms) VALUES (?, ?, ?, ?, ?)",
+            (migration.version, migration.name, migration.checksum, count,
+             round((time.perf_counter() - started) * 1000, 3))
+        )
+        conn.execute("COMMIT")
+    except sqlite3.Error as e:
+        conn.execute("ROLLBACK")
+        raise MigrationError(f"Migration {migration.version} ({migration.name}) failed: {e}")
+    return count, skipped
+
+
+def migrate(db_path, migrations, dry_run=False, report=print):
+    """
+    Apply every migration not yet recorded, in order. Safe to re-run:
+    applied versions are skipped (with a warning if their file changed since).
+    Returns the list of applied migrations.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    done = []
+    try:
+        already = applied(conn)
+        pending = []
+        for migration in migrations:
+            if migration.version in already:
+                if already[migration.version] != migration.checksum:
+                    report(f"⚠️  {migration.version} {migration.name} changed after it was applied; not re-running")
+                continue
+            pending.append(migration)
+        if dry_run:
+            for migration in pending:
+                steps, skipped = plan(migration.sql, migration.dialect)
+                report(f"📋 {migration.version} {migration.name}: {len(steps)} steps, {len(skipped)} skipped")
+            return pending
+
+        with BulkLoad(conn):
+            for migration in pending:
+                count, skipped = apply(conn, migration)
+                report(f"✅ {migration.version} {migration.name}: {count} statements")
+                for statement, reason in skipped:
+                    report(f"   ↷ skipped ({reason}): {statement}")
+                done.append(migration)
+        if done:
+            conn.execute("ANALYZE")
+            schema_cache.refresh(db_path, conn)
+            catalog_cache.sync_catalog(db_path)  # e.g. update_images.sql: only the rows it touched
+    finally:
+        conn.close()
+    return done
+
+
+def baseline(db_path, migrations, version):
+    """Record migrations up to version as applied without running them (for databases built before the runner)"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        already = applied(conn)
+        marked = [m for m in migrations if int(m.version) <= int(version) and m.version not in already]
+        conn.executemany(
+            "INSERT INTO schema_migrations (version, name, checksum, statements) VALUES (?, ?, ?, 0)",
+            [(m.version, m.name, m.checksum) for m in marked]
+        )
+    finally:
+        conn.close()
+    return marked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply versioned SQL migrations to a SQLite database")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database file")
+    parser.add_argument('--dir', default=MIGRATIONS_DIR, help="directory of NNNN_description.sql files")
+    parser.add_argument('--file', action='append', default=[], metavar='VERSION:PATH',
+                        help="extra migration file with an explicit version (repeatable)")
+    parser.add_argument('--dialect', choices=['mysql', 'sqlite'], help="override dialect detection")
+    parser.add_argument('--status', action='store_true', help="list applied and pending migrations")
+    parser.add_argument('--dry-run', action='store_true', help="show what would run without changing anything")
+    parser.add_argument('--baseline', metavar='VERSION', help="mark migrations up to VERSION as already applied")
+    args = parser.parse_args(argv)
+
+    try:
+        migrations = discover(args.dir)
+        for spec in args.file:
+            version, _, path = spec.partition(':')
+            if not path or not version.isdigit():
+                parser.error(f"--file expects VERSION:PATH, got {spec!r}")
+            migrations.append(Migration.from_file(path, version=version, dialect=args.dialect))
+        if args.dialect:
+            for migration in migrations:
+                migration.dialect = args.dialect
+        migrations.sort(key=lambda m: int(m.version))
+
+        if args.baseline:
+            marked = baseline(args.db, migrations, args.baseline)
+            print(f"✅ Marked {len(marked)} migrations as applied")
+        elif args.status:
+            # Read-only: a status query must not create the database or the bookkeeping table
+            already = {}
+            if os.path.exists(args.db):
+                conn = sqlite3.connect(args.db)
+                try:
+                    already = applied(conn, create=False)
+                finally:
+                    conn.close()
+            if not already:
+                print("📊 No migrations applied")
+            for migration in migrations:
+                state = 'applied' if migration.version in already else 'pending'
+                if state == 'applied' and already[migration.version] != migration.checksum:
+                    state = 'changed'
+                print(f"   {migration.version:>6} {migration.name:40} {state}")
+        else:
+            done = migrate(args.db, migrations, args.dry_run)
+            if not done:
+                print("✅ Database is up to date")
+    except (MigrationError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
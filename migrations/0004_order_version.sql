@@ -0,0 +1,3 @@
+-- Optimistic concurrency for cart edits: every edit of an order's items
+-- bumps its version, and clients may send the version they last saw.
+ALTER TABLE orders ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
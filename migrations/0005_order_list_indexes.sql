@@ -0,0 +1,11 @@
+-- Composite indexes for the keyset-paginated order list and the
+-- changed-since delta feed (order_queries.INDEXES). init_db.py and
+-- generate_data.py create them directly; this brings databases built
+-- by setup_database.py / migrate.py up to the same shape.
+CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_updated ON orders (updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders (status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_restaurant_created ON orders (restaurant_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_customer_created ON orders (customer_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_staff_created ON orders (delivery_staff_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id);
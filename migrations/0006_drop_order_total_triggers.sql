@@ -0,0 +1,7 @@
+-- Order totals are maintained by the write path: order_service prices the
+-- whole cart on create and applies the delta of each cart edit in the same
+-- UPDATE that bumps orders.version. The recompute triggers from
+-- backend/database.sql would overwrite that total mid-edit, so drop them.
+DROP TRIGGER IF EXISTS trg_order_items_after_insert;
+DROP TRIGGER IF EXISTS trg_order_items_after_update;
+DROP TRIGGER IF EXISTS trg_order_items_after_delete;
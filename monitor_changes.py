@@ -1,44 +1,457 @@
-import os, time, sys
-from pathlib import Path
+#!/usr/bin/env python3
+"""
+File change watcher for the Food Delivery System checkout
+Uses inotify on Linux and an incremental polling scan elsewhere; changes are
+debounced into batches and handed to registered callbacks
+"""
 
-root = Path('.').resolve()
-ignore_dirs = {'node_modules','.git','backend/venv','frontend/node_modules'}
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import fnmatch
+import os
+import select
+import struct
+import sys
+import threading
+import time
 
-def walk_files():
-    files = {}
-    for p in root.rglob('*'):
+import catalog_cache
+from db_pool import DB_PATH
+
+# Directory names skipped anywhere in the tree, plus paths relative to the root
+IGNORE_DIRS = {'node_modules', '.git', '__pycache__', '.pytest_cache', 'venv', '.venv',
+               'backend/venv', 'frontend/node_modules'}
+
+CREATED = 'CREATED'
+MODIFIED = 'MODIFIED'
+DELETED = 'DELETED'
+
+
+def _ignored(root, path, name, ignore):
+    if name in ignore:
+        return True
+    return os.path.relpath(path, root).replace(os.sep, '/') in ignore
+
+
+def coalesce(pending, path, kind):
+    """Fold a new event into the pending batch; returns nothing, updates pending in place"""
+    previous = pending.get(path)
+    if previous is None:
+        pending[path] = kind
+    elif previous == CREATED and kind == DELETED:
+        del pending[path]  # came and went inside one batch
+    elif previous == CREATED:
+        pass  # still new, whatever happened to it since
+    elif previous == DELETED and kind == CREATED:
+        pending[path] = MODIFIED  # replaced, e.g. an editor's atomic save
+    else:
+        pending[path] = kind
+
+
+class PollingBackend:
+    """
+    Periodic scan that never enters ignored directories. A directory is only
+    re-listed when its own mtime changed (an entry was added, removed or renamed);
+    otherwise its cached listing is reused and just the known files are stat'ed.
+    """
+
+    name = 'poll'
+
+    def __init__(self, root, ignore, interval=1.0):
+        self.root = root
+        self.ignore = ignore
+        self.interval = interval
+        self._dirs = {}  # dir path -> (mtime_ns, subdir paths, file paths)
+        self._files = {}  # file path -> (mtime_ns, size)
+        self._next = time.monotonic() + interval
+        self._scan(self.root, [])
+
+    def _stat_file(self, path, events):
+        try:
+            st = os.stat(path)
+        except OSError:
+            if self._files.pop(path, None) is not None:
+                events.append((path, DELETED))
+            return
+        signature = (st.st_mtime_ns, st.st_size)
+        previous = self._files.get(path)
+        if previous is None:
+            events.append((path, CREATED))
+        elif previous != signature:
+            events.append((path, MODIFIED))
+        self._files[path] = signature
+
+    def _forget_dir(self, path, events):
+        cached = self._dirs.pop(path, None)
+        if cached is None:
+            return
+        for subdir in cached[1]:
+            self._forget_dir(subdir, events)
+        for file_path in cached[2]:
+            if self._files.pop(file_path, None) is not None:
+                events.append((file_path, DELETED))
+
+    def _scan(self, path, events):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._forget_dir(path, events)
+            return
+        cached = self._dirs.get(path)
+        if cached is not None and cached[0] == mtime:
+            subdirs, files = cached[1], cached[2]
+        else:
+            subdirs = []
+            files = []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if is_dir:
+                            if not _ignored(self.root, entry.path, entry.name, self.ignore):
+                                subdirs.append(entry.path)
+                        else:
+                            files.append(entry.path)
+            except OSError:
+                self._forget_dir(path, events)
+                return
+            if cached is not None:
+                for gone in set(cached[1]) - set(subdirs):
+                    self._forget_dir(gone, events)
+                for gone in set(cached[2]) - set(files):
+                    if self._files.pop(gone, None) is not None:
+                        events.append((gone, DELETED))
+            self._dirs[path] = (mtime, subdirs, files)
+        for file_path in files:
+            self._stat_file(file_path, events)
+        for subdir in subdirs:
+            self._scan(subdir, events)
+
+    def poll(self, timeout):
+        """Events from the next scan, waiting at most timeout seconds for it to be due"""
+        wait = self._next - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(timeout, 0))
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        self._next = time.monotonic() + self.interval
+        events = []
+        self._scan(self.root, events)
+        return events
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """Kernel change notifications (Linux) with one watch per non-ignored directory"""
+
+    name = 'inotify'
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_EXCL_UNLINK = 0x04000000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                  | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_EXCL_UNLINK)
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, root, ignore):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        self.root = root
+        self.ignore = ignore
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths = {}  # watch descriptor -> directory path
+        self._watches = {}  # directory path -> watch descriptor
+        self._files = {}  # directory path -> names of the files in it, to report when it moves away
         try:
-            if any(part in ignore_dirs for part in p.parts):
+            self._watch_tree(root, None)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            if code in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return False  # vanished or unreadable, nothing to watch
+            raise OSError(code, f"inotify_add_watch failed for {path}: {os.strerror(code)}")
+        self._paths[wd] = path
+        self._watches[path] = wd
+        return True
+
+    def _watch_tree(self, top, events):
+        """Watch top and every non-ignored directory below; report existing files as CREATED if events is a list"""
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames
+                           if not _ignored(self.root, os.path.join(dirpath, d), d, self.ignore)]
+            if not self._add_watch(dirpath):
+                dirnames[:] = []
                 continue
-            if p.is_file():
-                files[str(p)] = p.stat().st_mtime
-        except Exception:
-            pass
-    return files
-
-print('Monitoring file changes in', root)
-initial = walk_files()
-start = time.time()
-duration = 20
-last = initial
-while time.time() - start < duration:
-    time.sleep(1)
-    current = walk_files()
-    changed = []
-    for f,m in current.items():
-        if f not in last:
-            changed.append((f,'CREATED'))
-        elif last[f] != m:
-            changed.append((f,'MODIFIED'))
-    for f in list(last.keys()):
-        if f not in current:
-            changed.append((f,'DELETED'))
-    if changed:
-        print(time.strftime('%H:%M:%S'), 'Changes detected:')
-        for f,s in changed:
-            print(' ', s, f)
-        print('---')
-    last = current
-
-print('Monitoring finished')
-sys.exit(0)
+            self._files[dirpath] = set(filenames)
+            if events is not None:
+                events.extend((os.path.join(dirpath, f), CREATED) for f in filenames)
+
+    def _drop_watch(self, wd):
+        path = self._paths.pop(wd, None)
+        if path is not None and self._watches.get(path) == wd:
+            del self._watches[path]
+            self._files.pop(path, None)
+
+    def _forget_tree(self, top, events):
+        """A directory left the tree: unwatch it and everything below, reporting the files that left with it"""
+        prefix = top + os.sep
+        for path in sorted(p for p in self._watches if p == top or p.startswith(prefix)):
+            events.extend((os.path.join(path, name), DELETED) for name in sorted(self._files.get(path, ())))
+            wd = self._watches[path]
+            self._libc.inotify_rm_watch(self._fd, wd)
+            self._drop_watch(wd)
+
+    def _rewatch(self):
+        """After a queue overflow the kernel lost events; start over from the tree as it is now"""
+        for wd in list(self._paths):
+            self._libc.inotify_rm_watch(self._fd, wd)
+        self._paths.clear()
+        self._watches.clear()
+        self._files.clear()
+        self._watch_tree(self.root, None)
+
+    def _read(self):
+        try:
+            return os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return b''
+
+    def poll(self, timeout):
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not readable:
+            return []
+        events = []
+        data = self._read()
+        while data:
+            offset = 0
+            while offset + self.EVENT_HEADER.size <= len(data):
+                wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                self._handle(wd, mask, name, events)
+            data = self._read()
+        return events
+
+    def _handle(self, wd, mask, name, events):
+        if mask & self.IN_Q_OVERFLOW:
+            print("⚠️  inotify queue overflowed; some changes were missed")
+            self._rewatch()
+            return
+        if mask & self.IN_IGNORED:
+            self._drop_watch(wd)
+            return
+        directory = self._paths.get(wd)
+        if directory is None or mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+            return
+        path = os.path.join(directory, name)
+        if mask & self.IN_ISDIR:
+            if _ignored(self.root, path, name, self.ignore):
+                return
+            if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                self._watch_tree(path, events)
+            elif mask & self.IN_MOVED_FROM:
+                self._forget_tree(path, events)  # its files left with it without events of their own
+            return
+        if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+            self._files.setdefault(directory, set()).add(name)
+            events.append((path, CREATED))
+        elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+            self._files.get(directory, set()).discard(name)
+            events.append((path, DELETED))
+        elif mask & (self.IN_MODIFY | self.IN_ATTRIB | self.IN_CLOSE_WRITE):
+            events.append((path, MODIFIED))
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def open_backend(root, ignore, backend='auto', interval=1.0):
+    """inotify where possible, otherwise (or when asked) polling"""
+    if backend in ('auto', 'inotify'):
+        try:
+            return InotifyBackend(root, ignore)
+        except (OSError, AttributeError) as e:
+            if backend == 'inotify':
+                raise
+            if sys.platform.startswith('linux'):
+                print(f"⚠️  inotify unavailable ({e}); falling back to polling")
+    return PollingBackend(root, ignore, interval)
+
+
+class Watcher:
+    """
+    Watches a tree and calls back with batches of (path, kind) changes.
+    A batch is delivered once no new event arrived for `debounce` seconds,
+    or after `max_delay` seconds of continuous activity.
+    """
+
+    def __init__(self, root='.', ignore=IGNORE_DIRS, backend='auto', debounce=0.2, max_delay=2.0, interval=1.0):
+        self.root = os.path.abspath(root)
+        self.ignore = set(ignore)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.backend = open_backend(self.root, self.ignore, backend, interval)
+        self._callbacks = []
+        self._stop = threading.Event()
+        self._thread = None
+        self.batches = 0
+        self.events = 0
+
+    def on_change(self, callback, patterns=None):
+        """
+        Register callback(changes) for batches touching files that match any of
+        the glob patterns (on the file name or root-relative path). Returns the callback.
+        """
+        self._callbacks.append((callback, tuple(patterns or ())))
+        return callback
+
+    def _matches(self, path, patterns):
+        if not patterns:
+            return True
+        relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+        name = os.path.basename(path)
+        return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(relative, p) for p in patterns)
+
+    def _dispatch(self, pending):
+        changes = sorted(pending.items())
+        self.batches += 1
+        for callback, patterns in self._callbacks:
+            selected = [change for change in changes if self._matches(change[0], patterns)]
+            if not selected:
+                continue
+            try:
+                callback(selected)
+            except Exception as e:
+                print(f"⚠️  Change callback {getattr(callback, '__name__', callback)} failed: {e}")
+
+    def run(self, duration=None):
+        """Watch until stop() is called or duration seconds (None = forever) have passed"""
+        ends = time.monotonic() + duration if duration is not None else None
+        pending = {}
+        first = last = None
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if ends is not None and now >= ends:
+                    break
+                timeout = 0.5
+                if pending:
+                    timeout = min(last + self.debounce, first + self.max_delay) - now
+                if ends is not None:
+                    timeout = min(timeout, ends - now)
+                events = self.backend.poll(max(timeout, 0))
+                now = time.monotonic()
+                if events:
+                    self.events += len(events)
+                    if not pending:
+                        first = now
+                    last = now
+                    for path, kind in events:
+                        coalesce(pending, path, kind)
+                if pending and (now - last >= self.debounce or now - first >= self.max_delay):
+                    self._dispatch(pending)
+                    pending = {}
+        finally:
+            if pending:
+                self._dispatch(pending)
+
+    def start(self, duration=None):
+        """Run in a daemon thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(duration,), name='file-watcher', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self.backend.close()
+
+
+def watch_catalog(watcher, db_path=DB_PATH):
+    """
+    Keep this process's catalog cache for db_path current while the watcher runs:
+    every batch that touches the database file re-syncs the cache, which
+    invalidates just the restaurants and menu items whose rows changed.
+    """
+    cache = catalog_cache.get_catalog(db_path)
+    cache.sync()  # baseline to compare the first change against
+    name = os.path.basename(db_path)
+
+    def catalog_changed(changes):
+        cache.sync()
+
+    return watcher.on_change(catalog_changed, [name, name + '-wal', name + '-journal'])
+
+
+def print_changes(changes):
+    print(time.strftime('%H:%M:%S'), 'Changes detected:')
+    for path, kind in changes:
+        print(' ', kind, path)
+    print('---')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch the project tree for file changes")
+    parser.add_argument('root', nargs='?', default='.', help="directory to watch")
+    parser.add_argument('--duration', type=float, help="seconds to watch (default: until interrupted)")
+    parser.add_argument('--backend', choices=['auto', 'inotify', 'poll'], default='auto')
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between polling scans")
+    parser.add_argument('--debounce', type=float, default=0.2, help="quiet seconds that end a batch")
+    parser.add_argument('--ignore', action='append', default=[], help="extra directory name or relative path to skip")
+    parser.add_argument('--pattern', action='append', help="only report files matching this glob (repeatable)")
+    args = parser.parse_args(argv)
+
+    watcher = Watcher(args.root, IGNORE_DIRS | set(args.ignore), args.backend, args.debounce, interval=args.interval)
+    watcher.on_change(print_changes, args.pattern)
+    print(f"Monitoring file changes in {watcher.root} ({watcher.backend.name})")
+    try:
+        watcher.run(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    print('Monitoring finished')
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Order list queries for the Food Delivery System
+Keyset pagination on (created_at, id), server-side filters and a changed-since delta feed
+"""
+
+import base64
+import json
+import re
+
+import archive
+import row_converter
+import schema_cache
+from api_errors import ValidationError
+from db_pool import DB_PATH, get_db
+from status_engine import FINAL_STATUSES
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+TIMESTAMP = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+# (index name, table, columns, required column) - created only where the column exists;
+# migrations/0005_order_list_indexes.sql creates the same set for migrated databases
+INDEXES = [
+    ('idx_orders_created', 'orders', 'created_at, id', None),
+    ('idx_orders_updated', 'orders', 'updated_at, id', None),
+    ('idx_orders_status_created', 'orders', 'status, created_at, id', None),
+    ('idx_orders_restaurant_created', 'orders', 'restaurant_id, created_at, id', None),
+    ('idx_orders_customer_created', 'orders', 'customer_id, created_at, id', 'customer_id'),
+    ('idx_orders_staff_created', 'orders', 'delivery_staff_id, created_at, id', 'delivery_staff_id'),
+    ('idx_order_items_order', 'order_items', 'order_id', None),
+]
+
+
+def ensure_indexes(conn, caps=None):
+    """Create the composite indexes the order list relies on"""
+    caps = caps or schema_cache.introspect(conn)
+    for name, table, columns, required in INDEXES:
+        if required and not caps.has_column(table, required):
+            continue
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+
+def encode_cursor(*key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(key, list) or len(key) != 2:
+            raise ValueError
+        if any(isinstance(value, bool) or not isinstance(value, (str, int, float)) for value in key):
+            raise ValueError  # well-formed JSON that SQLite could not bind
+        return key
+    except ValueError:
+        raise ValidationError('Invalid cursor')
+
+
+def _select(caps, table='orders'):
+    columns = [
+        'o.id', 'o.restaurant_id', 'o.total_price', 'o.status', 'o.created_at', 'o.updated_at',
+        'r.name as restaurant_name',
+    ]
+    joins = ['LEFT JOIN restaurants r ON o.restaurant_id = r.id']
+    if caps.orders_has_customer_id:
+        columns += [
+            'o.customer_id', 'o.delivery_staff_id',
+            "COALESCE(o.delivery_address, '') as delivery_address",
+            "COALESCE(o.payment_method, '') as payment_method",
+        ]
+        if caps.has_customers:
+            columns += ["COALESCE(c.name, 'Guest') as customer_name", "COALESCE(c.email, '') as customer_email"]
+            joins.append('LEFT JOIN customers c ON o.customer_id = c.id')
+        if caps.has_delivery_staff:
+            columns.append("COALESCE(ds.name, '') as delivery_staff_name")
+            joins.append('LEFT JOIN delivery_staff ds ON o.delivery_staff_id = ds.id')
+    return f"SELECT {', '.join(columns)} FROM {table} o {' '.join(joins)}"
+
+
+def _filters(caps, filters):
+    where = []
+    params = []
+    statuses = filters.get('status')
+    if statuses:
+        if isinstance(statuses, str):
+            statuses = statuses.split(',')
+        where.append(f"o.status IN ({', '.join('?' * len(statuses))})")
+        params += statuses
+    for key, column in (('restaurant_id', 'restaurant_id'), ('customer_id', 'customer_id'),
+                        ('delivery_staff_id', 'delivery_staff_id')):
+        if filters.get(key) is not None:
+            if not caps.has_column('orders', column):
+                raise ValidationError(f"Filter {key} is not supported by this database")
+            where.append(f"o.{column} = ?")
+            params.append(filters[key])
+    if filters.get('created_from'):
+        where.append("o.created_at >= ?")
+        params.append(filters['created_from'])
+    if filters.get('created_to'):
+        where.append("o.created_at < ?")
+        params.append(filters['created_to'])
+    return where, params
+
+
+def _attach_items(cursor, orders, items_table='order_items'):
+    """Add the 'items' summary for one page of orders with a single query"""
+    if not orders:
+        return
+    ids = [order['id'] for order in orders]
+    cursor.execute(f"""
+        SELECT oi.order_id, mi.name, oi.quantity
+        FROM {items_table} oi
+        LEFT JOIN menu_items mi ON oi.menu_item_id = mi.id
+        WHERE oi.order_id IN ({', '.join('?' * len(ids))})
+        ORDER BY oi.order_id, oi.id
+    """, ids)
+    summaries = {}
+    for order_id, name, quantity in cursor.fetchall():
+        summaries.setdefault(order_id, []).append(f"{name} x{quantity}")
+    for order in orders:
+        parts = summaries.get(order['id'])
+        order['items'] = ', '.join(parts) if parts else None
+
+
+def _clamp(limit):
+    try:
+        limit = int(limit or DEFAULT_LIMIT)
+    except (TypeError, ValueError):
+        raise ValidationError('Invalid limit')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _archived_pages(db_cursor, caps, filters, key, where, params, orders, limit):
+    """
+    Archived orders that belong on this page, as [(items table, orders)].
+    Partitions are only read when the page reaches back into their time
+    range and the status filter allows completed orders.
+    """
+    statuses = filters.get('status')
+    if isinstance(statuses, str):
+        statuses = statuses.split(',')
+    if statuses and not set(statuses) & set(FINAL_STATUSES):
+        return []
+    # a full hot page only needs archived orders newer than its overflow row
+    lower = orders[limit]['created_at'] if len(orders) > limit else filters.get('created_from')
+    upper = filters.get('created_to')
+    pages = []
+    found = 0
+    for month in archive.months_between(db_cursor, lower, upper):
+        if key and month['min_created'] > key[0]:
+            continue
+        sql = _select(caps, month['orders_table'])
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY o.created_at DESC, o.id DESC LIMIT ?"
+        db_cursor.execute(sql, params + [limit + 1])
+        rows = row_converter.fetch_dicts(db_cursor)
+        if rows:
+            pages.append((month['items_table'], rows))
+            found += len(rows)
+        if found > limit:
+            break  # older partitions cannot reach this page
+    return pages
+
+
+def list_orders(filters=None, cursor=None, limit=DEFAULT_LIMIT, db_path=DB_PATH):
+    """
+    Newest-first page of orders, including archived ones when the page
+    reaches back that far. Pass the returned next_cursor to get the next page.
+    filters: status (list or comma string), restaurant_id, customer_id,
+    delivery_staff_id, created_from, created_to
+    """
+    caps = schema_cache.get_capabilities(db_path)
+    limit = _clamp(limit)
+    filters = filters or {}
+    where, params = _filters(caps, filters)
+    key = None
+    if cursor:
+        key = decode_cursor(cursor)
+        where.append("(o.created_at, o.id) < (?, ?)")
+        params += key
+    sql = _select(caps)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY o.created_at DESC, o.id DESC LIMIT ?"
+
+    conn = get_db(db_path)
+    try:
+        db_cursor = conn.cursor()
+        db_cursor.execute(sql, params + [limit + 1])
+        orders = row_converter.fetch_dicts(db_cursor)
+        archived = _archived_pages(db_cursor, caps, filters, key, where, params, orders, limit)
+        if archived:
+            sources = {}
+            for items_table, rows in archived:
+                sources.update((row['id'], items_table) for row in rows)
+                orders += rows
+            orders.sort(key=lambda order: (order['created_at'], order['id']), reverse=True)
+        has_more = len(orders) > limit
+        orders = orders[:limit]
+        if archived:
+            by_table = {}
+            for order in orders:
+                by_table.setdefault(sources.get(order['id'], 'order_items'), []).append(order)
+            for items_table, group in by_table.items():
+                _attach_items(db_cursor, group, items_table)
+        else:
+            _attach_items(db_cursor, orders)
+    finally:
+        conn.close()
+    last = orders[-1] if orders else None
+    return {
+        'orders': orders,
+        'next_cursor': encode_cursor(last['created_at'], last['id']) if has_more else None,
+    }
+
+
+def changed_orders(since, filters=None, limit=DEFAULT_LIMIT, db_path=DB_PATH):
+    """
+    Live orders whose updated_at moved past `since`, oldest change first
+    (archived orders are final and never change).
+    `since` is a timestamp for the first call, then the returned next_since token.
+    Once caught up the token overlaps the last timestamp, so clients merge by id.
+    """
+    caps = schema_cache.get_capabilities(db_path)
+    limit = _clamp(limit)
+    where, params = _filters(caps, filters or {})
+    if since and TIMESTAMP.match(since):
+        where.append("o.updated_at >= ?")
+        params.append(since)
+    elif since:
+        updated_at, order_id = decode_cursor(since)
+        where.append("(o.updated_at, o.id) > (?, ?)")
+        params += [updated_at, order_id]
+    sql = _select(caps)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY o.updated_at, o.id LIMIT ?"
+
+    conn = get_db(db_path)
+    try:
+        db_cursor = conn.cursor()
+        db_cursor.execute(sql, params + [limit + 1])
+        orders = row_converter.fetch_dicts(db_cursor)
+        has_more = len(orders) > limit
+        orders = orders[:limit]
+        _attach_items(db_cursor, orders)
+    finally:
+        conn.close()
+
+    if has_more:
+        next_since = encode_cursor(orders[-1]['updated_at'], orders[-1]['id'])
+    elif orders:
+        next_since = encode_cursor(orders[-1]['updated_at'], 0)
+    else:
+        next_since = since
+    return {'orders': orders, 'next_since': next_since, 'has_more': has_more}
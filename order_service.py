@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Order write path for the Food Delivery System
+Prices a whole cart with one query and inserts all of its lines at once
+"""
+
+from datetime import datetime
+
+import event_hub
+import schema_cache
+import status_engine
+from api_errors import ApiError, ValidationError
+from db_pool import DB_PATH, get_db
+from dispatcher import get_dispatcher
+
+
+class OrderError(ApiError):
+    """Order rejected; status is the HTTP code the API should answer with"""
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _placeholders(count):
+    return ', '.join('?' * count)
+
+
+def parse_id(value, name):
+    """Ids arrive as JSON numbers or numeric strings; anything else is a 400"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    raise OrderError(f"Invalid {name}: expected an integer", 400)
+
+
+def parse_order(data):
+    """Check one order body's shape and turn its customer, restaurant and menu item ids into ints"""
+    if not isinstance(data, dict):
+        raise ValidationError('Each order must be a JSON object')
+    items = data.get('items')
+    if items is not None and not isinstance(items, list):
+        raise ValidationError('items must be a list')
+    if any(not isinstance(item, dict) for item in items or []):
+        raise ValidationError('Each item must be a JSON object')
+    data = dict(data, customer_id=parse_id(data.get('customer_id', 1), 'customer_id'))
+    if data.get('restaurant_id') is not None:
+        data['restaurant_id'] = parse_id(data['restaurant_id'], 'restaurant_id')
+    if items:
+        data['items'] = [dict(item, menu_item_id=parse_id(item.get('menu_item_id'), 'menu_item_id'))
+                         for item in items]
+    return data
+
+
+def fetch_prices(cursor, menu_item_ids):
+    """Look up price and restaurant for many menu items in a single query"""
+    ids = list(set(menu_item_ids))
+    if not ids:
+        return {}
+    cursor.execute(
+        f"SELECT id, price, restaurant_id FROM menu_items WHERE id IN ({_placeholders(len(ids))})",
+        ids
+    )
+    return {row[0]: (float(row[1]), row[2]) for row in cursor.fetchall()}
+
+
+def price_cart(restaurant_id, items, prices):
+    """Validate cart lines against fetched prices and return (total, lines)"""
+    if not restaurant_id or not items:
+        raise OrderError('Missing required fields', 400)
+    total = 0
+    lines = []
+    for item in items:
+        menu_item_id = item.get('menu_item_id')
+        quantity = item.get('quantity', 1)
+        if menu_item_id not in prices:
+            raise OrderError(f"Menu item {menu_item_id} not found", 404)
+        price, item_restaurant_id = prices[menu_item_id]
+        if item_restaurant_id != restaurant_id:
+            raise OrderError(f"Menu item {menu_item_id} does not belong to restaurant {restaurant_id}", 400)
+        if not isinstance(quantity, int) or quantity < 1:
+            raise OrderError(f"Invalid quantity for menu item {menu_item_id}", 400)
+        total += price * quantity
+        lines.append((menu_item_id, quantity, price))
+    return round(total, 2), lines
+
+
+def _missing_customers(cursor, customer_ids):
+    ids = list(set(customer_ids))
+    if not ids:
+        return set()
+    cursor.execute(f"SELECT id FROM customers WHERE id IN ({_placeholders(len(ids))})", ids)
+    return set(ids) - {row[0] for row in cursor.fetchall()}
+
+
+def _insert_orders(cursor, caps, orders, dispatcher, riders):
+    """
+    Insert priced orders and all of their items; orders are (data, total, lines).
+    Riders for the whole batch are claimed at once and recorded in `riders`.
+    """
+    created = []
+    item_rows = []
+    now = _now()
+    assignable = caps.orders_has_customer_id and caps.has_delivery_staff
+    if assignable:
+        riders += dispatcher.claim_many(cursor, len(orders))
+    free_riders = iter(list(riders))
+    for data, total, lines in orders:
+        customer_id = data['customer_id']
+        delivery_staff_id = None
+        status = 'Pending'
+        if caps.orders_has_customer_id:
+            if assignable:
+                delivery_staff_id = next(free_riders, None)
+                if delivery_staff_id:
+                    status = 'Out for Delivery'
+            cursor.execute("""
+                INSERT INTO orders (customer_id, restaurant_id, delivery_staff_id, total_price, status,
+                                    delivery_address, payment_method, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (customer_id, data['restaurant_id'], delivery_staff_id, total, status,
+                  data.get('delivery_address', ''), data.get('payment_method', 'Cash'), now, now))
+        else:
+            cursor.execute("""
+                INSERT INTO orders (restaurant_id, total_price, status, created_at, updated_at)
+                VALUES (?, ?, 'Pending', ?, ?)
+            """, (data['restaurant_id'], total, now, now))
+        order_id = cursor.lastrowid
+        item_rows.extend((order_id, menu_item_id, quantity, price) for menu_item_id, quantity, price in lines)
+        created.append({
+            'id': order_id,
+            'customer_id': customer_id,
+            'restaurant_id': data['restaurant_id'],
+            'delivery_staff_id': delivery_staff_id,
+            'total_price': total,
+            'status': status,
+            'created_at': now,
+        })
+    cursor.executemany("""
+        INSERT INTO order_items (order_id, menu_item_id, quantity, price)
+        VALUES (?, ?, ?, ?)
+    """, item_rows)
+    return created
+
+
+def create_order(data, db_path=DB_PATH):
+    """Create one order from a request body; raises OrderError on bad input"""
+    return create_orders([data], db_path=db_path, atomic=True)[0]
+
+
+def create_orders(orders, db_path=DB_PATH, atomic=False):
+    """
+    Create many orders in one transaction with one price lookup for all carts.
+    Returns one result per input: the created order, or {'error', 'status'}
+    for rejected entries. With atomic=True the first rejection raises instead.
+    """
+    caps = schema_cache.get_capabilities(db_path)
+    dispatcher = get_dispatcher(db_path)
+    riders = []
+    conn = get_db(db_path)
+    try:
+        cursor = conn.cursor()
+        results = [None] * len(orders)
+
+        def reject(index, error):
+            if atomic:
+                raise error
+            results[index] = {'index': index, 'error': error.message, 'status': error.status}
+
+        parsed = []
+        for index, data in enumerate(orders):
+            try:
+                parsed.append((index, parse_order(data)))
+            except ApiError as e:
+                reject(index, e)
+        all_ids = [item['menu_item_id'] for _, data in parsed for item in (data.get('items') or [])]
+        prices = fetch_prices(cursor, all_ids)
+        missing_customers = set()
+        if caps.has_customers:
+            missing_customers = _missing_customers(cursor, [data['customer_id'] for _, data in parsed])
+
+        valid = []
+        for index, data in parsed:
+            try:
+                if data['customer_id'] in missing_customers:
+                    raise OrderError(f"Customer {data['customer_id']} not found", 404)
+                total, lines = price_cart(data.get('restaurant_id'), data.get('items'), prices)
+            except OrderError as e:
+                reject(index, e)
+                continue
+            valid.append((index, (data, total, lines)))
+
+        if valid:
+            created = _insert_orders(cursor, caps, [entry for _, entry in valid], dispatcher, riders)
+            for (index, _), order in zip(valid, created):
+                results[index] = order
+        conn.commit()
+        for order in results:
+            if 'id' in order:
+                status_engine.order_changed(order['id'], order['created_at'], order['status'], db_path)
+                event_hub.order_created(order, db_path)
+        return results
+    except Exception:
+        conn.rollback()
+        dispatcher.unclaim(riders)
+        raise
+    finally:
+        conn.close()
+
+
+def update_order(order_id, status, db_path=DB_PATH):
+    """Set an order's status, assigning or releasing delivery staff as needed"""
+    if not status:
+        raise OrderError('Status is required', 400)
+    caps = schema_cache.get_capabilities(db_path)
+    dispatcher = get_dispatcher(db_path)
+    claimed = []
+    conn = get_db(db_path)
+    try:
+        cursor = conn.cursor()
+        staff_column = 'delivery_staff_id' if caps.has_column('orders', 'delivery_staff_id') else 'NULL'
+        cursor.execute(f"SELECT created_at, restaurant_id, status, {staff_column} FROM orders WHERE id = ?",
+                       (order_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise OrderError('Order not found', 404)
+        created_at, restaurant_id, previous, delivery_staff_id = row
+        cursor.execute("UPDATE orders SET status = ?, updated_at = ? WHERE id = ?", (status, _now(), order_id))
+
+        if caps.has_delivery_staff:
+            if status == 'Out for Delivery' and not delivery_staff_id:
+                claimed = dispatcher.claim_many(cursor, 1)
+                delivery_staff_id = claimed[0] if claimed else None
+                if delivery_staff_id:
+                    cursor.execute("UPDATE orders SET delivery_staff_id = ? WHERE id = ?", (delivery_staff_id, order_id))
+            elif status == 'Delivered' and delivery_staff_id:
+                dispatcher.release(cursor, [delivery_staff_id])
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        dispatcher.unclaim(claimed)
+        raise
+    finally:
+        conn.close()
+    status_engine.order_changed(order_id, created_at, status, db_path)
+    hub = event_hub.get_hub(db_path)
+    hub.publish(event_hub.STATUS_CHANGED, order_id, restaurant_id, status=status, previous=previous,
+                delivery_staff_id=delivery_staff_id)
+    if claimed and delivery_staff_id:
+        hub.publish(event_hub.STAFF_ASSIGNED, order_id, restaurant_id, delivery_staff_id=delivery_staff_id,
+                    status=status)
+    return {'id': order_id, 'status': status, 'delivery_staff_id': delivery_staff_id}
+
+
+def delete_order(order_id, db_path=DB_PATH):
+    """Delete an order and its items, freeing a rider still out with it"""
+    caps = schema_cache.get_capabilities(db_path)
+    dispatcher = get_dispatcher(db_path)
+    conn = get_db(db_path)
+    try:
+        cursor = conn.cursor()
+        staff_column = 'delivery_staff_id' if caps.has_column('orders', 'delivery_staff_id') else 'NULL'
+        cursor.execute(f"SELECT restaurant_id, status, {staff_column} FROM orders WHERE id = ?", (order_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise OrderError('Order not found', 404)
+        restaurant_id, status, delivery_staff_id = row
+        cursor.execute("DELETE FROM order_items WHERE order_id = ?", (order_id,))
+        cursor.execute("DELETE FROM orders WHERE id = ?", (order_id,))
+        if caps.has_delivery_staff and delivery_staff_id and status not in status_engine.FINAL_STATUSES:
+            dispatcher.release(cursor, [delivery_staff_id])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    status_engine.order_removed(order_id, db_path)
+    event_hub.get_hub(db_path).publish(event_hub.ORDER_DELETED, order_id, restaurant_id, status=status)
+    return {'id': order_id, 'status': status, 'delivery_staff_id': delivery_staff_id}
+
+
+EDIT_RETRIES = 3  # re-reads after losing a version race, when the client sent no version
+
+
+def _quantity(value, minimum=1):
+    if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+        raise OrderError('Invalid quantity', 400)
+    return value
+
+
+def _plan_edits(order_id, restaurant_id, lines, edits, prices):
+    """
+    Apply edits to the order's lines in memory.
+    lines is {line id: [menu_item_id, quantity, price]} as read from the database;
+    an order may hold several lines for one menu item, and edits by menu_item_id
+    act on the oldest remaining one.
+    Returns (deleted ids, {line id: quantity}, [insert rows], total delta).
+    """
+    by_menu_item = {}  # menu_item_id -> live line ids, oldest first
+    for line_id in sorted(lines):
+        by_menu_item.setdefault(lines[line_id][0], []).append(line_id)
+    original = {line_id: line[1] * line[2] for line_id, line in lines.items()}
+    deleted = set()
+    changed = {}
+    inserts = {}  # menu_item_id -> [quantity, price] for lines that do not exist yet
+
+    def priced(menu_item_id):
+        if menu_item_id not in prices:
+            raise OrderError('Menu item not found', 404)
+        price, item_restaurant_id = prices[menu_item_id]
+        if item_restaurant_id != restaurant_id:
+            raise OrderError(f"Menu item {menu_item_id} does not belong to restaurant {restaurant_id}", 400)
+        return price
+
+    def line_for(edit):
+        item_id = edit.get('item_id')
+        if item_id is not None:
+            if item_id not in lines or item_id in deleted:
+                raise OrderError('Order item not found', 404)
+            return item_id
+        menu_item_id = edit.get('menu_item_id')
+        if not menu_item_id:
+            raise OrderError('Menu item ID or item ID is required', 400)
+        line_ids = by_menu_item.get(menu_item_id)
+        return line_ids[0] if line_ids else None
+
+    def set_quantity(line_id, menu_item_id, quantity):
+        if line_id is not None:
+            if quantity == 0:
+                deleted.add(line_id)
+                changed.pop(line_id, None)
+                by_menu_item[lines[line_id][0]].remove(line_id)
+            else:
+                changed[line_id] = lines[line_id][1] = quantity
+        elif quantity == 0:
+            inserts.pop(menu_item_id, None)
+        else:
+            inserts.setdefault(menu_item_id, [0, priced(menu_item_id)])[0] = quantity
+
+    for edit in edits:
+        op = edit.get('op', 'add')
+        if op == 'add':
+            quantity = _quantity(edit.get('quantity', 1))
+            line_id = line_for(edit)
+            menu_item_id = edit.get('menu_item_id') if line_id is None else lines[line_id][0]
+            current = lines[line_id][1] if line_id is not None else inserts.get(menu_item_id, [0])[0]
+            set_quantity(line_id, menu_item_id, current + quantity)
+        elif op == 'set':
+            line_id = line_for(edit)
+            set_quantity(line_id, edit.get('menu_item_id'), _quantity(edit.get('quantity'), minimum=0))
+        elif op == 'remove':
+            line_id = line_for(edit)
+            if line_id is None:
+                raise OrderError('Order item not found', 404)
+            set_quantity(line_id, None, 0)
+        else:
+            raise OrderError(f"Unknown edit op '{op}'", 400)
+
+    delta = -sum(original[line_id] for line_id in deleted)
+    delta += sum(quantity * lines[line_id][2] - original[line_id] for line_id, quantity in changed.items())
+    insert_rows = [(order_id, menu_item_id, quantity, price) for menu_item_id, (quantity, price) in inserts.items()]
+    delta += sum(quantity * price for _, _, quantity, price in insert_rows)
+    return deleted, changed, insert_rows, delta
+
+
+def edit_order_items(order_id, edits, version=None, db_path=DB_PATH):
+    """
+    Apply a batch of cart edits in one transaction and adjust the order total
+    by the delta in the same UPDATE that bumps the order's version.
+
+    edits are {'op': 'add', 'menu_item_id', 'quantity'},
+    {'op': 'set', 'item_id' or 'menu_item_id', 'quantity'} (0 removes) and
+    {'op': 'remove', 'item_id'}. With `version` the edit only applies to that
+    version of the order (409 otherwise); without it, a lost race is retried.
+    """
+    if not isinstance(edits, list) or not edits:
+        raise OrderError('Expected a non-empty list of edits', 400)
+    if any(not isinstance(edit, dict) for edit in edits):
+        raise OrderError('Each edit must be an object', 400)
+    edits = [dict(edit, **{key: parse_id(edit[key], key) for key in ('item_id', 'menu_item_id')
+                           if edit.get(key) is not None}) for edit in edits]
+    versioned = schema_cache.get_capabilities(db_path).has_column('orders', 'version')
+    menu_item_ids = [edit['menu_item_id'] for edit in edits if edit.get('menu_item_id')]
+    conn = get_db(db_path)
+    try:
+        cursor = conn.cursor()
+        for attempt in range(EDIT_RETRIES):
+            columns = 'restaurant_id, version' if versioned else 'restaurant_id, NULL'
+            cursor.execute(f"SELECT {columns} FROM orders WHERE id = ?", (order_id,))
+            order = cursor.fetchone()
+            if not order:
+                raise OrderError('Order not found', 404)
+            restaurant_id, current = order
+            if versioned and version is not None and version != current:
+                raise OrderError(f"Order was modified (version {current}, expected {version})", 409)
+            prices = fetch_prices(cursor, menu_item_ids)
+            cursor.execute("SELECT id, menu_item_id, quantity, price FROM order_items WHERE order_id = ?",
+                           (order_id,))
+            lines = {row[0]: [row[1], row[2], float(row[3] or 0)] for row in cursor.fetchall()}
+            deleted, changed, inserts, delta = _plan_edits(order_id, restaurant_id, lines, edits, prices)
+
+            if versioned:
+                cursor.execute("""
+                    UPDATE orders SET total_price = ROUND(total_price + ?, 2), version = version + 1, updated_at = ?
+                    WHERE id = ? AND version = ?
+                    RETURNING total_price
+                """, (delta, _now(), order_id, current))
+            else:
+                cursor.execute("""
+                    UPDATE orders SET total_price = ROUND(total_price + ?, 2), updated_at = ?
+                    WHERE id = ?
+                    RETURNING total_price
+                """, (delta, _now(), order_id))
+            updated = cursor.fetchone()
+            if updated:
+                break
+            conn.rollback()  # another edit committed in between
+            if version is not None:
+                raise OrderError('Order was modified concurrently', 409)
+        else:
+            raise OrderError('Order is being modified concurrently; try again', 409)
+
+        if deleted:
+            cursor.executemany("DELETE FROM order_items WHERE id = ?", [(line_id,) for line_id in deleted])
+        if changed:
+            cursor.executemany("UPDATE order_items SET quantity = ? WHERE id = ?",
+                               [(quantity, line_id) for line_id, quantity in changed.items()])
+        if inserts:
+            cursor.executemany("""
+                INSERT INTO order_items (order_id, menu_item_id, quantity, price)
+                VALUES (?, ?, ?, ?)
+            """, inserts)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return {'id': order_id, 'new_total': float(updated[0]), 'version': current + 1 if versioned else None}
+
+
+def add_order_item(order_id, menu_item_id, quantity=1, version=None, db_path=DB_PATH):
+    """Add a menu item to an order (or raise its quantity); returns the new total"""
+    if not menu_item_id:
+        raise OrderError('Menu item ID is required', 400)
+    return edit_order_items(order_id, [{'op': 'add', 'menu_item_id': menu_item_id, 'quantity': quantity}],
+                            version, db_path)
+
+
+def remove_order_item(order_id, item_id, version=None, db_path=DB_PATH):
+    """Remove one line from an order; returns the new total"""
+    return edit_order_items(order_id, [{'op': 'remove', 'item_id': item_id}], version, db_path)
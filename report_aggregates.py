@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Materialized report aggregates for the Food Delivery System
+Triggers keep per-restaurant, per-status and per-hour order counters current,
+so report queries read a handful of rows instead of scanning every order
+"""
+
+import argparse
+import sys
+
+from db_pool import DB_PATH, get_db
+
+# table -> (key column, key type, SQL expression for the key given an orders row alias)
+AGGREGATES = {
+    'order_stats_restaurant': ('restaurant_id', 'INTEGER', '{row}.restaurant_id'),
+    'order_stats_status': ('status', 'TEXT', "COALESCE({row}.status, 'Pending')"),
+    'order_stats_hourly': ('hour', 'TEXT', "COALESCE(strftime('%Y-%m-%d %H:00', {row}.created_at), '')"),
+}
+
+TRACKED_COLUMNS = ('restaurant_id', 'status', 'total_price', 'created_at')
+HISTORY_TABLES = 'orders_history_%'  # monthly partitions written by archive.py
+
+
+def _add_sql(table, key, expr):
+    return f"""
+        INSERT INTO {table} ({key}, order_count, revenue) VALUES ({expr.format(row='NEW')}, 1, COALESCE(NEW.total_price, 0))
+        ON CONFLICT({key}) DO UPDATE SET order_count = order_count + 1, revenue = revenue + excluded.revenue;"""
+
+
+def _remove_sql(table, key, expr):
+    return f"""
+        UPDATE {table} SET order_count = order_count - 1, revenue = revenue - COALESCE(OLD.total_price, 0)
+        WHERE {key} = {expr.format(row='OLD')};"""
+
+
+def schema_statements():
+    """CREATE statements for the aggregate tables and the triggers that maintain them"""
+    statements = []
+    adds = []
+    removes = []
+    for table, (key, key_type, expr) in AGGREGATES.items():
+        statements.append(f"""CREATE TABLE IF NOT EXISTS {table} (
+            {key} {key_type} PRIMARY KEY,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0
+        )""")
+        adds.append(_add_sql(table, key, expr))
+        removes.append(_remove_sql(table, key, expr))
+
+    changed = ' OR '.join(f"OLD.{column} IS NOT NEW.{column}" for column in TRACKED_COLUMNS)
+    statements += [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_order_stats_insert AFTER INSERT ON orders
+        BEGIN{''.join(adds)}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_order_stats_delete AFTER DELETE ON orders
+        BEGIN{''.join(removes)}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_order_stats_update
+        AFTER UPDATE OF {', '.join(TRACKED_COLUMNS)} ON orders
+        WHEN {changed}
+        BEGIN{''.join(removes)}{''.join(adds)}
+        END""",
+    ]
+    return statements
+
+
+def order_source(cursor):
+    """FROM target covering live orders plus any archived history partitions"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ORDER BY name",
+                   (HISTORY_TABLES,))
+    tables = ['orders'] + [row[0] for row in cursor.fetchall()]
+    if len(tables) == 1:
+        return 'orders'
+    columns = ', '.join(TRACKED_COLUMNS)
+    return '(' + ' UNION ALL '.join(f"SELECT {columns} FROM {table}" for table in tables) + ')'
+
+
+def add_rows(cursor, source, where, params=()):
+    """Count rows of another orders-shaped table (e.g. an archive partition) into the aggregates"""
+    for table, (key, _, expr) in AGGREGATES.items():
+        cursor.execute(f"""
+            INSERT INTO {table} ({key}, order_count, revenue)
+            SELECT {expr.format(row='o')}, COUNT(*), COALESCE(SUM(o.total_price), 0)
+            FROM {source} o
+            WHERE {where}
+            GROUP BY 1
+            ON CONFLICT({key}) DO UPDATE SET order_count = order_count + excluded.order_count,
+                                             revenue = revenue + excluded.revenue
+        """, params)
+
+
+def rebuild(conn):
+    """Recompute every aggregate from the orders table and its archive (full reconcile)"""
+    cursor = conn.cursor()
+    source = order_source(cursor)
+    for table, (key, _, expr) in AGGREGATES.items():
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"""
+            INSERT INTO {table} ({key}, order_count, revenue)
+            SELECT {expr.format(row='o')}, COUNT(*), COALESCE(SUM(o.total_price), 0)
+            FROM {source} o
+            GROUP BY 1
+        """)
+
+
+def install(conn):
+    """Create aggregate tables and triggers, then fill them from existing orders"""
+    cursor = conn.cursor()
+    for statement in schema_statements():
+        cursor.execute(statement)
+    rebuild(conn)
+
+
+def drift(conn):
+    """Rows where the maintained aggregates disagree with a fresh scan"""
+    cursor = conn.cursor()
+    source = order_source(cursor)
+    problems = []
+    for table, (key, _, expr) in AGGREGATES.items():
+        cursor.execute(f"""
+            WITH fresh AS (
+                SELECT {expr.format(row='o')} AS k, COUNT(*) AS order_count, COALESCE(SUM(o.total_price), 0) AS revenue
+                FROM {source} o GROUP BY 1
+            ),
+            kept AS (SELECT {key} AS k, order_count, revenue FROM {table} WHERE order_count != 0)
+            SELECT k, kept.order_count, fresh.order_count FROM kept LEFT JOIN fresh USING (k)
+            WHERE fresh.k IS NULL OR kept.order_count != fresh.order_count OR ABS(kept.revenue - fresh.revenue) > 0.005
+            UNION ALL
+            SELECT k, NULL, fresh.order_count FROM fresh LEFT JOIN kept USING (k) WHERE kept.k IS NULL
+        """)
+        problems += [(table,) + tuple(row) for row in cursor.fetchall()]
+    return problems
+
+
+# ---- report reads ----
+
+def summary(conn):
+    """Order count, revenue and average order value from the status counters"""
+    row = conn.execute("SELECT SUM(order_count), SUM(revenue) FROM order_stats_status").fetchone()
+    total_orders = row[0] or 0
+    total_revenue = round(row[1] or 0, 2)
+    return {
+        'total_orders': total_orders,
+        'total_revenue': total_revenue,
+        'avg_order_value': round(total_revenue / total_orders, 2) if total_orders else 0.0,
+    }
+
+
+def orders_by_status(conn):
+    cursor = conn.execute("""
+        SELECT status, order_count FROM order_stats_status
+        WHERE order_count > 0
+        ORDER BY order_count DESC
+    """)
+    return [{'status': status, 'count': count} for status, count in cursor.fetchall()]
+
+
+def restaurant_revenue(conn):
+    cursor = conn.execute("""
+        SELECT r.id, r.name, r.cuisine, COALESCE(s.order_count, 0), s.revenue
+        FROM restaurants r
+        LEFT JOIN order_stats_restaurant s ON s.restaurant_id = r.id
+        ORDER BY s.revenue DESC
+    """)
+    return [{
+        'id': restaurant_id,
+        'restaurant_name': name,
+        'cuisine': cuisine,
+        'order_count': count,
+        'total_revenue': round(revenue, 2) if count else None,
+        'avg_order_value': round(revenue / count, 2) if count else None,
+    } for restaurant_id, name, cuisine, count, revenue in cursor.fetchall()]
+
+
+def hourly(conn, since=None, until=None):
+    """Per-hour order counts and revenue; since/until are 'YYYY-MM-DD HH:00' bounds"""
+    cursor = conn.execute("""
+        SELECT hour, order_count, revenue FROM order_stats_hourly
+        WHERE order_count > 0 AND hour >= COALESCE(?, '') AND hour < COALESCE(?, '9999')
+        ORDER BY hour
+    """, (since, until))
+    return [{'hour': hour, 'order_count': count, 'revenue': round(revenue, 2)}
+            for hour, count, revenue in cursor.fetchall()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage materialized report aggregates")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database file")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--install', action='store_true', help="create tables and triggers and fill them")
+    group.add_argument('--rebuild', action='store_true', help="recompute aggregates from the orders table")
+    group.add_argument('--check', action='store_true', help="report aggregates that drifted from the orders table")
+    args = parser.parse_args(argv)
+
+    conn = get_db(args.db)
+    try:
+        if args.check:
+            problems = drift(conn)
+            for table, key, kept, fresh in problems:
+                print(f"⚠️  {table}[{key}]: stored {kept}, actual {fresh}")
+            print("✅ Aggregates match orders" if not problems else f"❌ {len(problems)} aggregate rows drifted")
+            sys.exit(1 if problems else 0)
+        if args.install:
+            install(conn)
+        else:
+            rebuild(conn)
+        conn.commit()
+        print("✅ Report aggregates up to date")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Column-aware row conversion for the Food Delivery System
+Compiles a converter once per cursor description; rows go to dicts or straight to JSON
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+# Money and rating columns that MySQL returns as DECIMAL (or numeric strings)
+NUMERIC_COLUMNS = frozenset({
+    'price', 'total_price', 'rating', 'total_revenue', 'avg_order_value', 'total_spent', 'revenue',
+})
+
+
+def to_float(value):
+    if value is None or type(value) is float:
+        return value
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return value
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    return str(value)
+
+
+_encode = json.JSONEncoder(default=_json_default, separators=(',', ':')).encode
+
+
+class RowConverter:
+    """Converts tuples for one fixed column layout"""
+
+    def __init__(self, columns, numeric=NUMERIC_COLUMNS):
+        self.columns = tuple(columns)
+        self.numeric_indexes = tuple(i for i, name in enumerate(self.columns) if name in numeric)
+        # '{"id":', ',"name":', ... so a row serializes without building a dict
+        self._prefixes = tuple(
+            ('{' if i == 0 else ',') + _encode(name) + ':' for i, name in enumerate(self.columns)
+        )
+
+    def values(self, row):
+        if not self.numeric_indexes:
+            return row
+        values = list(row)
+        for i in self.numeric_indexes:
+            values[i] = to_float(values[i])
+        return values
+
+    def to_dict(self, row):
+        if row is None:
+            return None
+        return dict(zip(self.columns, self.values(row)))
+
+    def to_dicts(self, rows):
+        return [dict(zip(self.columns, self.values(row))) for row in rows]
+
+    def to_json(self, row):
+        """One row as a JSON object string"""
+        if not self.columns:
+            return '{}'
+        return ''.join(prefix + _encode(value) for prefix, value in zip(self._prefixes, self.values(row))) + '}'
+
+    def iter_json(self, rows):
+        """JSON object strings for many rows, e.g. for JSON lines or streamed arrays"""
+        to_json = self.to_json
+        for row in rows:
+            yield to_json(row)
+
+    def json_array(self, rows):
+        return '[' + ','.join(self.iter_json(rows)) + ']'
+
+
+@lru_cache(maxsize=256)
+def _compile(columns):
+    return RowConverter(columns)
+
+
+def converter_for(cursor):
+    """Compiled converter for a cursor's current result columns (cached by layout)"""
+    return _compile(tuple(d[0] for d in cursor.description))
+
+
+def fetch_dicts(cursor):
+    return converter_for(cursor).to_dicts(cursor.fetchall())
+
+
+def fetch_dict(cursor):
+    return converter_for(cursor).to_dict(cursor.fetchone())
+
+
+def fetch_json_array(cursor):
+    """Serialize the remaining rows of a cursor as a JSON array without intermediate dicts"""
+    return converter_for(cursor).json_array(cursor)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Schema capability cache for the Food Delivery System database
+Introspects tables and columns once so request handlers never have to ask again
+"""
+
+import threading
+
+from db_pool import DB_PATH, get_db
+
+
+class SchemaCapabilities:
+    """Immutable snapshot of which tables and columns the database has"""
+
+    def __init__(self, tables):
+        self.tables = {name: frozenset(columns) for name, columns in tables.items()}
+        self.has_customers = 'customers' in self.tables
+        self.has_delivery_staff = 'delivery_staff' in self.tables
+        self.orders_has_customer_id = self.has_column('orders', 'customer_id')
+        self.has_search = all(index in self.tables for index in ('menu_search', 'restaurant_search'))
+
+    def has_table(self, table):
+        return table in self.tables
+
+    def has_column(self, table, column):
+        return column in self.tables.get(table, ())
+
+    def as_dict(self):
+        return {
+            'tables': {name: sorted(columns) for name, columns in sorted(self.tables.items())},
+            'has_customers': self.has_customers,
+            'has_delivery_staff': self.has_delivery_staff,
+            'orders_has_customer_id': self.orders_has_customer_id,
+            'has_search': self.has_search,
+        }
+
+
+def introspect(conn):
+    """Read table and column names from the database in one pass"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT m.name, p.name
+        FROM sqlite_master m
+        JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+    """)
+    tables = {}
+    for table, column in cursor.fetchall():
+        tables.setdefault(table, set()).add(column)
+    return SchemaCapabilities(tables)
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def get_capabilities(db_path=DB_PATH):
+    """Return cached capabilities, introspecting only on first use"""
+    caps = _cache.get(db_path)
+    if caps is None:
+        caps = refresh(db_path)
+    return caps
+
+
+def refresh(db_path=DB_PATH, conn=None):
+    """Re-introspect the schema; call this after creating or migrating tables"""
+    if conn is not None:
+        caps = introspect(conn)
+    else:
+        conn = get_db(db_path)
+        try:
+            caps = introspect(conn)
+        finally:
+            conn.close()
+    with _lock:
+        _cache[db_path] = caps
+    return caps
+
+
+def invalidate(db_path=None):
+    """Drop cached capabilities for one database, or for all of them"""
+    with _lock:
+        if db_path is None:
+            _cache.clear()
+        else:
+            _cache.pop(db_path, None)
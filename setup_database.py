@@ -4,12 +4,22 @@ SQLite Database Setup Script for Food Delivery System
 Creates food_delivery.db from SQL schema
 """
 
+import argparse
 import sqlite3
 import os
 import sys
 
+import migrate
+
 DB_PATH = 'food_delivery.db'
 
+# Versioned seed scripts; only the schema is required
+SQL_FILES = [
+    ('0001', 'database', 'backend/database.sql'),
+    ('0002', 'procedures_and_triggers', 'backend/procedures_and_triggers.sql'),
+    ('0003', 'update_images', 'backend/update_images.sql'),
+]
+
 def read_sql_file(filepath):
     """Read SQL file"""
     try:
@@ -19,73 +29,68 @@ def read_sql_file(filepath):
         print(f"❌ Error: File '{filepath}' not found!")
         return None
 
-def create_sqlite_from_sql(sql_content):
-    """Create SQLite database from MySQL SQL file (converted)"""
-    # Remove MySQL-specific syntax
-    sql_content = sql_content.replace('AUTO_INCREMENT', '')
-    sql_content = sql_content.replace('ENGINE=InnoDB DEFAULT CHARSET=utf8mb4', '')
-    sql_content = sql_content.replace('COLLATE utf8mb4_unicode_ci', '')
-    sql_content = sql_content.replace('ON DELETE CASCADE', 'ON DELETE CASCADE')
-    sql_content = sql_content.replace('CURRENT_TIMESTAMP', 'CURRENT_TIMESTAMP')
-    
+def load_migrations():
+    """Seed scripts that exist, followed by any files in migrations/"""
+    migrations = []
+    for version, name, path in SQL_FILES:
+        if version != '0001' and not os.path.exists(path):
+            continue
+        sql_content = read_sql_file(path)
+        if sql_content is None:
+            return None
+        print(f"✅ Found {path} ({len(sql_content)} bytes)")
+        migrations.append(migrate.Migration(version, name, sql_content, 'mysql', path))
+    return migrations + migrate.discover()
+
+def create_sqlite_from_sql(migrations):
+    """Apply pending migrations; each one runs in its own transaction"""
     try:
+        applied = migrate.migrate(DB_PATH, migrations)
+        if not applied:
+            print("✅ Database is already up to date")
+
         conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Split by `;` and execute each statement
-        statements = sql_content.split(';')
-        executed = 0
-        
-        for statement in statements:
-            statement = statement.strip()
-            if statement and not statement.startswith('--'):
-                try:
-                    # Skip database selection
-                    if 'CREATE DATABASE' in statement or 'USE ' in statement:
-                        continue
-                    cursor.execute(statement)
-                    executed += 1
-                except sqlite3.Error as e:
-                    if 'already exists' not in str(e):
-                        print(f"⚠️  {e}")
-        
-        conn.commit()
-        print(f"✅ Executed {executed} SQL statements")
-        print(f"📊 Created: {DB_PATH}")
-        print("   ✓ restaurants table (5 records)")
-        print("   ✓ menu_items table (20 records)")
-        print("   ✓ orders table (empty)")
-        print("   ✓ order_items table (empty)")
-        
+        print(f"📊 Database: {DB_PATH}")
+        for table in ('restaurants', 'menu_items', 'customers', 'delivery_staff', 'orders', 'order_items'):
+            try:
+                count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                print(f"   ✓ {table} table ({count} records)")
+            except sqlite3.Error:
+                pass
         conn.close()
         return True
-    except sqlite3.Error as e:
+    except (migrate.MigrationError, sqlite3.Error) as e:
         print(f"❌ Error: {e}")
+        print("   A database created before migrations were tracked can be marked with")
+        print("   `python migrate.py --db food_delivery.db --file 0001:backend/database.sql --baseline 0001`")
         return False
 
 def main():
+    parser = argparse.ArgumentParser(description="Create or upgrade the SQLite database")
+    parser.add_argument('--fresh', action='store_true', help="delete the existing database first")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("🍕 Food Delivery System - SQLite Database Setup")
     print("=" * 60)
     print()
     
-    # Remove old database if exists
-    if os.path.exists(DB_PATH):
+    # Existing databases are upgraded in place; pending migrations only
+    if args.fresh and os.path.exists(DB_PATH):
         print(f"⚠️  Database {DB_PATH} already exists. Removing old version...")
         os.remove(DB_PATH)
     
     print("📁 Reading SQL schema...")
-    sql_content = read_sql_file('backend/database.sql')
+    migrations = load_migrations()
     
-    if not sql_content:
+    if not migrations:
         print("❌ Cannot read database.sql")
         sys.exit(1)
     
-    print(f"✅ Found {len(sql_content)} bytes of SQL")
     print()
-    print("🚀 Creating SQLite database...\n")
+    print("🚀 Applying migrations...\n")
     
-    if create_sqlite_from_sql(sql_content):
+    if create_sqlite_from_sql(migrations):
         print("\n" + "=" * 60)
         print("✅ SUCCESS! SQLite database ready!")
         print("=" * 60)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Event-driven order status engine for the Food Delivery System
+Keeps a heap of next-transition deadlines instead of polling every open order
+"""
+
+import asyncio
+import heapq
+import threading
+import time
+from datetime import datetime
+
+import event_hub
+import metrics
+import schema_cache
+import structured_log
+from db_pool import DB_PATH, get_db
+from dispatcher import get_dispatcher
+
+STATUS_SEQUENCE = ['Pending', 'Confirmed', 'Preparing', 'Out for Delivery', 'Delivered']
+FINAL_STATUSES = ('Delivered', 'Cancelled')
+STATUS_INTERVAL = 10  # seconds spent in each status
+
+log = structured_log.get_logger('status_engine')
+
+
+def parse_timestamp(value):
+    """Turn a created_at column value into epoch seconds, or None if unparseable"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value.split('.')[0], '%Y-%m-%d %H:%M:%S').timestamp()
+        except ValueError:
+            return None
+    if hasattr(value, 'timestamp'):
+        return value.timestamp()
+    return None
+
+
+class StatusEngine:
+    """Fires each order's next status transition exactly when it is due"""
+
+    def __init__(self, db_path=DB_PATH, interval=STATUS_INTERVAL):
+        self.db_path = db_path
+        self.interval = interval
+        self._heap = []
+        self._orders = {}  # order_id -> (created_ts, status index, generation)
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._loop = None  # set while running as an asyncio task
+        self._wakeup = None
+        self._task = None
+        self.has_delivery_staff = False
+        self.ticks = 0
+        self.transitions = 0
+
+    # ---- scheduling ----
+
+    def _next_step(self, created_ts, index, now):
+        """Index and deadline of the next status, catching up on missed steps"""
+        elapsed_index = int((now - created_ts) // self.interval)
+        target = min(max(index + 1, elapsed_index), len(STATUS_SEQUENCE) - 1)
+        return target, created_ts + target * self.interval
+
+    def _schedule_locked(self, order_id, created_ts, status, now):
+        if status in FINAL_STATUSES or status not in STATUS_SEQUENCE or created_ts is None:
+            self._orders.pop(order_id, None)
+            return
+        index = STATUS_SEQUENCE.index(status)
+        target, deadline = self._next_step(created_ts, index, now)
+        self._generation += 1
+        self._orders[order_id] = (created_ts, index, self._generation)
+        heapq.heappush(self._heap, (deadline, order_id, target, self._generation))
+
+    def track(self, order_id, created_at, status):
+        """Start or restart tracking an order; call after create or status update"""
+        with self._cond:
+            self._schedule_locked(order_id, parse_timestamp(created_at), status, time.time())
+            self._notify_locked()
+
+    def forget(self, order_id):
+        """Stop tracking an order (deleted or cancelled)"""
+        with self._cond:
+            self._orders.pop(order_id, None)
+
+    def load(self):
+        """Load every open order once at startup"""
+        self.has_delivery_staff = schema_cache.get_capabilities(self.db_path).has_delivery_staff
+        conn = get_db(self.db_path)
+        try:
+            cursor = conn.cursor()
+            open_statuses = STATUS_SEQUENCE[:-1]
+            cursor.execute(f"""
+                SELECT id, status, created_at FROM orders
+                WHERE status IN ({', '.join('?' * len(open_statuses))})
+            """, open_statuses)
+            now = time.time()
+            with self._cond:
+                for order_id, status, created_at in cursor:
+                    self._schedule_locked(order_id, parse_timestamp(created_at), status, now)
+                self._notify_locked()
+        finally:
+            conn.close()
+
+    def _notify_locked(self):
+        """Wake the runner, whether it is a thread or an asyncio task"""
+        self._cond.notify()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def pending(self):
+        """Number of orders with a scheduled transition"""
+        with self._cond:
+            return len(self._orders)
+
+    # ---- firing ----
+
+    def _pop_due_locked(self, now):
+        """Pop every due, still-current heap entry grouped by target status"""
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, order_id, target, generation = heapq.heappop(self._heap)
+            entry = self._orders.get(order_id)
+            if entry is None or entry[2] != generation:
+                continue  # superseded by a later track() or forget()
+            due.setdefault(STATUS_SEQUENCE[target], []).append(order_id)
+            self._schedule_locked(order_id, entry[0], STATUS_SEQUENCE[target], now)
+        return due
+
+    def apply(self, due):
+        """Write one UPDATE per target status and release riders in bulk"""
+        if not due:
+            return
+        stamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        staff_column = 'delivery_staff_id' if self.has_delivery_staff else 'NULL'
+        changed = []
+        conn = get_db(self.db_path)
+        try:
+            cursor = conn.cursor()
+            # take the write lock before reading: a concurrent PUT must not change a status between
+            # the SELECT (which becomes the event's `previous`) and the UPDATE
+            cursor.execute("BEGIN IMMEDIATE")
+            for status, order_ids in due.items():
+                marks = ', '.join('?' * len(order_ids))
+                # only move forward: a stale heap entry or another writer may have advanced the order already
+                earlier = STATUS_SEQUENCE[:STATUS_SEQUENCE.index(status)]
+                from_marks = ', '.join('?' * len(earlier))
+                cursor.execute(f"""
+                    SELECT id, restaurant_id, status, {staff_column} FROM orders
+                    WHERE id IN ({marks}) AND status IN ({from_marks})
+                """, [*order_ids, *earlier])
+                rows = cursor.fetchall()
+                if not rows:
+                    continue
+                cursor.execute(f"""
+                    UPDATE orders SET status = ?, updated_at = ?
+                    WHERE id IN ({marks}) AND status IN ({from_marks})
+                """, [status, stamp, *order_ids, *earlier])
+                if status == 'Delivered' and self.has_delivery_staff:
+                    get_dispatcher(self.db_path).release(cursor, [row[3] for row in rows if row[3] is not None])
+                changed.extend((status, row) for row in rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        hub = event_hub.get_hub(self.db_path)
+        for status, (order_id, restaurant_id, previous, delivery_staff_id) in changed:
+            hub.publish(event_hub.STATUS_CHANGED, order_id, restaurant_id, status=status, previous=previous,
+                        delivery_staff_id=delivery_staff_id)
+        if self.has_delivery_staff and ('Out for Delivery' in due or 'Delivered' in due):
+            # orders that just went out, or were waiting while every rider was busy, get riders in one batch
+            for order_id, restaurant_id, staff_id in get_dispatcher(self.db_path).assign_pending():
+                hub.publish(event_hub.STAFF_ASSIGNED, order_id, restaurant_id, delivery_staff_id=staff_id,
+                            status='Out for Delivery')
+
+    def tick(self, now=None):
+        """Apply all transitions due at `now`; returns {status: [order ids]}"""
+        with self._cond:
+            due = self._pop_due_locked(time.time() if now is None else now)
+        started = time.perf_counter()
+        self.apply(due)
+        if due:
+            metrics.observe_tick(time.perf_counter() - started, due)
+            self.ticks += 1
+            self.transitions += sum(len(ids) for ids in due.values())
+        return due
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    timeout = self._heap[0][0] - time.time() if self._heap else None
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                if not self._running:
+                    return
+            try:
+                due = self.tick()
+                if due:
+                    log.info("order statuses updated", extra={'transitions': {s: len(ids) for s, ids in due.items()}})
+            except Exception:
+                log.exception("error updating order statuses")
+                time.sleep(1)
+                try:
+                    self.load()  # resync in-memory schedule with the database
+                except Exception:
+                    log.exception("error reloading open orders")
+
+    def start(self):
+        """Load open orders and start the background thread"""
+        if self._running:
+            return
+        self.load()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        log.info("order status engine started", extra={'pending': self.pending()})
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # ---- asyncio mode ----
+
+    def _timeout(self):
+        with self._cond:
+            return self._heap[0][0] - time.time() if self._heap else None
+
+    async def _run_async(self):
+        while self._running:
+            timeout = self._timeout()
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            try:
+                due = await asyncio.to_thread(self.tick)
+                if due:
+                    log.info("order statuses updated", extra={'transitions': {s: len(ids) for s, ids in due.items()}})
+            except Exception:
+                log.exception("error updating order statuses")
+                await asyncio.sleep(1)
+                try:
+                    await asyncio.to_thread(self.load)
+                except Exception:
+                    log.exception("error reloading open orders")
+
+    async def start_async(self):
+        """Load open orders and run the engine as a task on the current event loop"""
+        if self._running:
+            return self._task
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._running = True
+        await asyncio.to_thread(self.load)
+        self._task = asyncio.create_task(self._run_async(), name='status-engine')
+        log.info("order status engine started", extra={'pending': self.pending(), 'mode': 'asyncio'})
+        return self._task
+
+    async def stop_async(self):
+        self._running = False
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        self._loop = None
+
+
+_engines = {}
+
+
+def start_engine(db_path=DB_PATH, interval=STATUS_INTERVAL):
+    """Start (once) and return the status engine for a database"""
+    engine = _engines.get(db_path)
+    if engine is None:
+        engine = _engines[db_path] = StatusEngine(db_path, interval)
+    engine.start()
+    return engine
+
+
+async def start_engine_async(db_path=DB_PATH, interval=STATUS_INTERVAL):
+    """Start (once) the status engine for a database as an asyncio task"""
+    engine = _engines.get(db_path)
+    if engine is None:
+        engine = _engines[db_path] = StatusEngine(db_path, interval)
+    await engine.start_async()
+    return engine
+
+
+def get_engine(db_path=DB_PATH):
+    """Running engine for a database, or None if none was started"""
+    return _engines.get(db_path)
+
+
+def order_changed(order_id, created_at, status, db_path=DB_PATH):
+    """Feed an order write into the running engine, if any"""
+    engine = _engines.get(db_path)
+    if engine is not None:
+        engine.track(order_id, created_at, status)
+
+
+def order_removed(order_id, db_path=DB_PATH):
+    """Stop tracking a deleted order in the running engine, if any"""
+    engine = _engines.get(db_path)
+    if engine is not None:
+        engine.forget(order_id)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Structured, rate-limited logging for the Food Delivery System services
+Server code logs through get_logger() instead of print(): one JSON object
+per line (or plain text), with repeats of the same message throttled
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # json or text
+LOG_RATE = int(os.getenv('LOG_RATE', '10'))  # messages per key per LOG_RATE_WINDOW
+LOG_RATE_WINDOW = float(os.getenv('LOG_RATE_WINDOW', '60'))
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record; extra= fields become top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let at most `rate` records per (logger, message template) through each
+    window; the first record after a throttled window carries `suppressed`
+    """
+
+    def __init__(self, rate=LOG_RATE, window=LOG_RATE_WINDOW):
+        super().__init__()
+        self.rate = rate
+        self.window = window
+        self._windows = {}  # key -> [window start, emitted, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate <= 0:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                state = self._windows[key] = [now, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+            if state[1] >= self.rate:
+                state[2] += 1
+                return False
+            state[1] += 1
+            if len(self._windows) > 10000:
+                self._windows = {k: v for k, v in self._windows.items() if now - v[0] < self.window}
+            return True
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure(level=LOG_LEVEL, fmt=LOG_FORMAT, stream=None):
+    """Install the handler on the 'fooddelivery' logger tree (once)"""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        handler = logging.StreamHandler(stream or sys.stderr)
+        if fmt == 'json':
+            handler.setFormatter(JSONFormatter())
+        else:
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        handler.addFilter(RateLimitFilter())
+        root = logging.getLogger('fooddelivery')
+        root.addHandler(handler)
+        root.setLevel(level)
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name):
+    configure()
+    return logging.getLogger(f'fooddelivery.{name}')
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_pool  # noqa: E402
+import generate_data  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A small generated database (indexes, report aggregates and search installed)"""
+    path = str(tmp_path / 'food_delivery.db')
+    generate_data.generate(path, generate_data.Scale(400, open_orders=20), seed=7)
+    yield path
+    pool = db_pool._pools.pop(path, None)
+    if pool is not None:
+        pool.close_all()
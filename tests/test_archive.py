@@ -0,0 +1,120 @@
+import shutil
+import sqlite3
+from argparse import Namespace
+
+import pytest
+
+import archive
+import export_orders
+import order_queries
+import report_aggregates
+import view_orders
+from viewer_queries import VIEWS, fetch_page
+
+
+@pytest.fixture
+def archived(db_path, tmp_path):
+    """(archived database, untouched copy of it from before the archive run)"""
+    before = str(tmp_path / 'before.db')
+    shutil.copy(db_path, before)
+    moved = archive.run(db_path, older_than_days=30, batch_size=50)
+    assert sum(moved.values()) > 0
+    return db_path, before
+
+
+def _all_pages(db_path, filters=None, limit=23):
+    seen = []
+    cursor = None
+    while True:
+        page = order_queries.list_orders(filters, cursor, limit, db_path)
+        seen += [(order['id'], order['status'], order['items']) for order in page['orders']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            return seen
+
+
+def test_archive_moves_only_old_completed_orders(archived):
+    db_path, _ = archived
+    conn = sqlite3.connect(db_path)
+    cutoff = archive.cutoff_for(30)
+    assert archive.eligible(conn.cursor(), cutoff) == 0
+    for month in archive.months(conn.cursor()):
+        statuses = {row[0] for row in conn.execute(f"SELECT DISTINCT status FROM {month['orders_table']}")}
+        assert statuses <= set(archive.FINAL_STATUSES)
+    conn.close()
+
+
+def test_rerun_moves_nothing(archived):
+    db_path, _ = archived
+    assert archive.run(db_path, older_than_days=30) == {}
+
+
+def test_pagination_is_unchanged_by_archiving(archived):
+    db_path, before = archived
+    assert _all_pages(db_path) == _all_pages(before)
+    delivered = {'status': 'Delivered', 'restaurant_id': 2}
+    assert _all_pages(db_path, delivered, 7) == _all_pages(before, delivered, 7)
+
+
+def test_reports_still_count_archived_orders(archived):
+    db_path, before = archived
+    conn, old = sqlite3.connect(db_path), sqlite3.connect(before)
+    assert report_aggregates.drift(conn) == []
+    assert report_aggregates.summary(conn) == report_aggregates.summary(old)
+    conn.close()
+    old.close()
+
+
+def test_located_order_keeps_its_items(archived):
+    db_path, before = archived
+    conn = sqlite3.connect(db_path)
+    month = archive.months(conn.cursor())[-1]
+    order_id = conn.execute(f"SELECT MIN(id) FROM {month['orders_table']}").fetchone()[0]
+    orders_table, items_table = archive.locate(conn.cursor(), order_id)
+    items = conn.execute(f"SELECT id, menu_item_id, quantity FROM {items_table} WHERE order_id = ? ORDER BY id",
+                         (order_id,)).fetchall()
+    conn.close()
+    old = sqlite3.connect(before)
+    assert items == old.execute("SELECT id, menu_item_id, quantity FROM order_items WHERE order_id = ? ORDER BY id",
+                                (order_id,)).fetchall()
+    old.close()
+
+
+def test_report_cli_includes_archived_orders(archived):
+    db_path, before = archived
+    args = Namespace(since=None, until=None, status=None, restaurant=None, before_id=None, limit=None)
+
+    def report(path):
+        conn = sqlite3.connect(path)
+        try:
+            return [(order['id'], len(items)) for order, items in view_orders.iter_orders(
+                view_orders.merged_rows(conn, args))]
+        finally:
+            conn.close()
+
+    assert report(db_path) == report(before)
+
+
+def test_export_includes_archived_orders(archived, tmp_path):
+    db_path, before = archived
+    outputs = []
+    for path in (db_path, before):
+        output = str(tmp_path / f'export_{len(outputs)}.csv')
+        count, last_id = export_orders.export_orders(output, batch_size=97, db_path=path)
+        with open(output, encoding='utf-8') as f:
+            outputs.append((count, last_id, f.read()))
+    assert outputs[0] == outputs[1]
+
+
+def test_viewer_pages_include_archived_orders(archived):
+    db_path, before = archived
+
+    def pages(path):
+        rows, key, total = fetch_page(VIEWS['orders'], None, True, path)
+        while True:
+            page, key, _ = fetch_page(VIEWS['orders'], key, False, path)
+            if not page:
+                return total, rows
+            rows += page
+
+    assert pages(db_path) == pages(before)
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import pytest
+
+import asgi_app
+
+
+async def _call(app, method, path, query=b'', body=None, headers=()):
+    """Drive one HTTP request through the ASGI app; returns (status, headers, json body)"""
+    messages = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {'type': 'http.disconnect'}
+        sent = True
+        return {'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await app({'type': 'http', 'method': method, 'path': path, 'query_string': query,
+               'headers': list(headers)}, receive, send)
+    headers = {key.decode(): value.decode() for key, value in messages[0]['headers']}
+    payload = messages[1]['body']
+    return messages[0]['status'], headers, json.loads(payload) if payload else None
+
+
+@pytest.fixture
+def call(db_path):
+    """call(method, path, ...) against a started app on the test database"""
+    loop = asyncio.new_event_loop()
+    app = asgi_app.App(db_path, run_status_engine=False)
+    loop.run_until_complete(app.startup())
+
+    def call(method, path, query=b'', body=None, headers=()):
+        return loop.run_until_complete(_call(app, method, path, query, body, headers))
+
+    yield call
+    loop.run_until_complete(app.shutdown())
+    loop.close()
+
+
+def test_order_pages_expose_the_cursor_to_browsers(call):
+    status, headers, orders = call('GET', '/api/orders', b'limit=5')
+    assert status == 200 and len(orders) == 5
+    assert 'X-Next-Cursor' in headers['access-control-expose-headers']
+    status, _, following = call('GET', '/api/orders', f"limit=5&cursor={headers['x-next-cursor']}".encode())
+    assert status == 200
+    assert following[0]['id'] not in {order['id'] for order in orders}
+
+
+def test_orders_default_to_one_page(call):
+    _, headers, orders = call('GET', '/api/orders')
+    assert len(orders) == 50 and headers['x-next-cursor']
+
+
+def test_catalog_etag_is_exposed_and_honoured(call):
+    status, headers, _ = call('GET', '/api/restaurants')
+    assert status == 200 and 'ETag' in headers['access-control-expose-headers']
+    status, _, _ = call('GET', '/api/restaurants', headers=[(b'if-none-match', headers['etag'].encode())])
+    assert status == 304
+
+
+def test_batch_with_non_object_entries_is_a_207(call):
+    status, _, result = call('POST', '/api/orders/batch', body=[1, 'x'])
+    assert status == 207
+    assert result['failed'] == 2 and {entry['status'] for entry in result['orders']} == {400}
+
+
+@pytest.mark.parametrize('method, path', [
+    ('POST', '/api/customers'),
+    ('POST', '/api/customers/find-or-create'),
+    ('POST', '/api/orders'),
+    ('PUT', '/api/orders/1'),
+    ('POST', '/api/orders/1/items'),
+])
+@pytest.mark.parametrize('body', [[], [{'name': 'A', 'email': 'a@b.c', 'status': 'Delivered'}]])
+def test_field_handlers_reject_non_object_bodies(call, method, path, body):
+    status, _, result = call(method, path, body=body)
+    assert status == 400
+    assert result['error'] == 'Expected a JSON object'
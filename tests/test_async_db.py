@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from async_db import AsyncPool
+
+
+def test_waiters_get_a_released_connection(db_path):
+    async def scenario():
+        pool = AsyncPool(db_path, size=1)
+        conn = await pool.acquire()
+        waiting = asyncio.ensure_future(pool.fetch_value("SELECT COUNT(*) FROM orders"))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        await pool.release(conn)
+        count = await asyncio.wait_for(waiting, 5)
+        stats = pool.stats()
+        await pool.close()
+        return count, stats
+
+    count, stats = asyncio.run(scenario())
+    assert count == 400
+    assert (stats['open'], stats['idle'], stats['waits']) == (1, 1, 1)
+
+
+def test_close_fails_pending_waiters(db_path):
+    async def scenario():
+        pool = AsyncPool(db_path, size=1)
+        conn = await pool.acquire()
+        waiting = [asyncio.ensure_future(pool.acquire()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        await pool.close()
+        results = await asyncio.wait_for(asyncio.gather(*waiting, return_exceptions=True), 5)
+        await pool.release(conn)
+        return results, pool.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert (stats['open'], stats['idle']) == (0, 0)
+
+
+def test_closed_pool_refuses_new_acquires(db_path):
+    async def scenario():
+        pool = AsyncPool(db_path, size=1)
+        await pool.close()
+        await pool.acquire()
+
+    with pytest.raises(RuntimeError, match="closed"):
+        asyncio.run(scenario())
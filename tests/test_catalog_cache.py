@@ -0,0 +1,115 @@
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+import catalog_cache
+import migrate
+import monitor_changes
+from catalog_cache import CachedBody, CatalogCache, TTLCache
+
+
+@pytest.fixture
+def catalog(db_path):
+    """The shared cache for the test database, as the app and the hooks see it"""
+    yield catalog_cache.get_catalog(db_path)
+    catalog_cache._caches.pop(db_path, None)
+
+
+def _execute(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _menu_names(entry):
+    return {item['id']: item['name'] for item in json.loads(entry.body)}
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(maxsize=4, ttl=0.05)
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1 and cache.stats()['size'] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+@pytest.mark.parametrize('header, status', [
+    (None, 200), ('"other"', 200), ('*', 304), ('"other", {etag}', 304), ('W/{etag}', 304),
+])
+def test_respond_answers_304_for_a_matching_etag(header, status):
+    entry = CachedBody('[1, 2]')
+    code, body, headers = catalog_cache.respond(entry, header.format(etag=entry.etag) if header else None)
+    assert code == status and headers['ETag'] == entry.etag
+    assert body == (b'' if status == 304 else b'[1, 2]')
+
+
+def test_missing_rows_are_never_304():
+    entry = CachedBody('{"error": "Restaurant not found"}', 404)
+    assert catalog_cache.respond(entry, '*')[0] == 404
+
+
+def test_hooks_drop_only_the_stale_entries(db_path):
+    cache = CatalogCache(db_path)
+    restaurant = cache.restaurant(1)
+    other = cache.menu(2)
+    _execute(db_path, "UPDATE restaurants SET name = 'Renamed' WHERE id = 1")
+    assert cache.restaurant(1) is restaurant  # served from the cache until invalidated
+    cache.invalidate_restaurant(1)
+    assert json.loads(cache.restaurant(1).body)['name'] == 'Renamed'
+    assert cache.restaurant(1).etag != restaurant.etag
+    assert cache.menu(2) is other
+
+
+def test_sync_invalidates_changed_rows_only(db_path, catalog):
+    catalog.sync()
+    menu_1, menu_2 = catalog.menu(1), catalog.menu(2)
+    item_id = next(iter(_menu_names(menu_1)))
+    _execute(db_path, "UPDATE menu_items SET name = 'Changed Elsewhere' WHERE id = ?", (item_id,))
+    assert catalog.sync() == (0, 1)
+    assert _menu_names(catalog.menu(1))[item_id] == 'Changed Elsewhere'
+    assert catalog.menu(2) is menu_2
+
+
+def test_migrations_refresh_the_rows_they_touch(db_path, catalog):
+    catalog.sync()
+    before = catalog.restaurants()
+    menu_2 = catalog.menu(2)
+    images = migrate.Migration('0099', 'update_images', "UPDATE restaurants SET image_url = 'new.jpg' WHERE id = 1")
+    migrate.migrate(db_path, [images], report=lambda message: None)
+    restaurants = json.loads(catalog.restaurants().body)
+    assert catalog.restaurants() is not before
+    assert next(r for r in restaurants if r['id'] == 1)['image_url'] == 'new.jpg'
+    assert catalog.menu(2) is menu_2
+
+
+def test_file_watcher_refreshes_the_cache(db_path, catalog):
+    watcher = monitor_changes.Watcher(os.path.dirname(db_path), backend='poll', debounce=0.02, interval=0.02)
+    monitor_changes.watch_catalog(watcher, db_path)
+    watcher.start()
+    try:
+        assert json.loads(catalog.restaurant(1).body)['name'] != 'Seen By The Watcher'
+        _execute(db_path, "UPDATE restaurants SET name = 'Seen By The Watcher' WHERE id = 1")
+        deadline = time.monotonic() + 5
+        while json.loads(catalog.restaurant(1).body)['name'] != 'Seen By The Watcher':
+            assert time.monotonic() < deadline, "the watcher never invalidated the restaurant"
+            time.sleep(0.02)
+    finally:
+        watcher.close()
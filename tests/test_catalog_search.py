@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+import catalog_search
+import schema_cache
+from api_errors import ValidationError
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def _menu_names(conn, db_path, text, **filters):
+    result = catalog_search.search(conn, text, filters, kind='menu', db_path=db_path)
+    return [item['name'] for item in result['menu_items']]
+
+
+def test_schema_cache_reports_the_indexes(db_path):
+    assert schema_cache.get_capabilities(db_path).has_search
+    assert schema_cache.get_capabilities(db_path).as_dict()['has_search'] is True
+
+
+def test_search_does_not_query_sqlite_master(conn, db_path):
+    schema_cache.get_capabilities(db_path)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    catalog_search.search(conn, 'kitchen', db_path=db_path)
+    assert statements and not any('sqlite_master' in sql for sql in statements)
+
+
+def test_insert_update_and_delete_keep_the_index_current(conn, db_path):
+    conn.execute("""INSERT INTO menu_items (id, restaurant_id, name, description, price, category)
+                    VALUES (99001, 1, 'Crème Brûlée', 'Torched vanilla custard', 7.5, 'Dessert')""")
+    conn.commit()
+    assert _menu_names(conn, db_path, 'creme brul') == ['Crème Brûlée']
+    assert _menu_names(conn, db_path, 'vanilla custard') == ['Crème Brûlée']
+
+    conn.execute("UPDATE menu_items SET name = 'Burnt Cream', description = 'Caramel top' WHERE id = 99001")
+    conn.commit()
+    assert _menu_names(conn, db_path, 'creme brul') == []
+    assert _menu_names(conn, db_path, 'burnt cre') == ['Burnt Cream']
+
+    conn.execute("DELETE FROM menu_items WHERE id = 99001")
+    conn.commit()
+    assert _menu_names(conn, db_path, 'burnt cre') == []
+    assert catalog_search.check(conn) == []
+
+
+def test_restaurant_rename_is_searchable(conn, db_path):
+    conn.execute("UPDATE restaurants SET name = 'Zanzibar Grill' WHERE id = 1")
+    conn.commit()
+    result = catalog_search.search(conn, 'zanz', kind='restaurants', db_path=db_path)
+    assert [r['id'] for r in result['restaurants']] == [1]
+    assert result['restaurants'][0]['score'] > 0
+
+
+def test_filters_apply_to_ranked_results(conn, db_path):
+    cuisine = conn.execute("SELECT cuisine FROM restaurants WHERE id = 1").fetchone()[0]
+    result = catalog_search.search(conn, 'kitchen', {'cuisine': cuisine}, kind='restaurants', db_path=db_path)
+    assert result['restaurants']
+    assert all(r['cuisine'] == cuisine for r in result['restaurants'])
+    items = catalog_search.search(conn, cuisine, {'max_price': 10}, kind='menu', db_path=db_path)['menu_items']
+    assert all(item['price'] <= 10 for item in items)
+
+
+def test_like_fallback_without_the_indexes(conn, db_path):
+    conn.execute("INSERT INTO menu_items (id, restaurant_id, name, price) VALUES (99002, 1, 'Quokka Pie', 9)")
+    conn.commit()
+    for index in catalog_search.INDEXES:
+        conn.execute(f"DROP TABLE {index}")
+    conn.commit()
+    schema_cache.refresh(db_path, conn)
+    assert not schema_cache.get_capabilities(db_path).has_search
+    result = catalog_search.search(conn, 'quokka', kind='menu', db_path=db_path)
+    assert [(item['name'], item['score']) for item in result['menu_items']] == [('Quokka Pie', None)]
+
+
+@pytest.mark.parametrize('text, kind, limit', [('  ', 'all', 5), ('pizza', 'drinks', 5), ('pizza', 'all', 'ten')])
+def test_bad_parameters_are_validation_errors(conn, db_path, text, kind, limit):
+    with pytest.raises(ValidationError) as excinfo:
+        catalog_search.search(conn, text, kind=kind, limit=limit, db_path=db_path)
+    assert excinfo.value.status == 400
@@ -0,0 +1,66 @@
+import sqlite3
+import threading
+
+import pytest
+
+from db_pool import ConnectionPool, PoolTimeout, sqlite_connector
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(sqlite_connector(str(tmp_path / 'pool.db')), size=2, timeout=0.2)
+    yield pool
+    pool.close_all()
+
+
+def test_checkout_and_return_reuses_connection(pool):
+    conn = pool.connection()
+    raw = conn._conn
+    conn.close()
+    again = pool.connection()
+    assert again._conn is raw
+    again.close()
+    stats = pool.stats()
+    assert (stats['misses'], stats['hits'], stats['open'], stats['idle']) == (1, 1, 1, 1)
+
+
+def test_closed_wrapper_refuses_use(pool):
+    conn = pool.connection()
+    conn.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_release_rolls_back_open_transaction(pool):
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x)")
+    conn = pool.connection()
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.close()
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_exhausted_pool_times_out(pool):
+    held = [pool.connection(), pool.connection()]
+    with pytest.raises(PoolTimeout):
+        pool.connection()
+    assert pool.stats()['waits'] == 1
+    for conn in held:
+        conn.close()
+
+
+def test_counters_are_exact_under_concurrency(pool):
+    pool.timeout = 5
+    def worker():
+        for _ in range(200):
+            pool.connection().close()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = pool.stats()
+    assert stats['hits'] + stats['misses'] == 1600
+    assert stats['open'] <= 2
@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from db_pool import get_db
+from dispatcher import Dispatcher
+from status_engine import StatusEngine
+
+INTERVAL = 10
+
+
+@pytest.fixture
+def riders(db_path):
+    """Make exactly three riders available, ranked 3 (best), 1, 2 (worst)"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE delivery_staff SET status = 'Busy'")
+    conn.execute("UPDATE delivery_staff SET status = 'Available', rating = 5.0, total_deliveries = 10 WHERE id = 3")
+    conn.execute("UPDATE delivery_staff SET status = 'Available', rating = 4.5, total_deliveries = 1 WHERE id = 1")
+    conn.execute("UPDATE delivery_staff SET status = 'Available', rating = 4.5, total_deliveries = 50 WHERE id = 2")
+    # orders already out without a rider would otherwise compete for these three
+    conn.execute("UPDATE orders SET delivery_staff_id = 4 WHERE delivery_staff_id IS NULL "
+                 "AND status = 'Out for Delivery'")
+    conn.commit()
+    conn.close()
+    return [3, 1, 2]
+
+
+def _statuses(db_path, table, ids, column='status'):
+    conn = sqlite3.connect(db_path)
+    try:
+        marks = ', '.join('?' * len(ids))
+        return dict(conn.execute(f"SELECT id, {column} FROM {table} WHERE id IN ({marks})", ids).fetchall())
+    finally:
+        conn.close()
+
+
+def test_claims_follow_ranking_and_mark_riders_busy(db_path, riders):
+    dispatcher = Dispatcher(db_path)
+    conn = get_db(db_path)
+    try:
+        claimed = dispatcher.claim_many(conn.cursor(), 5)
+        conn.commit()
+    finally:
+        conn.close()
+    assert claimed == riders
+    assert set(_statuses(db_path, 'delivery_staff', riders).values()) == {'Busy'}
+    assert dispatcher.stats()['empty_claims'] == 2
+
+
+def test_concurrent_claims_never_share_a_rider(db_path, riders):
+    dispatchers = [Dispatcher(db_path) for _ in range(4)]  # e.g. separate processes
+    results = []
+    lock = threading.Lock()
+
+    def claim(dispatcher):
+        conn = sqlite3.connect(db_path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            won = dispatcher.claim_many(conn.cursor(), 2)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        with lock:
+            results.extend(won)
+
+    threads = [threading.Thread(target=claim, args=(dispatcher,)) for dispatcher in dispatchers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == sorted(riders)
+
+
+def test_release_requeues_rider(db_path, riders):
+    dispatcher = Dispatcher(db_path)
+    conn = get_db(db_path)
+    try:
+        cursor = conn.cursor()
+        assert dispatcher.claim(cursor) == 3
+        assert dispatcher.release(cursor, [3]) == [3]
+        assert dispatcher.claim(cursor) == 3
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_tick_assigns_waiting_orders_to_best_riders(db_path, riders):
+    created = float(int(datetime.now().timestamp()) - 2 * INTERVAL - 5)
+    created_at = datetime.fromtimestamp(created).strftime('%Y-%m-%d %H:%M:%S')
+    conn = sqlite3.connect(db_path)
+    order_ids = []
+    for _ in range(4):
+        cursor = conn.execute("""
+            INSERT INTO orders (customer_id, restaurant_id, total_price, status, created_at, updated_at)
+            VALUES (1, 1, 10, 'Preparing', ?, ?)
+        """, (created_at, created_at))
+        order_ids.append(cursor.lastrowid)
+    conn.commit()
+    conn.close()
+
+    engine = StatusEngine(db_path, interval=INTERVAL)
+    engine.has_delivery_staff = True
+    for order_id in order_ids:
+        engine.track(order_id, created_at, 'Preparing')
+    due = engine.tick(now=created + 3 * INTERVAL)
+
+    assert sorted(due['Out for Delivery']) == order_ids
+    # oldest orders first (same timestamp: by id), best-ranked riders first; the fourth order waits
+    assigned = _statuses(db_path, 'orders', order_ids, 'delivery_staff_id')
+    assert [assigned[order_id] for order_id in order_ids] == riders + [None]
+
+
+def test_claim_counters_are_exact_under_concurrency(db_path):
+    dispatcher = Dispatcher(db_path)
+    dispatcher._loaded = True
+    dispatcher._last_refresh = time.monotonic() + 3600  # empty queue, no reloads: no database needed
+
+    def worker():
+        for _ in range(2000):
+            assert dispatcher.claim_many(None, 2) == []
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = dispatcher.stats()
+    assert stats['claims'] == 16000
+    assert stats['empty_claims'] == 32000
+    assert stats['assignments'] == stats['conflicts'] == stats['queue_depth'] == 0
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import event_hub
+from event_hub import EventHub
+
+
+def test_subscribers_only_see_matching_events():
+    hub = EventHub()
+    order = hub.subscribe(order_id=1)
+    restaurant = hub.subscribe(restaurant_id=2)
+    hub.publish(event_hub.STATUS_CHANGED, 1, 2, status='Confirmed')
+    hub.publish(event_hub.STATUS_CHANGED, 3, 4, status='Confirmed')
+    assert order.get(0.1).order_id == 1
+    assert order.get(0.05) is None
+    assert restaurant.get(0.1).order_id == 1
+    assert restaurant.get(0.05) is None
+
+
+def test_reconnect_replays_missed_events_or_resets():
+    hub = EventHub(replay_size=3)
+    first = hub.publish(event_hub.ORDER_CREATED, 1)
+    for order_id in (2, 3):
+        hub.publish(event_hub.ORDER_CREATED, order_id)
+    replayed = hub.subscribe(last_event_id=first.id)
+    assert [replayed.get(0.1).order_id for _ in range(2)] == [2, 3]
+    for order_id in (4, 5, 6):
+        hub.publish(event_hub.ORDER_CREATED, order_id)
+    assert hub.subscribe(last_event_id=first.id).get(0.1).type == event_hub.RESET
+
+
+def test_slow_subscriber_is_dropped_when_its_queue_fills():
+    hub = EventHub()
+    subscription = hub.subscribe()
+    subscription.maxsize = 3
+    for order_id in range(5):
+        hub.publish(event_hub.ORDER_CREATED, order_id)
+    assert subscription.overflowed
+    assert hub.stats()['dropped_subscribers'] == 1
+
+
+def test_queue_accounting_is_exact_with_concurrent_publishers():
+    hub = EventHub()
+    writers, per_writer = 8, 500
+    received = []
+
+    async def consume():
+        subscription = hub.subscribe(loop=asyncio.get_running_loop())
+        subscription.maxsize = writers * per_writer  # never overflows unless the count drifts
+
+        def publish():
+            for _ in range(per_writer):
+                hub.publish(event_hub.STATUS_CHANGED, 1)
+
+        threads = [threading.Thread(target=publish) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        while len(received) < writers * per_writer:
+            event = await asyncio.wait_for(subscription.next(), 5)
+            assert event is not None, "subscription overflowed"
+            received.append(event)
+        for thread in threads:
+            thread.join()
+        return subscription
+
+    subscription = asyncio.run(consume())
+    assert subscription._size == 0
+    assert not subscription.overflowed
@@ -0,0 +1,51 @@
+import sqlite3
+from datetime import datetime
+
+import generate_data
+from generate_data import Scale
+
+TABLES = ('restaurants', 'menu_items', 'customers', 'delivery_staff', 'orders', 'order_items')
+END = datetime(2024, 3, 1, 12, 0, 0)
+
+
+def _dump(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall() for table in TABLES}
+    finally:
+        conn.close()
+
+
+def _generate(tmp_path, name, seed, scale=None):
+    path = str(tmp_path / name)
+    counts = generate_data.generate(path, scale or Scale(300, open_orders=10), seed=seed, end=END)
+    return counts, _dump(path)
+
+
+def test_same_seed_gives_identical_databases(tmp_path):
+    first = _generate(tmp_path, 'a.db', seed=3)
+    second = _generate(tmp_path, 'b.db', seed=3)
+    assert first == second
+
+
+def test_different_seeds_give_different_data(tmp_path):
+    _, first = _generate(tmp_path, 'a.db', seed=3)
+    _, second = _generate(tmp_path, 'b.db', seed=4)
+    assert first['orders'] != second['orders']
+
+
+def test_counts_follow_the_scale(tmp_path):
+    scale = Scale(300, restaurants=5, items_per_restaurant=4, customers=12, staff=6, open_orders=10)
+    counts, rows = _generate(tmp_path, 'a.db', seed=3, scale=scale)
+    assert counts == {table: len(rows[table]) for table in TABLES}
+    assert (counts['restaurants'], counts['menu_items'], counts['customers'], counts['delivery_staff'],
+            counts['orders']) == (5, 20, 12, 6, 300)
+    open_orders = [order for order in rows['orders'] if order[5] not in ('Delivered', 'Cancelled')]
+    assert len(open_orders) == 10
+
+
+def test_regenerating_replaces_the_old_file(tmp_path):
+    path = str(tmp_path / 'a.db')
+    generate_data.generate(path, Scale(300, open_orders=10), seed=3, end=END)
+    generate_data.generate(path, Scale(100, open_orders=10), seed=3, end=END)
+    assert len(_dump(path)['orders']) == 100
@@ -0,0 +1,13 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_advisor_imports_without_tkinter():
+    # headless servers have no Tk; the advisor must not pull in the GUI module
+    script = "import sys; sys.modules['tkinter'] = None; import index_advisor; print(len(index_advisor.GUI_VIEWS))"
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert int(result.stdout) > 0
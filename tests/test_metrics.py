@@ -0,0 +1,75 @@
+import logging
+import sqlite3
+
+import metrics
+from metrics import Counter, Histogram, Registry
+
+
+def test_histogram_buckets_are_cumulative_in_prometheus_text():
+    histogram = Histogram('test_seconds', 'Test latency', ('route',), buckets=(1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value, '/a')
+    assert histogram.render() == [
+        '# HELP test_seconds Test latency',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{route="/a",le="1"} 2',
+        'test_seconds_bucket{route="/a",le="5"} 3',
+        'test_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_seconds_sum{route="/a"} 14.5',
+        'test_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_counter_escapes_label_values():
+    counter = Counter('test_total', 'Test count', ('path',))
+    counter.inc('a"b\\c\nd')
+    counter.inc('a"b\\c\nd', amount=2)
+    assert counter.render()[-1] == 'test_total{path="a\\"b\\\\c\\nd"} 3'
+
+
+def test_registry_renders_collector_gauges_and_skips_failing_collectors():
+    registry = Registry()
+    registry.register(Counter('test_total', 'Test count')).inc()
+
+    def broken():
+        raise RuntimeError('collector down')
+
+    registry.add_collector(broken)
+    registry.add_collector(lambda: [('test_pool_size', 'Pool size', {'db': 'x'}, 4)])
+    text = registry.render()
+    assert 'test_total 1\n' in text
+    assert '# TYPE test_pool_size gauge\ntest_pool_size{db="x"} 4\n' in text
+
+
+def test_instrumented_cursor_counts_statements_per_request(monkeypatch):
+    monkeypatch.setattr(metrics, 'QUERY_WARN_THRESHOLD', 2)
+    warnings = []
+    handler = logging.Handler()
+    handler.emit = warnings.append
+    metrics.log.addHandler(handler)
+    conn = sqlite3.connect(':memory:', factory=metrics.InstrumentedConnection)
+    try:
+        conn.execute("SELECT 1")  # outside any request: only the global counters
+        stats, token = metrics.begin_request('GET', '/test/instrumented')
+        conn.execute("CREATE TABLE t (x)")
+        conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,)])
+        assert conn.execute("SELECT x FROM t").fetchall() == [(1,), (2,)]
+        assert stats.queries == 3 and stats.db_time > 0
+        metrics.end_request(stats, token, 200)
+    finally:
+        conn.close()
+        metrics.log.removeHandler(handler)
+    text = metrics.render()
+    assert 'http_requests_total{method="GET",route="/test/instrumented",status="200"} 1' in text
+    assert 'http_request_db_queries_bucket{route="/test/instrumented",le="3"} 1' in text
+    assert [record.queries for record in warnings] == [3]
+
+
+def test_sampled_requests_are_profiled():
+    stats, token = metrics.begin_request('GET', '/test/profiled')
+    stats.profile = True
+    try:
+        assert metrics.call(sum, [1, 2, 3]) == 6
+    finally:
+        metrics.end_request(stats, token, 200)
+    assert '==== /test/profiled ====' in metrics.profile_report('/test/profiled')
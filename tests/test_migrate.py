@@ -0,0 +1,113 @@
+import os
+import sqlite3
+
+import pytest
+
+import migrate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASE_SCHEMA = """
+CREATE TABLE restaurants (id INT PRIMARY KEY AUTO_INCREMENT, name VARCHAR(100) NOT NULL, cuisine VARCHAR(50));
+CREATE TABLE orders (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    customer_id INT NOT NULL,
+    restaurant_id INT NOT NULL,
+    delivery_staff_id INT,
+    total_price DECIMAL(10, 2) NOT NULL,
+    status VARCHAR(50) DEFAULT 'Pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+CREATE TABLE order_items (id INT PRIMARY KEY AUTO_INCREMENT, order_id INT NOT NULL, menu_item_id INT NOT NULL,
+                          quantity INT DEFAULT 1, price DECIMAL(10, 2));
+INSERT INTO restaurants (name, cuisine) VALUES ('Pizza Palace', 'Italian');
+INSERT INTO restaurants (name, cuisine) VALUES ('Curry House', 'Indian');
+"""
+
+
+@pytest.fixture
+def migrations():
+    base = migrate.Migration('0001', 'database', BASE_SCHEMA, 'mysql')
+    return [base] + migrate.discover(os.path.join(ROOT, 'migrations'))
+
+
+def _schema(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT type, name, sql FROM sqlite_master WHERE name != 'sqlite_stat1' "
+                            "ORDER BY name").fetchall()
+    finally:
+        conn.close()
+
+
+def test_migrations_apply_in_order(tmp_path, migrations):
+    db_path = str(tmp_path / 'm.db')
+    done = migrate.migrate(db_path, migrations, report=lambda message: None)
+    assert [m.version for m in done] == [m.version for m in migrations]
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM restaurants").fetchone()[0] == 2
+    assert 'version' in {row[1] for row in conn.execute("PRAGMA table_info(orders)")}
+    conn.close()
+
+
+def test_rerun_is_a_no_op(tmp_path, migrations):
+    db_path = str(tmp_path / 'm.db')
+    migrate.migrate(db_path, migrations, report=lambda message: None)
+    schema = _schema(db_path)
+    messages = []
+    assert migrate.migrate(db_path, migrations, report=messages.append) == []
+    assert messages == []
+    assert _schema(db_path) == schema
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM restaurants").fetchone()[0] == 2
+    conn.close()
+
+
+def test_edited_migration_is_reported_not_rerun(tmp_path, migrations):
+    db_path = str(tmp_path / 'm.db')
+    migrate.migrate(db_path, migrations, report=lambda message: None)
+    edited = migrate.Migration('0001', 'database', BASE_SCHEMA + "\n-- edited\n", 'mysql')
+    messages = []
+    assert migrate.migrate(db_path, [edited], report=messages.append) == []
+    assert len(messages) == 1 and 'changed after it was applied' in messages[0]
+
+
+def test_failed_migration_rolls_back(tmp_path, migrations):
+    db_path = str(tmp_path / 'm.db')
+    migrate.migrate(db_path, migrations, report=lambda message: None)
+    broken = migrate.Migration('9999', 'broken', "CREATE TABLE half_done (id INTEGER);\nINSERT INTO missing VALUES (1);")
+    with pytest.raises(migrate.MigrationError):
+        migrate.migrate(db_path, [broken], report=lambda message: None)
+    assert 'half_done' not in {name for _, name, _ in _schema(db_path)}
+    conn = sqlite3.connect(db_path)
+    assert '9999' not in migrate.applied(conn)
+    conn.close()
+
+
+def test_status_does_not_write(tmp_path, capsys):
+    db_path = str(tmp_path / 'm.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE restaurants (id INTEGER PRIMARY KEY)")
+    conn.close()
+    with pytest.raises(SystemExit) as exit_info:
+        migrate.main(['--db', db_path, '--dir', os.path.join(ROOT, 'migrations'), '--status'])
+    assert exit_info.value.code == 0
+    out = capsys.readouterr().out
+    assert 'No migrations applied' in out and 'pending' in out
+    assert [row[1] for row in _schema(db_path)] == ['restaurants']
+
+    missing = str(tmp_path / 'missing.db')
+    with pytest.raises(SystemExit):
+        migrate.main(['--db', missing, '--dir', os.path.join(ROOT, 'migrations'), '--status'])
+    assert not os.path.exists(missing)
+
+
+def test_status_reports_applied_migrations(tmp_path, migrations, capsys):
+    db_path = str(tmp_path / 'm.db')
+    migrate.migrate(db_path, migrations[:2], report=lambda message: None)
+    with pytest.raises(SystemExit):
+        migrate.main(['--db', db_path, '--dir', os.path.join(ROOT, 'migrations'), '--status'])
+    out = capsys.readouterr().out
+    assert 'No migrations applied' not in out
+    assert f"{migrations[1].version:>6} {migrations[1].name:40} applied" in out
@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+
+import pytest
+
+import monitor_changes
+from monitor_changes import CREATED, DELETED, MODIFIED, PollingBackend, Watcher, coalesce
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+@pytest.mark.parametrize('kinds, expected', [
+    ([CREATED, MODIFIED], CREATED),
+    ([CREATED, DELETED], None),
+    ([DELETED, CREATED], MODIFIED),
+    ([MODIFIED, DELETED], DELETED),
+    ([MODIFIED, MODIFIED], MODIFIED),
+])
+def test_coalesce_folds_events_for_one_path(kinds, expected):
+    pending = {}
+    for kind in kinds:
+        coalesce(pending, 'a.sql', kind)
+    assert pending.get('a.sql') == expected
+
+
+def test_poll_reports_create_modify_delete(tmp_path):
+    root = str(tmp_path)
+    path = os.path.join(root, 'sub', 'a.sql')
+    backend = PollingBackend(root, monitor_changes.IGNORE_DIRS, interval=0)
+    _write(path, 'one')
+    assert backend.poll(0) == [(path, CREATED)]
+    _write(path, 'two, longer')
+    assert backend.poll(0) == [(path, MODIFIED)]
+    assert backend.poll(0) == []
+    os.remove(path)
+    assert backend.poll(0) == [(path, DELETED)]
+
+
+def test_poll_reports_files_of_a_removed_directory(tmp_path):
+    root = str(tmp_path)
+    _write(os.path.join(root, 'a', 'b', 'c.sql'), 'x')
+    backend = PollingBackend(root, monitor_changes.IGNORE_DIRS, interval=0)
+    os.rename(os.path.join(root, 'a'), os.path.join(root, 'moved'))
+    events = sorted(backend.poll(0))
+    assert (os.path.join(root, 'a', 'b', 'c.sql'), DELETED) in events
+    assert (os.path.join(root, 'moved', 'b', 'c.sql'), CREATED) in events
+
+
+def test_poll_never_enters_ignored_directories(tmp_path):
+    root = str(tmp_path)
+    _write(os.path.join(root, 'node_modules', 'pkg', 'index.js'), 'x')
+    _write(os.path.join(root, 'frontend', 'node_modules', 'dep.js'), 'x')
+    backend = PollingBackend(root, monitor_changes.IGNORE_DIRS, interval=0)
+    _write(os.path.join(root, 'node_modules', 'pkg', 'other.js'), 'x')
+    _write(os.path.join(root, 'frontend', 'app.js'), 'x')
+    assert backend.poll(0) == [(os.path.join(root, 'frontend', 'app.js'), CREATED)]
+    assert not any('node_modules' in path for path in backend._dirs)
+
+
+def test_watcher_debounces_a_burst_into_one_batch(tmp_path):
+    root = str(tmp_path)
+    batches = []
+    watcher = Watcher(root, backend='poll', debounce=0.3, max_delay=5, interval=0.02)
+    watcher.on_change(batches.append)
+    watcher.start(duration=2)
+    try:
+        _write(os.path.join(root, 'a.sql'), 'x')
+        time.sleep(0.1)
+        _write(os.path.join(root, 'b.sql'), 'x')
+        deadline = time.monotonic() + 2
+        while not batches and time.monotonic() < deadline:
+            time.sleep(0.02)
+        time.sleep(0.4)
+    finally:
+        watcher.stop()
+    assert batches == [[(os.path.join(root, 'a.sql'), CREATED), (os.path.join(root, 'b.sql'), CREATED)]]
+
+
+def test_callbacks_only_hear_matching_files(tmp_path):
+    root = str(tmp_path)
+    watcher = Watcher(root, backend='poll', interval=0)
+    sql, everything = [], []
+    watcher.on_change(sql.extend, ['*.sql'])
+    watcher.on_change(everything.extend)
+    watcher._dispatch({os.path.join(root, 'a.sql'): CREATED, os.path.join(root, 'b.txt'): CREATED})
+    assert sql == [(os.path.join(root, 'a.sql'), CREATED)]
+    assert len(everything) == 2
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+def test_inotify_forgets_a_moved_away_tree(tmp_path):
+    root = str(tmp_path / 'root')
+    outside = str(tmp_path / 'outside')
+    os.makedirs(outside)
+    _write(os.path.join(root, 'a', 'b', 'c.sql'), 'x')
+    _write(os.path.join(root, 'a', 'top.sql'), 'x')
+    try:
+        backend = monitor_changes.InotifyBackend(root, monitor_changes.IGNORE_DIRS)
+    except OSError as e:
+        pytest.skip(f"inotify unavailable: {e}")
+    try:
+        os.rename(os.path.join(root, 'a'), os.path.join(outside, 'a'))
+        assert sorted(backend.poll(1)) == [(os.path.join(root, 'a', 'b', 'c.sql'), DELETED),
+                                           (os.path.join(root, 'a', 'top.sql'), DELETED)]
+        assert list(backend._watches) == [root]
+        _write(os.path.join(outside, 'a', 'b', 'later.sql'), 'x')
+        assert backend.poll(0.2) == []
+    finally:
+        backend.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+def test_inotify_follows_a_tree_moved_within_the_root(tmp_path):
+    root = str(tmp_path)
+    _write(os.path.join(root, 'a', 'b', 'c.sql'), 'x')
+    try:
+        backend = monitor_changes.InotifyBackend(root, monitor_changes.IGNORE_DIRS)
+    except OSError as e:
+        pytest.skip(f"inotify unavailable: {e}")
+    try:
+        os.rename(os.path.join(root, 'a'), os.path.join(root, 'z'))
+        events = backend.poll(1)
+        assert (os.path.join(root, 'a', 'b', 'c.sql'), DELETED) in events
+        assert (os.path.join(root, 'z', 'b', 'c.sql'), CREATED) in events
+        _write(os.path.join(root, 'z', 'b', 'd.sql'), 'x')
+        assert (os.path.join(root, 'z', 'b', 'd.sql'), CREATED) in backend.poll(1)
+    finally:
+        backend.close()
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+
+import pytest
+
+import migrate
+import order_queries
+from api_errors import ValidationError
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+def _all_order_ids(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT id FROM orders ORDER BY created_at DESC, id DESC")]
+    finally:
+        conn.close()
+
+
+def test_cursor_encoding_round_trips():
+    token = order_queries.encode_cursor('2026-10-01 12:00:00', 42)
+    assert order_queries.decode_cursor(token) == ['2026-10-01 12:00:00', 42]
+
+
+@pytest.mark.parametrize('token', ['not-a-cursor', order_queries.encode_cursor(1, 2, 3),
+                                   order_queries.encode_cursor([1], {}), order_queries.encode_cursor(None, 1),
+                                   order_queries.encode_cursor('2026-10-01', True)])
+def test_bad_cursor_is_a_400(token):
+    with pytest.raises(ValidationError) as excinfo:
+        order_queries.decode_cursor(token)
+    assert excinfo.value.status == 400
+
+
+def test_paging_with_next_cursor_visits_every_order_once(db_path):
+    seen = []
+    cursor = None
+    while True:
+        page = order_queries.list_orders(cursor=cursor, limit=37, db_path=db_path)
+        assert len(page['orders']) <= 37
+        seen += [order['id'] for order in page['orders']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert seen == _all_order_ids(db_path)
+
+
+def test_filters_apply_across_pages(db_path):
+    cursor = None
+    ids = []
+    while True:
+        page = order_queries.list_orders({'status': 'Delivered', 'restaurant_id': 1}, cursor, 5, db_path)
+        assert all(order['status'] == 'Delivered' and order['restaurant_id'] == 1 for order in page['orders'])
+        ids += [order['id'] for order in page['orders']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    conn = sqlite3.connect(db_path)
+    expected = conn.execute("SELECT COUNT(*) FROM orders WHERE status = 'Delivered' AND restaurant_id = 1").fetchone()
+    conn.close()
+    assert len(ids) == len(set(ids)) == expected[0]
+
+
+def test_delta_feed_returns_each_change_after_the_token(db_path):
+    first = order_queries.changed_orders('2000-01-01 00:00:00', limit=500, db_path=db_path)
+    while first['has_more']:
+        first = order_queries.changed_orders(first['next_since'], limit=500, db_path=db_path)
+    last_seen = first['orders'][-1]['updated_at']
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE orders SET status = 'Cancelled', updated_at = '2999-01-01 00:00:00' WHERE id = 3")
+    conn.commit()
+    conn.close()
+    delta = order_queries.changed_orders(first['next_since'], db_path=db_path)
+    # once caught up the token overlaps the last timestamp; clients merge those rows by id
+    assert delta['orders'][-1]['id'] == 3
+    assert all(order['updated_at'] == last_seen for order in delta['orders'][:-1])
+
+
+def test_migration_creates_the_order_list_indexes(tmp_path):
+    db_path = str(tmp_path / 'migrated.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id, restaurant_id, delivery_staff_id, "
+                 "total_price, status, created_at, updated_at)")
+    conn.execute("CREATE TABLE order_items (id INTEGER PRIMARY KEY, order_id, menu_item_id, quantity, price)")
+    conn.commit()
+    conn.close()
+    migration = migrate.Migration.from_file(os.path.join(MIGRATIONS, '0005_order_list_indexes.sql'))
+    migrate.migrate(db_path, [migration], report=lambda message: None)
+    conn = sqlite3.connect(db_path)
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    assert {name for name, _, _, _ in order_queries.INDEXES} <= indexes
+
+
+@pytest.mark.parametrize('token', [order_queries.encode_cursor([1], {}), order_queries.encode_cursor({'a': 1}, 2)])
+def test_malformed_tokens_are_a_400_not_a_bind_error(db_path, token):
+    with pytest.raises(ValidationError):
+        order_queries.list_orders(cursor=token, db_path=db_path)
+    with pytest.raises(ValidationError):
+        order_queries.changed_orders(since=token, db_path=db_path)
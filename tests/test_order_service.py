@@ -0,0 +1,219 @@
+import os
+import sqlite3
+import zipfile
+
+import pytest
+
+import db_pool
+import migrate
+import order_service
+import schema_cache
+import setup_database
+from api_errors import ValidationError
+from order_service import OrderError
+
+
+def _menu_item(db_path, restaurant_id=1):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT id, price FROM menu_items WHERE restaurant_id = ? ORDER BY id LIMIT 1",
+                            (restaurant_id,)).fetchone()
+    finally:
+        conn.close()
+
+
+def test_create_order_accepts_numeric_string_restaurant_id(db_path):
+    item_id, price = _menu_item(db_path)
+    order = order_service.create_order(
+        {'restaurant_id': '1', 'customer_id': 1, 'items': [{'menu_item_id': item_id, 'quantity': 2}]}, db_path)
+    assert order['restaurant_id'] == 1
+    assert order['total_price'] == round(price * 2, 2)
+
+
+@pytest.mark.parametrize('restaurant_id', ['one', 1.5, True, [1]])
+def test_create_order_rejects_non_integer_restaurant_id(db_path, restaurant_id):
+    item_id, _ = _menu_item(db_path)
+    with pytest.raises(OrderError) as excinfo:
+        order_service.create_order(
+            {'restaurant_id': restaurant_id, 'customer_id': 1, 'items': [{'menu_item_id': item_id}]}, db_path)
+    assert excinfo.value.status == 400
+    assert 'restaurant_id' in excinfo.value.message
+
+
+def test_create_order_accepts_numeric_string_customer_and_menu_item_ids(db_path):
+    item_id, price = _menu_item(db_path)
+    order = order_service.create_order(
+        {'restaurant_id': 1, 'customer_id': '1', 'items': [{'menu_item_id': str(item_id)}]}, db_path)
+    assert order['customer_id'] == 1
+    assert order['total_price'] == price
+
+
+def test_batch_reports_malformed_entries_per_entry(db_path):
+    item_id, _ = _menu_item(db_path)
+    good = {'restaurant_id': 1, 'customer_id': 1, 'items': [{'menu_item_id': item_id}]}
+    results = order_service.create_orders(
+        [1, 'x', [good], good, dict(good, items=[item_id]), dict(good, customer_id='me')], db_path)
+    assert [result['status'] if 'error' in result else 'created' for result in results] == \
+        [400, 400, 400, 'created', 400, 400]
+
+
+def test_atomic_batch_rejects_non_object_entry(db_path):
+    with pytest.raises(ValidationError) as excinfo:
+        order_service.create_orders([1], db_path, atomic=True)
+    assert excinfo.value.status == 400
+
+
+def test_create_order_rejects_item_from_other_restaurant(db_path):
+    item_id, _ = _menu_item(db_path, restaurant_id=2)
+    with pytest.raises(OrderError) as excinfo:
+        order_service.create_order(
+            {'restaurant_id': 1, 'customer_id': 1, 'items': [{'menu_item_id': item_id}]}, db_path)
+    assert excinfo.value.status == 400
+
+
+def _order(db_path, items):
+    return order_service.create_order({'restaurant_id': 1, 'customer_id': 1, 'items': items}, db_path)
+
+
+def _stored(db_path, order_id):
+    """(total_price, version, SUM of the lines) as stored"""
+    conn = sqlite3.connect(db_path)
+    try:
+        total, version = conn.execute("SELECT total_price, version FROM orders WHERE id = ?", (order_id,)).fetchone()
+        lines = conn.execute("SELECT COALESCE(ROUND(SUM(quantity * price), 2), 0) FROM order_items WHERE order_id = ?",
+                             (order_id,)).fetchone()[0]
+        return total, version, lines
+    finally:
+        conn.close()
+
+
+def _line_ids(db_path, order_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT id FROM order_items WHERE order_id = ? ORDER BY id", (order_id,))]
+    finally:
+        conn.close()
+
+
+def test_edits_keep_total_equal_to_lines(db_path):
+    item_id, price = _menu_item(db_path)
+    order = _order(db_path, [{'menu_item_id': item_id, 'quantity': 1}])
+    result = order_service.edit_order_items(order['id'], [
+        {'op': 'add', 'menu_item_id': item_id, 'quantity': 2},
+        {'op': 'set', 'menu_item_id': item_id + 1, 'quantity': 4},
+    ], db_path=db_path)
+    total, version, lines = _stored(db_path, order['id'])
+    assert result['new_total'] == total == lines
+    assert result['version'] == version == 1
+
+
+def test_removing_both_duplicate_lines(db_path):
+    item_id, _ = _menu_item(db_path)
+    order = _order(db_path, [{'menu_item_id': item_id, 'quantity': 1}, {'menu_item_id': item_id, 'quantity': 2}])
+    first, second = _line_ids(db_path, order['id'])
+    result = order_service.edit_order_items(order['id'], [
+        {'op': 'remove', 'item_id': first},
+        {'op': 'remove', 'item_id': second},
+    ], db_path=db_path)
+    assert result['new_total'] == 0
+    assert _line_ids(db_path, order['id']) == []
+
+
+def test_setting_duplicate_menu_item_to_zero_twice(db_path):
+    item_id, _ = _menu_item(db_path)
+    order = _order(db_path, [{'menu_item_id': item_id}, {'menu_item_id': item_id}, {'menu_item_id': item_id + 1}])
+    order_service.edit_order_items(order['id'], [
+        {'op': 'set', 'menu_item_id': item_id, 'quantity': 0},
+        {'op': 'set', 'menu_item_id': item_id, 'quantity': 0},
+    ], db_path=db_path)
+    total, _, lines = _stored(db_path, order['id'])
+    assert len(_line_ids(db_path, order['id'])) == 1
+    assert total == lines
+
+
+def test_stale_version_is_a_conflict(db_path):
+    item_id, _ = _menu_item(db_path)
+    order = _order(db_path, [{'menu_item_id': item_id}])
+    order_service.add_order_item(order['id'], item_id, 1, version=0, db_path=db_path)
+    with pytest.raises(OrderError) as excinfo:
+        order_service.add_order_item(order['id'], item_id, 1, version=0, db_path=db_path)
+    assert excinfo.value.status == 409
+    assert _stored(db_path, order['id'])[1] == 1
+
+
+def _bump_version_on_first_read(monkeypatch, db_path, order_id):
+    """Make another writer commit an edit between the edit's read and its UPDATE, once"""
+    real = order_service.fetch_prices
+    calls = []
+
+    def racing_fetch_prices(cursor, menu_item_ids):
+        if not calls:
+            conn = sqlite3.connect(db_path)
+            conn.execute("UPDATE orders SET version = version + 1 WHERE id = ?", (order_id,))
+            conn.commit()
+            conn.close()
+        calls.append(1)
+        return real(cursor, menu_item_ids)
+
+    monkeypatch.setattr(order_service, 'fetch_prices', racing_fetch_prices)
+    return calls
+
+
+def test_lost_race_is_retried_without_a_version(db_path, monkeypatch):
+    item_id, _ = _menu_item(db_path)
+    order = _order(db_path, [{'menu_item_id': item_id}])
+    calls = _bump_version_on_first_read(monkeypatch, db_path, order['id'])
+    result = order_service.add_order_item(order['id'], item_id, 1, db_path=db_path)
+    assert len(calls) == 2
+    total, version, lines = _stored(db_path, order['id'])
+    assert result['version'] == version == 2
+    assert total == lines
+
+
+def test_lost_race_with_a_version_is_a_conflict(db_path, monkeypatch):
+    item_id, _ = _menu_item(db_path)
+    order = _order(db_path, [{'menu_item_id': item_id}])
+    _bump_version_on_first_read(monkeypatch, db_path, order['id'])
+    with pytest.raises(OrderError) as excinfo:
+        order_service.add_order_item(order['id'], item_id, 1, version=0, db_path=db_path)
+    assert excinfo.value.status == 409
+    assert _stored(db_path, order['id'])[2] == _stored(db_path, order['id'])[0]
+
+
+@pytest.fixture
+def legacy_db_path(tmp_path):
+    """A database built like setup_database.py does: the backend/ seed scripts plus migrations/"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    bundle = os.path.join(root, 'FoodHub-master.zip')
+    if not os.path.exists(bundle):
+        pytest.skip("FoodHub-master.zip is not available")
+    with zipfile.ZipFile(bundle) as archive:
+        migrations = [migrate.Migration(version, name, archive.read(f'FoodHub-master/{script}').decode('utf-8'), 'mysql')
+                      for version, name, script in setup_database.SQL_FILES]
+    path = str(tmp_path / 'legacy.db')
+    migrations += migrate.discover()
+    migrate.migrate(path, migrations, report=lambda message: None)
+    schema_cache.invalidate(path)
+    yield path
+    schema_cache.invalidate(path)
+    pool = db_pool._pools.pop(path, None)
+    if pool is not None:
+        pool.close_all()
+
+
+def test_edit_keeps_total_on_migrated_database(legacy_db_path):
+    order = order_service.create_order(
+        {'restaurant_id': 1, 'customer_id': 1, 'items': [{'menu_item_id': 1}, {'menu_item_id': 2}]},
+        legacy_db_path)
+    assert order['total_price'] == 19.98
+    result = order_service.edit_order_items(
+        order['id'], [{'op': 'remove', 'item_id': _line_ids(legacy_db_path, order['id'])[0]},
+                      {'op': 'add', 'menu_item_id': 3, 'quantity': 2}], db_path=legacy_db_path)
+    conn = sqlite3.connect(legacy_db_path)
+    try:
+        stored = conn.execute("SELECT total_price FROM orders WHERE id = ?", (order['id'],)).fetchone()[0]
+        lines = conn.execute("SELECT ROUND(SUM(quantity * price), 2) FROM order_items WHERE order_id = ?",
+                             (order['id'],)).fetchone()[0]
+    finally:
+        conn.close()
+    assert result['new_total'] == stored == lines == 18.97
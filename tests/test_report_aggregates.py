@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+import report_aggregates
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def _fresh_summary(conn):
+    count, revenue = conn.execute("SELECT COUNT(*), COALESCE(SUM(total_price), 0) FROM orders").fetchone()
+    return count, round(revenue, 2)
+
+
+def test_generated_database_has_no_drift(conn):
+    assert report_aggregates.drift(conn) == []
+    summary = report_aggregates.summary(conn)
+    assert (summary['total_orders'], summary['total_revenue']) == _fresh_summary(conn)
+
+
+def test_triggers_follow_insert_update_and_delete(conn):
+    conn.execute("""
+        INSERT INTO orders (customer_id, restaurant_id, total_price, status, created_at)
+        VALUES (1, 1, 12.5, 'Pending', '2026-01-01 10:15:00')
+    """)
+    order_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    conn.execute("UPDATE orders SET status = 'Delivered', total_price = 20, restaurant_id = 2 WHERE id = ?",
+                 (order_id,))
+    assert report_aggregates.drift(conn) == []
+    hours = {row['hour']: row for row in report_aggregates.hourly(conn, '2026-01-01 10:00', '2026-01-01 11:00')}
+    assert (hours['2026-01-01 10:00']['order_count'], hours['2026-01-01 10:00']['revenue']) == (1, 20)
+
+    conn.execute("DELETE FROM orders WHERE id = ?", (order_id,))
+    assert report_aggregates.drift(conn) == []
+    summary = report_aggregates.summary(conn)
+    assert (summary['total_orders'], summary['total_revenue']) == _fresh_summary(conn)
+
+
+def test_untracked_column_update_leaves_counters_alone(conn):
+    before = report_aggregates.orders_by_status(conn)
+    conn.execute("UPDATE orders SET delivery_address = 'elsewhere' WHERE id = 1")
+    assert report_aggregates.orders_by_status(conn) == before
+
+
+def test_drift_reports_tampering_and_rebuild_repairs_it(conn):
+    conn.execute("UPDATE order_stats_status SET order_count = order_count + 5 WHERE status = 'Delivered'")
+    problems = report_aggregates.drift(conn)
+    assert [problem[:2] for problem in problems] == [('order_stats_status', 'Delivered')]
+    report_aggregates.rebuild(conn)
+    assert report_aggregates.drift(conn) == []
@@ -0,0 +1,62 @@
+import json
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+import row_converter
+from row_converter import RowConverter
+
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE menu_items (id INTEGER, name TEXT, price TEXT, quantity INTEGER)")
+    conn.executemany("INSERT INTO menu_items VALUES (?, ?, ?, ?)",
+                     [(1, 'Naan "garlic"', '2.50', 3), (2, 'Lassi', None, 1), (3, 'Tea', 'n/a', 2)])
+    yield conn.cursor()
+    conn.close()
+
+
+def test_numeric_columns_become_floats_and_others_are_untouched():
+    converter = RowConverter(['id', 'price', 'total_price', 'status'])
+    row = (7, Decimal('9.99'), '12.50', '10')
+    assert converter.to_dict(row) == {'id': 7, 'price': 9.99, 'total_price': 12.5, 'status': '10'}
+    assert converter.to_dict(None) is None
+
+
+def test_unparseable_numbers_pass_through():
+    assert row_converter.to_float('n/a') == 'n/a'
+    assert row_converter.to_float(None) is None
+
+
+def test_json_matches_json_dumps_of_the_dict():
+    converter = RowConverter(['id', 'name', 'price', 'created_at', 'day'])
+    row = (1, 'Naan "garlic"\n', Decimal('2.5'), datetime(2026, 10, 1, 12, 30), date(2026, 10, 1))
+    assert json.loads(converter.to_json(row)) == {
+        'id': 1, 'name': 'Naan "garlic"\n', 'price': 2.5, 'created_at': '2026-10-01 12:30:00', 'day': '2026-10-01'}
+    assert RowConverter([]).to_json(()) == '{}'
+
+
+def test_cursor_helpers(cursor):
+    cursor.execute("SELECT * FROM menu_items ORDER BY id")
+    assert json.loads(row_converter.fetch_json_array(cursor)) == [
+        {'id': 1, 'name': 'Naan "garlic"', 'price': 2.5, 'quantity': 3},
+        {'id': 2, 'name': 'Lassi', 'price': None, 'quantity': 1},
+        {'id': 3, 'name': 'Tea', 'price': 'n/a', 'quantity': 2},
+    ]
+    cursor.execute("SELECT id, price FROM menu_items WHERE id = 1")
+    assert row_converter.fetch_dict(cursor) == {'id': 1, 'price': 2.5}
+    cursor.execute("SELECT id FROM menu_items WHERE id = 99")
+    assert row_converter.fetch_dict(cursor) is None
+
+
+def test_converters_are_cached_by_column_layout(cursor):
+    cursor.execute("SELECT id, price FROM menu_items")
+    first = row_converter.converter_for(cursor)
+    cursor.execute("SELECT id, price FROM menu_items WHERE id > 1")
+    assert row_converter.converter_for(cursor) is first
+    cursor.execute("SELECT price, id FROM menu_items")
+    other = row_converter.converter_for(cursor)
+    assert other is not first and other.columns == ('price', 'id') and other.numeric_indexes == (0,)
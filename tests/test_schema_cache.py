@@ -0,0 +1,61 @@
+import os
+import sqlite3
+
+import migrate
+import schema_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _base(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE restaurants (id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, restaurant_id INTEGER,
+                             delivery_staff_id INTEGER, total_price REAL,
+                             status TEXT, created_at TIMESTAMP, updated_at TIMESTAMP);
+        CREATE TABLE order_items (id INTEGER PRIMARY KEY, order_id INTEGER, menu_item_id INTEGER,
+                                  quantity INTEGER, price REAL);
+    """)
+    conn.close()
+
+
+def test_capabilities_describe_the_schema(db_path):
+    caps = schema_cache.get_capabilities(db_path)
+    assert caps.has_customers and caps.has_delivery_staff and caps.orders_has_customer_id
+    assert caps.has_column('orders', 'version') and not caps.has_column('orders', 'nope')
+    assert not caps.has_table('missing')
+    assert caps.as_dict()['tables']['restaurants'] == sorted(caps.tables['restaurants'])
+
+
+def test_capabilities_are_cached_until_invalidated(tmp_path):
+    db_path = str(tmp_path / 'c.db')
+    _base(db_path)
+    caps = schema_cache.get_capabilities(db_path)
+    assert schema_cache.get_capabilities(db_path) is caps
+    assert not caps.has_customers
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY)")
+    conn.close()
+    assert not schema_cache.get_capabilities(db_path).has_customers  # no probing per call
+    schema_cache.invalidate(db_path)
+    assert schema_cache.get_capabilities(db_path).has_customers
+    schema_cache.invalidate(db_path)
+
+
+def test_migrate_refreshes_the_cache(tmp_path):
+    db_path = str(tmp_path / 'm.db')
+    _base(db_path)
+    assert not schema_cache.get_capabilities(db_path).has_column('orders', 'version')
+    migrate.migrate(db_path, migrate.discover(os.path.join(ROOT, 'migrations')), report=lambda message: None)
+    assert schema_cache.get_capabilities(db_path).has_column('orders', 'version')
+    schema_cache.invalidate(db_path)
+
+
+def test_invalidate_without_a_path_clears_every_database(tmp_path):
+    paths = [str(tmp_path / 'a.db'), str(tmp_path / 'b.db')]
+    for path in paths:
+        _base(path)
+        schema_cache.get_capabilities(path)
+    schema_cache.invalidate()
+    assert not any(path in schema_cache._cache for path in paths)
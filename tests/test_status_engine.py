@@ -0,0 +1,140 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import event_hub
+import status_engine
+from db_pool import get_db
+from status_engine import StatusEngine
+
+INTERVAL = 10
+
+
+@pytest.fixture
+def engine(db_path):
+    # not load()ed: only the orders a test tracks are scheduled
+    engine = StatusEngine(db_path, interval=INTERVAL)
+    engine.has_delivery_staff = True
+    return engine
+
+
+def _insert_order(db_path, status, created_ts):
+    created_at = datetime.fromtimestamp(created_ts).strftime('%Y-%m-%d %H:%M:%S')
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute("""
+            INSERT INTO orders (customer_id, restaurant_id, total_price, status, created_at, updated_at)
+            VALUES (1, 1, 10, ?, ?, ?)
+        """, (status, created_at, created_at))
+        conn.commit()
+        return cursor.lastrowid, created_at
+    finally:
+        conn.close()
+
+
+def _status(db_path, order_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT status FROM orders WHERE id = ?", (order_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_tick_applies_due_transitions_in_one_batch(engine, db_path):
+    created = float(int(datetime.now().timestamp()) - 5)
+    orders = [_insert_order(db_path, 'Pending', created) for _ in range(3)]
+    for order_id, created_at in orders:
+        engine.track(order_id, created_at, 'Pending')
+
+    assert engine.tick(now=created + INTERVAL - 1) == {}
+    due = engine.tick(now=created + INTERVAL)
+    assert sorted(due['Confirmed']) == sorted(order_id for order_id, _ in orders)
+    assert {_status(db_path, order_id) for order_id, _ in orders} == {'Confirmed'}
+    assert engine.pending() == 3
+
+
+def test_tick_catches_up_on_missed_steps(engine, db_path):
+    created = float(int(datetime.now().timestamp()) - 5)
+    order_id, created_at = _insert_order(db_path, 'Pending', created)
+    engine.track(order_id, created_at, 'Pending')
+    due = engine.tick(now=created + 2 * INTERVAL + 1)
+    assert due == {'Confirmed': [order_id], 'Preparing': [order_id]}
+    assert _status(db_path, order_id) == 'Preparing'
+
+
+def test_stale_entry_never_moves_an_order_backwards(engine, db_path):
+    created = float(int(datetime.now().timestamp()) - 5)
+    order_id, created_at = _insert_order(db_path, 'Preparing', created)
+    # the engine still believes the order is Pending (another process advanced it)
+    engine.track(order_id, created_at, 'Pending')
+    engine.tick(now=created + INTERVAL)
+    assert _status(db_path, order_id) == 'Preparing'
+
+
+def test_final_orders_are_left_alone(engine, db_path):
+    created = float(int(datetime.now().timestamp()) - 5)
+    order_id, created_at = _insert_order(db_path, 'Cancelled', created)
+    engine.track(order_id, created_at, 'Pending')
+    engine.tick(now=created + 4 * INTERVAL)
+    assert _status(db_path, order_id) == 'Cancelled'
+
+
+class _RacingConnection:
+    """Pooled connection where another writer tries a PUT just before the engine's status UPDATE"""
+
+    def __init__(self, conn, db_path, order_id):
+        self._conn = conn
+        self._db_path = db_path
+        self._order_id = order_id
+        self.raced = None
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        cursor = self._conn.cursor()
+        execute = cursor.execute
+
+        def racing_execute(sql, params=()):
+            if self.raced is None and sql.lstrip().startswith('UPDATE orders SET status'):
+                other = sqlite3.connect(self._db_path, timeout=0)
+                try:
+                    other.execute("UPDATE orders SET status = 'Preparing' WHERE id = ?", (self._order_id,))
+                    other.commit()
+                    self.raced = True
+                except sqlite3.OperationalError:
+                    self.raced = False  # blocked by the engine's write lock
+                finally:
+                    other.close()
+            return execute(sql, params)
+
+        return _CursorProxy(cursor, racing_execute)
+
+
+class _CursorProxy:
+    def __init__(self, cursor, execute):
+        self._cursor = cursor
+        self.execute = execute
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def test_concurrent_put_cannot_slip_between_read_and_write(engine, db_path, monkeypatch):
+    created = float(int(datetime.now().timestamp()) - 5)
+    order_id, created_at = _insert_order(db_path, 'Pending', created)
+    engine.track(order_id, created_at, 'Pending')
+    connections = []
+
+    def racing_get_db(path):
+        connections.append(_RacingConnection(get_db(path), db_path, order_id))
+        return connections[-1]
+
+    monkeypatch.setattr(status_engine, 'get_db', racing_get_db)
+    subscription = event_hub.get_hub(db_path).subscribe(order_id=order_id)
+    engine.tick(now=created + INTERVAL)
+    assert connections[0].raced is False
+    event = subscription.get(1)
+    assert (event.data['previous'], event.data['status']) == ('Pending', 'Confirmed')
+    assert _status(db_path, order_id) == 'Confirmed'
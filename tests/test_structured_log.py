@@ -0,0 +1,52 @@
+import json
+import logging
+import sys
+import time
+
+from structured_log import JSONFormatter, RateLimitFilter
+
+
+def _record(msg, name='fooddelivery.test', **extra):
+    record = logging.LogRecord(name, logging.INFO, __file__, 1, msg, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_rate_limit_suppresses_repeats_and_reports_the_count():
+    limit = RateLimitFilter(rate=2, window=0.05)
+    assert [limit.filter(_record('slow query')) for _ in range(5)] == [True, True, False, False, False]
+    assert limit.filter(_record('other message'))
+    assert limit.filter(_record('slow query', name='fooddelivery.other'))
+    time.sleep(0.06)
+    record = _record('slow query')
+    assert limit.filter(record)
+    assert record.suppressed == 3
+
+
+def test_rate_limit_keys_on_the_template_not_the_arguments():
+    limit = RateLimitFilter(rate=1, window=60)
+    first = logging.LogRecord('fooddelivery.test', logging.INFO, __file__, 1, 'order %s', (1,), None)
+    second = logging.LogRecord('fooddelivery.test', logging.INFO, __file__, 1, 'order %s', (2,), None)
+    assert limit.filter(first) and not limit.filter(second)
+
+
+def test_rate_zero_disables_the_limit():
+    limit = RateLimitFilter(rate=0)
+    assert all(limit.filter(_record('again')) for _ in range(100))
+
+
+def test_json_formatter_puts_extra_fields_at_the_top_level():
+    entry = json.loads(JSONFormatter().format(_record('request ran many queries', route='/api/orders', queries=60)))
+    assert entry['message'] == 'request ran many queries'
+    assert entry['level'] == 'INFO' and entry['logger'] == 'fooddelivery.test'
+    assert (entry['route'], entry['queries']) == ('/api/orders', 60)
+    assert entry['time'].endswith('Z')
+
+
+def test_json_formatter_includes_the_exception():
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        record = logging.LogRecord('fooddelivery.test', logging.ERROR, __file__, 1, 'failed', (), sys.exc_info())
+    entry = json.loads(JSONFormatter().format(record))
+    assert 'ValueError: boom' in entry['exception']
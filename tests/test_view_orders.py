@@ -0,0 +1,82 @@
+import json
+import re
+import sqlite3
+
+import pytest
+
+import view_orders
+
+
+def _run(db_path, tmp_path, capsys, *args):
+    output = tmp_path / 'orders.jsonl'
+    view_orders.main(['--db', db_path, '--format', 'jsonl', '--output', str(output), *args])
+    orders = [json.loads(line) for line in output.read_text().splitlines()]
+    return orders, capsys.readouterr().err
+
+
+def _ids(db_path, where='1', params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute(f"SELECT id FROM orders WHERE {where} ORDER BY id DESC", params)]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('args, where, params', [
+    ([], '1', ()),
+    (['--status', 'Delivered', '--status', 'Cancelled'], "status IN ('Delivered', 'Cancelled')", ()),
+    (['--restaurant', '2'], 'restaurant_id = ?', (2,)),
+])
+def test_filters_match_the_database(db_path, tmp_path, capsys, args, where, params):
+    orders, summary = _run(db_path, tmp_path, capsys, *args)
+    assert [order['id'] for order in orders] == _ids(db_path, where, params)
+    assert summary.strip() == f"{len(orders)} orders"
+
+
+def test_time_window(db_path, tmp_path, capsys):
+    conn = sqlite3.connect(db_path)
+    try:
+        since, until = [row[0] for row in conn.execute("SELECT created_at FROM orders ORDER BY created_at")][100:300:199]
+    finally:
+        conn.close()
+    orders, _ = _run(db_path, tmp_path, capsys, '--since', since, '--until', until)
+    assert [order['id'] for order in orders] == _ids(db_path, 'created_at >= ? AND created_at < ?', (since, until))
+    assert len(orders) >= 150
+
+
+def test_items_are_grouped_under_their_order(db_path, tmp_path, capsys):
+    orders, _ = _run(db_path, tmp_path, capsys, '--limit', '20')
+    conn = sqlite3.connect(db_path)
+    try:
+        for order in orders:
+            count, total = conn.execute("SELECT COUNT(*), SUM(quantity) FROM order_items WHERE order_id = ?",
+                                        (order['id'],)).fetchone()
+            assert len(order['items']) == count
+            assert sum(item['quantity'] for item in order['items']) == (total or 0)
+    finally:
+        conn.close()
+
+
+def test_before_id_pages_through_every_order(db_path, tmp_path, capsys):
+    seen = []
+    args = ['--limit', '70']
+    while True:
+        orders, summary = _run(db_path, tmp_path, capsys, *args)
+        seen += [order['id'] for order in orders]
+        hint = re.search(r'--before-id (\d+)', summary)
+        if not hint:
+            break
+        assert int(hint.group(1)) == orders[-1]['id']
+        args = ['--limit', '70', '--before-id', hint.group(1)]
+    assert seen == _ids(db_path)
+
+
+def test_text_and_csv_formats(db_path, tmp_path, capsys):
+    order_id = _ids(db_path)[0]
+    text = tmp_path / 'orders.txt'
+    view_orders.main(['--db', db_path, '--limit', '1', '--output', str(text)])
+    assert f"Order #{order_id}\n" in text.read_text()
+    report = tmp_path / 'orders.csv'
+    view_orders.main(['--db', db_path, '--limit', '1', '--format', 'csv', '--output', str(report)])
+    header, first = report.read_text().splitlines()[:2]
+    assert header.startswith('id,restaurant_id,restaurant_name') and first.startswith(f'{order_id},')
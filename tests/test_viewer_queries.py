@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+import viewer_queries
+from viewer_queries import VIEWS
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(viewer_queries, 'PAGE_SIZE', 37)
+
+
+def _page_through(view, db_path):
+    rows, last_key, total = viewer_queries.fetch_page(view, None, True, db_path)
+    pages = [rows]
+    while rows:
+        rows, last_key, _ = viewer_queries.fetch_page(view, last_key, False, db_path)
+        pages.append(rows)
+    return pages, total
+
+
+@pytest.mark.parametrize('name, table', [('orders', 'orders'), ('menu', 'menu_items'), ('restaurants', 'restaurants')])
+def test_pages_visit_every_row_once_in_view_order(db_path, small_pages, name, table):
+    pages, total = _page_through(VIEWS[name], db_path)
+    ids = [values[0] for page in pages for values in page]
+    assert all(len(page) <= 37 for page in pages)
+    conn = sqlite3.connect(db_path)
+    try:
+        assert total == conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] == len(ids) == len(set(ids))
+    finally:
+        conn.close()
+    if name == 'menu':
+        keys = [(values[2], values[1], values[0]) for page in pages for values in page]
+        assert keys == sorted(keys)
+    elif name == 'orders':
+        assert ids == sorted(ids, reverse=True)
+    else:
+        assert ids == sorted(ids)
+
+
+def test_page_query_keeps_keyset_order_across_partitions(db_path, small_pages):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        # split the orders over three partitions with interleaved ids
+        for remainder, table in ((1, 'orders_part_a'), (2, 'orders_part_b')):
+            conn.execute(f"CREATE TABLE {table} AS SELECT * FROM orders WHERE id % 3 = ?", (remainder,))
+            conn.execute("DELETE FROM orders WHERE id % 3 = ?", (remainder,))
+        tables = ('orders', 'orders_part_a', 'orders_part_b')
+        expected = sorted((row[0] for table in tables for row in conn.execute(f"SELECT id FROM {table}")),
+                          reverse=True)
+        view = VIEWS['orders']
+        seen = []
+        last_key = None
+        while True:
+            rows = conn.execute(*viewer_queries.page_query(view, last_key, tables)).fetchall()
+            if not rows:
+                break
+            assert len(rows) <= 37
+            seen += [row['id'] for row in rows]
+            last_key = view['key'](rows[-1])
+    finally:
+        conn.close()
+    assert seen == expected
+
+
+def test_single_table_page_query_has_one_limit():
+    sql, params = viewer_queries.page_query(VIEWS['restaurants'], (10,))
+    assert 'WHERE id > ?' in sql and params == (10, viewer_queries.PAGE_SIZE)
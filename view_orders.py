@@ -1,76 +1,197 @@
+#!/usr/bin/env python3
+"""
+Order report for the Food Delivery System
+Streams orders with their items from one joined query per partition (live
+orders plus archived months) as text, JSON lines or CSV
+"""
+
+import argparse
+import csv
+import heapq
+import json
 import sqlite3
+import sys
+from itertools import groupby, islice
+
+import archive
+
+DB_PATH = 'backend/food_delivery.db'
+
+ORDER_COLUMNS = ['id', 'restaurant_id', 'restaurant_name', 'total_price', 'status', 'created_at']
+
+
+def build_query(args, orders_table='orders', items_table='order_items'):
+    """Single ordered join over one partition; filters and limit apply to orders before the items join"""
+    where = []
+    params = []
+    if args.since:
+        where.append("created_at >= ?")
+        params.append(args.since)
+    if args.until:
+        where.append("created_at < ?")
+        params.append(args.until)
+    if args.status:
+        where.append(f"status IN ({', '.join('?' * len(args.status))})")
+        params.extend(args.status)
+    if args.restaurant:
+        where.append("restaurant_id = ?")
+        params.append(args.restaurant)
+    if args.before_id:
+        where.append("id < ?")
+        params.append(args.before_id)
+
+    order_filter = f"WHERE {' AND '.join(where)}" if where else ""
+    limit = ""
+    if args.limit:
+        limit = "LIMIT ?"
+        params.append(args.limit)
+
+    query = f"""
+        SELECT o.id, o.restaurant_id, r.name, o.total_price, o.status, o.created_at,
+               oi.id, mi.name, oi.quantity, oi.price
+        FROM (
+            SELECT id, restaurant_id, total_price, status, created_at
+            FROM {orders_table}
+            {order_filter}
+            ORDER BY id DESC
+            {limit}
+        ) o
+        LEFT JOIN restaurants r ON o.restaurant_id = r.id
+        LEFT JOIN {items_table} oi ON oi.order_id = o.id
+        LEFT JOIN menu_items mi ON oi.menu_item_id = mi.id
+        ORDER BY o.id DESC, oi.id
+    """
+    return query, params
+
+
+def iter_rows(cursor, batch_size=1000):
+    """Rows of an executed query, fetched in batches"""
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        yield from batch
+
+
+def merged_rows(conn, args, batch_size=1000):
+    """
+    Joined rows from live orders and every archived month, newest order first.
+    Each partition is queried on its own (so the item joins use its index)
+    and the ordered streams are merged; order ids never repeat across partitions.
+    """
+    streams = []
+    for orders_table, items_table in archive.partitions(conn.cursor()):
+        cursor = conn.cursor()
+        cursor.execute(*build_query(args, orders_table, items_table))
+        streams.append(iter_rows(cursor, batch_size))
+    if len(streams) == 1:
+        return streams[0]
+    return heapq.merge(*streams, key=lambda row: -row[0])
+
+
+def iter_orders(rows):
+    """Group joined rows into (order dict, item list) pairs without materialising the result"""
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        items = []
+        order = None
+        for row in group:
+            if order is None:
+                order = dict(zip(ORDER_COLUMNS, row[:6]))
+            if row[6] is not None:
+                items.append({'name': row[7], 'quantity': row[8], 'price': row[9]})
+        yield order, items
+
 
-conn = sqlite3.connect('backend/food_delivery.db')
-conn.row_factory = sqlite3.Row
-cursor = conn.cursor()
-
-print("=" * 80)
-print("ALL ORDERS IN DATABASE")
-print("=" * 80)
-print()
-
-# Get all orders with basic info
-cursor.execute("""
-    SELECT o.id, o.restaurant_id, o.total_price, o.status, o.created_at, r.name as restaurant_name
-    FROM orders o
-    LEFT JOIN restaurants r ON o.restaurant_id = r.id
-    ORDER BY o.id DESC
-""")
-
-orders = cursor.fetchall()
-if not orders:
-    print("No orders found in database")
-else:
-    for order in orders:
-        order_dict = dict(order)
-        print(f"Order #{order_dict['id']}")
-        print(f"  Restaurant: {order_dict['restaurant_name']}")
-        print(f"  Total Price: Rs {order_dict['total_price']}")
-        print(f"  Status: {order_dict['status']}")
-        print(f"  Created: {order_dict['created_at']}")
-        
-        # Get items in this order
-        cursor.execute("""
-            SELECT oi.id, oi.quantity, oi.price, mi.name
-            FROM order_items oi
-            LEFT JOIN menu_items mi ON oi.menu_item_id = mi.id
-            WHERE oi.order_id = ?
-        """, (order_dict['id'],))
-        
-        items = cursor.fetchall()
+def write_text(orders, out):
+    out.write("=" * 80 + "\n")
+    out.write("ORDERS\n")
+    out.write("=" * 80 + "\n\n")
+    count = 0
+    for order, items in orders:
+        count += 1
+        out.write(f"Order #{order['id']}\n")
+        out.write(f"  Restaurant: {order['restaurant_name']}\n")
+        out.write(f"  Total Price: Rs {order['total_price']}\n")
+        out.write(f"  Status: {order['status']}\n")
+        out.write(f"  Created: {order['created_at']}\n")
         if items:
-            print(f"  Items:")
+            out.write("  Items:\n")
             for item in items:
-                item_dict = dict(item)
-                subtotal = item_dict['price'] * item_dict['quantity']
-                print(f"    - {item_dict['name']} x{item_dict['quantity']} @ Rs {item_dict['price']} = Rs {subtotal}")
+                subtotal = item['price'] * item['quantity'] if item['price'] is not None else None
+                out.write(f"    - {item['name']} x{item['quantity']} @ Rs {item['price']} = Rs {subtotal}\n")
         else:
-            print(f"  Items: None")
-        print()
-
-print("=" * 80)
-print("DIRECT TABLE QUERIES")
-print("=" * 80)
-print()
-
-print("ORDERS table:")
-print("-" * 80)
-cursor.execute("SELECT * FROM orders")
-for row in cursor.fetchall():
-    print(dict(row))
-print()
-
-print("ORDER_ITEMS table:")
-print("-" * 80)
-cursor.execute("SELECT * FROM order_items")
-for row in cursor.fetchall():
-    print(dict(row))
-print()
-
-print("MENU_ITEMS table (sample):")
-print("-" * 80)
-cursor.execute("SELECT id, name, price FROM menu_items LIMIT 5")
-for row in cursor.fetchall():
-    print(dict(row))
-
-conn.close()
+            out.write("  Items: None\n")
+        out.write("\n")
+    if not count:
+        out.write("No orders found in database\n")
+    return count
+
+
+def write_jsonl(orders, out):
+    count = 0
+    for order, items in orders:
+        count += 1
+        order['items'] = items
+        out.write(json.dumps(order) + "\n")
+    return count
+
+
+def write_csv(orders, out):
+    writer = csv.writer(out)
+    writer.writerow(ORDER_COLUMNS + ['item_name', 'quantity', 'item_price'])
+    count = 0
+    for order, items in orders:
+        count += 1
+        base = [order[column] for column in ORDER_COLUMNS]
+        if not items:
+            writer.writerow(base + ['', '', ''])
+        for item in items:
+            writer.writerow(base + [item['name'], item['quantity'], item['price']])
+    return count
+
+
+WRITERS = {'text': write_text, 'jsonl': write_jsonl, 'csv': write_csv}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Report orders and their items, archived orders included")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database file")
+    parser.add_argument('--since', help="only orders created at or after this time (YYYY-MM-DD[ HH:MM:SS])")
+    parser.add_argument('--until', help="only orders created before this time")
+    parser.add_argument('--status', action='append', help="order status to include (repeatable)")
+    parser.add_argument('--restaurant', type=int, help="restaurant id")
+    parser.add_argument('--limit', type=int, help="maximum number of orders")
+    parser.add_argument('--before-id', type=int, help="page from orders with id below this (keyset pagination)")
+    parser.add_argument('--format', choices=sorted(WRITERS), default='text')
+    parser.add_argument('--output', help="write to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    conn = sqlite3.connect(args.db)
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        orders = iter_orders(merged_rows(conn, args))
+        if args.limit:
+            orders = islice(orders, args.limit)  # each partition returned up to limit orders
+        last = {}
+
+        def tracked(orders):
+            for order, items in orders:
+                last['id'] = order['id']
+                yield order, items
+
+        count = WRITERS[args.format](tracked(orders), out)
+        summary = f"{count} orders"
+        if args.limit and count == args.limit:
+            summary += f"; next page: --before-id {last['id']}"
+        print(summary, file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Table views for the Food Delivery System database viewer
+Keyset page queries shared by the Tkinter GUI and the index advisor; kept
+free of tkinter so headless tools can import them
+"""
+
+import archive
+from db_pool import DB_PATH, get_db
+
+PAGE_SIZE = 200
+
+# Each view loads pages keyed on its sort columns (WHERE key > last key LIMIT n).
+# 'partitioned' views run their query once per archive partition ({table}) and
+# merge the pages with 'merge_order'.
+VIEWS = {
+    'orders': {
+        'label': 'orders',
+        'columns': [('ID', 'ID', 40), ('Restaurant', 'Restaurant', 200), ('Total', 'Total Price', 100),
+                    ('Status', 'Status', 120), ('Created', 'Created', 200)],
+        'count': "SELECT COUNT(*) FROM orders",
+        'partitioned': True,
+        'merge_order': 'id DESC',
+        'query': """
+            SELECT o.id, r.name as restaurant, o.total_price, o.status, o.created_at
+            FROM {table} o
+            LEFT JOIN restaurants r ON o.restaurant_id = r.id
+            {where}
+            ORDER BY o.id DESC
+            LIMIT ?
+        """,
+        'after': "WHERE o.id < ?",
+        'key': lambda r: (r['id'],),
+        'values': lambda r: (r['id'], r['restaurant'], f"Rs {r['total_price']}", r['status'], r['created_at']),
+    },
+    'menu': {
+        'label': 'menu items',
+        'columns': [('ID', 'ID', 40), ('Item', 'Item Name', 250), ('Restaurant', 'Restaurant', 150),
+                    ('Category', 'Category', 120), ('Price', 'Price', 100)],
+        'count': "SELECT COUNT(*) FROM menu_items",
+        'query': """
+            SELECT m.id, m.name, COALESCE(r.name, '') as restaurant, m.category, m.price
+            FROM menu_items m
+            LEFT JOIN restaurants r ON m.restaurant_id = r.id
+            {where}
+            ORDER BY COALESCE(r.name, ''), m.name, m.id
+            LIMIT ?
+        """,
+        'after': "WHERE (COALESCE(r.name, ''), m.name, m.id) > (?, ?, ?)",
+        'key': lambda m: (m['restaurant'], m['name'], m['id']),
+        'values': lambda m: (m['id'], m['name'], m['restaurant'], m['category'], f"Rs {m['price']}"),
+    },
+    'restaurants': {
+        'label': 'restaurants',
+        'columns': [('ID', 'ID', 40), ('Name', 'Name', 200), ('Cuisine', 'Cuisine', 150),
+                    ('Rating', 'Rating', 100), ('Delivery', 'Delivery (min)', 100)],
+        'count': "SELECT COUNT(*) FROM restaurants",
+        'query': """
+            SELECT id, name, cuisine, rating, delivery_time
+            FROM restaurants
+            {where}
+            ORDER BY id
+            LIMIT ?
+        """,
+        'after': "WHERE id > ?",
+        'key': lambda r: (r['id'],),
+        'values': lambda r: (r['id'], r['name'], r['cuisine'], r['rating'], r['delivery_time']),
+    },
+}
+
+
+def page_query(view, last_key, tables=('orders',)):
+    """
+    (sql, params) for one page. With several partitions each one contributes at
+    most a page of its own (so every member stays a short index walk) and the
+    union is cut back to one page.
+    """
+    where = view['after'] if last_key else ''
+    params = (*(last_key or ()), PAGE_SIZE)
+    if len(tables) == 1:
+        return view['query'].format(where=where, table=tables[0]), params
+    members = [f"SELECT * FROM ({view['query'].format(where=where, table=table)})" for table in tables]
+    sql = ' UNION ALL '.join(members) + f" ORDER BY {view['merge_order']} LIMIT ?"
+    return sql, params * len(tables) + (PAGE_SIZE,)
+
+
+def fetch_page(view, last_key, with_count, db_path=DB_PATH):
+    """Read one page (and optionally the row count) for a view; runs off the UI thread"""
+    conn = get_db(db_path)
+    try:
+        cursor = conn.cursor()
+        tables = ('orders',)
+        total = cursor.execute(view['count']).fetchone()[0] if with_count else None
+        if view.get('partitioned'):
+            months = archive.months(cursor)
+            tables += tuple(month['orders_table'] for month in months)
+            if total is not None:
+                total += sum(month['order_count'] for month in months)
+        cursor.execute(*page_query(view, last_key, tables))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+    next_key = view['key'](rows[-1]) if rows else last_key
+    return [view['values'](row) for row in rows], next_key, total